@@ -0,0 +1,75 @@
+"""Mock devices shared by the tests of the abstractbased generators."""
+
+from vprgen.abstractbased import ArchitectureDelegate
+from vprgen.abstractbased.impl.namedtuplebased import *
+
+from collections import namedtuple
+
+class MockRRGArchitecture(namedtuple('MockRRGArchitecture', 'name width height x_channel_width y_channel_width '
+    'segments switches complex_blocks nodes edges'), ArchitectureDelegate):
+    def get_tile(self, x, y):
+        if 0 < x < self.width - 1 and 0 < y < self.height - 1:
+            return Tile('CLB', 1)
+        return None
+
+mock_rrg = MockRRGArchitecture('mock', 4, 4, 2, 2,
+        (Segment('L1', 0, 1, 'default'), ),
+        (Switch('default', 0, 1e-10), ),
+        (TopPbType('CLB', 1,
+            inputs = (TopPbTypeInputPort('I', 2), ),
+            outputs = (TopPbTypeOutputOrClockPort('O', 1), )), ),
+        (Node(0, NodeType.SOURCE, NodeLoc(1, 1, 0)),
+            Node(1, NodeType.OPIN, NodeLoc(1, 1, 2, side = Side.right)),
+            Node(2, NodeType.CHANX, NodeLoc(1, 1, 0, xhigh = 2), SegmentDirection.INC_DIR, 0,
+                timing = Timing(101.0, 1.5e-14)),
+            Node(3, NodeType.IPIN, NodeLoc(2, 1, 0, side = Side.left))),
+        (Edge(0, 1, 0),
+            Edge(1, 2, 0, {"fasm_features": "O_to_X"}),
+            Edge(2, 3, 0)))
+
+class MockArchArchitecture(namedtuple('MockArchArchitecture', 'name width height x_channel_width y_channel_width '
+    'models segments switches complex_blocks'), ArchitectureDelegate):
+    def get_tile(self, x, y):
+        return None
+
+class ColumnarDevice(MockRRGArchitecture):
+    """`MockRRGArchitecture` with columnar nodes and edges, and a materialized tile grid.
+
+    ``node_source`` and ``edge_source``, if set on the instance, are called without arguments to get `node_columns` and
+    `edge_columns`, and ``grid``, if set, is the `tile_grid`.
+    """
+    node_source = edge_source = grid = None
+
+    @property
+    def node_columns(self):
+        return None if self.node_source is None else self.node_source()
+
+    @property
+    def edge_columns(self):
+        return None if self.edge_source is None else self.edge_source()
+
+    @property
+    def tile_grid(self):
+        return self.grid
+
+def node_batch(nodes):
+    """Convert ``nodes`` into one batch of columnar nodes."""
+    import numpy as np
+    chan, pin = (NodeType.CHANX, NodeType.CHANY), (NodeType.IPIN, NodeType.OPIN)
+    return {"id": np.array([n.id_ for n in nodes]),
+            "type": np.array([n.type_.value for n in nodes]),
+            "xlow": np.array([n.loc.xlow for n in nodes]),
+            "ylow": np.array([n.loc.ylow for n in nodes]),
+            "xhigh": np.array([n.loc.xhigh for n in nodes]),
+            "yhigh": np.array([n.loc.yhigh for n in nodes]),
+            "ptc": np.array([n.loc.ptc for n in nodes]),
+            "side": np.array([n.loc.side.value if n.type_ in pin else 0 for n in nodes]),
+            "direction": np.array([n.direction.value if n.type_ in chan else 0 for n in nodes]),
+            "segment_id": np.array([n.segment_id if n.type_ in chan else 0 for n in nodes]),
+            "R": np.array([n.timing.R if n.timing else 0 for n in nodes], dtype = object),
+            "C": np.array([n.timing.C if n.timing else 0 for n in nodes], dtype = object), }
+
+def edge_batch(edges):
+    """Convert ``edges`` into one batch of columnar edges. Metadata is dropped."""
+    return {"src": [e.src_node for e in edges], "sink": [e.sink_node for e in edges],
+            "switch": [e.switch_id for e in edges]}
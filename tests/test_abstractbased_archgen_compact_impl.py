@@ -0,0 +1,91 @@
+from vprgen.abstractbased import ArchitectureDelegate, NodeType, SegmentDirection, Side
+from vprgen.abstractbased.impl.compact import NodeArray, EdgeArray
+
+try:
+    from io import BytesIO as StringIO
+except ImportError:
+    try:
+        from cStringIO import StringIO
+    except ImportError:
+        from StringIO import StringIO
+
+from mock_devices import mock_rrg
+
+def test_views():
+    nodes = NodeArray.from_nodes(mock_rrg.nodes)
+    assert len(nodes) == 4
+    for node, gold in zip(nodes, mock_rrg.nodes):
+        assert (node.id_, node.type_, node.capacity) == (gold.id_, gold.type_, gold.capacity)
+        assert (node.loc.xlow, node.loc.ylow, node.loc.xhigh, node.loc.yhigh, node.loc.ptc) == (
+                gold.loc.xlow, gold.loc.ylow, gold.loc.xhigh, gold.loc.yhigh, gold.loc.ptc)
+        assert (node.timing is None) == (gold.timing is None)
+    assert nodes[1].loc.side is Side.right
+    assert (nodes[2].direction, nodes[2].segment_id, nodes[2].timing.R) == (SegmentDirection.INC_DIR, 0, 101.0)
+    assert nodes[-1].id_ == 3
+    edges = EdgeArray.from_edges(mock_rrg.edges)
+    assert [(e.src_node, e.sink_node, e.switch_id, e.metadata) for e in edges] == [tuple(e) for e in mock_rrg.edges]
+
+def test_extend():
+    nodes = NodeArray()
+    nodes.extend(range(3), NodeType.CHANX, [0, 1, 2], 1, 0, xhigh = [1, 2, 3],
+            direction = [SegmentDirection.INC_DIR.value, SegmentDirection.DEC_DIR.value, 0], segment_id = 0, R = 1.)
+    nodes.append(3, NodeType.IPIN, 1, 1, 4, side = Side.top)
+    assert [n.loc.xhigh for n in nodes] == [1, 2, 3, 1]
+    assert nodes[1].direction is SegmentDirection.DEC_DIR
+    assert (nodes[2].timing.R, nodes[2].timing.C, nodes[3].timing) == (1., 0., None)
+    assert nodes[3].loc.side is Side.top
+    try:
+        nodes.extend(range(2), NodeType.SINK, [0], 0, 0)
+    except ValueError:
+        assert len(nodes.type_) == len(nodes.xlow) == 4
+    else:
+        assert False
+    edges = EdgeArray()
+    edges.extend(range(3), [1, 2, 3], 0)
+    assert [(e.src_node, e.sink_node, e.switch_id) for e in edges] == [(0, 1, 0), (1, 2, 0), (2, 3, 0)]
+
+def test_gen_rrg_xml():
+    nodes, edges = NodeArray.from_nodes(mock_rrg.nodes), EdgeArray.from_edges(mock_rrg.edges)
+    for pretty in (False, True):
+        expected, actual = StringIO(), StringIO()
+        mock_rrg.gen_rrg_xml(expected, pretty)
+        mock_rrg._replace(nodes = nodes, edges = edges).gen_rrg_xml(actual, pretty)
+        assert actual.getvalue() == expected.getvalue()
+
+def test_gen_rrg_xml_columns():
+    import pytest
+    pytest.importorskip("numpy")
+    edges = EdgeArray.from_edges(e._replace(metadata = None) for e in mock_rrg.edges)
+    nodes = NodeArray.from_nodes(mock_rrg.nodes)
+    class Columnar(type(mock_rrg)):
+        @property
+        def node_columns(self):
+            return nodes.columns()
+
+        @property
+        def edge_columns(self):
+            return edges.columns()
+    expected, actual = StringIO(), StringIO()
+    mock_rrg._replace(edges = edges).gen_rrg_xml(expected)
+    Columnar(*mock_rrg).gen_rrg_xml(actual)
+    assert actual.getvalue() == expected.getvalue()
+
+def test_integral_timing():
+    from vprgen.abstractbased.impl.namedtuplebased import Timing
+    gold = mock_rrg._replace(nodes = [n._replace(timing = Timing(i, 2.5) if n.timing else None)
+        for i, n in enumerate(mock_rrg.nodes)], edges = [e._replace(metadata = None) for e in mock_rrg.edges])
+    nodes = NodeArray.from_nodes(gold.nodes)
+    assert [(type(n.timing.R), type(n.timing.C)) for n in nodes if n.timing] == [(int, float)] * sum(
+            1 for n in gold.nodes if n.timing)
+    expected, actual = StringIO(), StringIO()
+    gold.gen_rrg_xml(expected)
+    gold._replace(nodes = nodes).gen_rrg_xml(actual)
+    assert actual.getvalue() == expected.getvalue()
+    assert b'<timing R="2" C="2.5">' in actual.getvalue()
+    nodes = NodeArray()
+    nodes.extend(range(3), NodeType.SINK, 0, 0, 0, R = [0, 1.5, 2], C = 0)
+    assert [(n.timing.R, type(n.timing.R), type(n.timing.C)) for n in nodes] == [
+            (0, int, int), (1.5, float, int), (2, int, int)]
+    import pytest
+    pytest.importorskip("numpy")
+    assert [type(v) for v in nodes.columns()["R"]] == [int, float, int]
@@ -272,3 +272,19 @@ def test_gen_top_pb_type():
         </pb_type>
     """, dict_constructor = dict)
     assert back == gold
+
+def test_interner():
+    timing = Interner(Timing, maxsize = 2)
+    a = timing(1.0, 2.0)
+    assert timing(1.0, 2.0) is a
+    assert timing(1, 2) is not a            # formatted differently
+    timing(3.0, 4.0)                        # evicts Timing(1.0, 2.0)
+    assert timing(1.0, 2.0) is not a
+    assert timing.stats == {"hits": 1, "misses": 4, "size": 2}
+    tile = intern_tile("CLB", 1, metadata = {"fasm_prefix": ["A", "B"]})
+    assert intern_tile("CLB", 1, metadata = {"fasm_prefix": ["A", "B"]}) is tile
+    assert intern_metadata({"fasm_prefix": ["A", "B"]}) is tile.metadata
+    # metadata in a different order is not interned together, since the order is kept in the output
+    from collections import OrderedDict
+    ab = intern_metadata(OrderedDict([("a", "1"), ("b", "2")]))
+    assert list(intern_metadata(OrderedDict([("b", "2"), ("a", "1")]))) == ["b", "a"] and list(ab) == ["a", "b"]
@@ -0,0 +1,115 @@
+import pytest
+
+from vprgen.abstractbased.impl.namedtuplebased import *
+from vprgen.abstractbased.impl.xmlreader import ArchitectureXMLReader, RRGraphXMLReader
+
+try:
+    from io import BytesIO as StringIO
+except ImportError:
+    try:
+        from cStringIO import StringIO
+    except ImportError:
+        from StringIO import StringIO
+
+from mock_devices import *
+
+def test_read_rrg_xml():
+    stream = StringIO()
+    mock_rrg.gen_rrg_xml(stream)
+    reader = RRGraphXMLReader(stream)
+    assert (reader.width, reader.height, reader.x_channel_width, reader.y_channel_width) == (4, 4, 2, 2)
+    assert ([(node.id_, node.type_, node.loc) for node in reader.iter_nodes()] ==
+            [(node.id_, node.type_, node.loc) for node in mock_rrg.nodes])
+    assert list(reader.iter_edges()) == list(mock_rrg.edges)
+    tiles = {(x, y): tile for x, y, tile in reader.iter_tiles()}
+    assert tiles == {(x, y): Tile('CLB', 1) for x in (1, 2) for y in (1, 2)}
+
+    class Reloaded(MockRRGArchitecture):
+        def get_tile(self, x, y):
+            return tiles.get((x, y))
+    reloaded = Reloaded('mock', reader.width, reader.height, reader.x_channel_width, reader.y_channel_width,
+            tuple(reader.iter_segments()), tuple(reader.iter_switches()), mock_rrg.complex_blocks,
+            reader.iter_nodes(), reader.iter_edges())
+    back = StringIO()
+    reloaded.gen_rrg_xml(back)
+    assert back.getvalue() == stream.getvalue()
+
+def test_read_arch_xml():
+    lut = LeafPbType('LUT', '.names', class_ = LeafPbTypeClass.lut,
+            inputs = (LeafPbTypePort('in', 2, port_class = LeafPbTypePortClass.lut_in), ),
+            outputs = (LeafPbTypePort('out', 1, port_class = LeafPbTypePortClass.lut_out), ),
+            delay_constants = (DelayConstant('LUT.in', 'LUT.out', max_ = 1e-10), ))
+    ble = IntermediatePbType('BLE', inputs = (PbTypePort('I', 2), ), outputs = (PbTypePort('O', 1), ),
+            pb_types = (lut, ),
+            directs = (InterconnectItem('i', ('BLE.I', ), ('LUT.in', )),
+                InterconnectItem('o', ('LUT.out', ), ('BLE.O', ))))
+    modes = tuple(Mode(name, pb_types = (ble, ),
+        directs = (InterconnectItem('i', ('CLB.I', ), ('BLE.I', )),
+            InterconnectItem('o', ('BLE.O', ), ('CLB.O', ), metadata = {"fasm_features": name})))
+        for name in ('a', 'b'))
+    clb = TopPbType('CLB', 1, width = 2,
+            inputs = (TopPbTypeInputPort('I', 2, TopPbTypePortEquivalent.full), ),
+            outputs = (TopPbTypeOutputOrClockPort('O', 1), ),
+            modes = modes,
+            fc = FC(FCType.frac, 0.5, FCType.abs_, 2),
+            pinlocations = PinLocations(PinLocationsPattern.custom,
+                (PinLocationsLoc(Side.left, ('CLB.I', )), PinLocationsLoc(Side.right, ('CLB.O', )))))
+
+    class Arch(MockArchArchitecture):
+        def get_tile(self, x, y):
+            if y == 1 and x in (1, 2):
+                return Tile('CLB', 1, x - 1)
+            return None
+    arch = Arch('mock', 4, 4, 2, 2,
+            (Model('adder', (ModelInputPort('a', combinational_sink_ports = ('s', )), ), (ModelOutputPort('s'), )), ),
+            (Segment('L4', 0, 4, 'default', Rmetal = 101.0, sb = (True, ) * 5, cb = (True, False, True, False)), ),
+            (Switch('default', 0, 1e-10), Switch('tdel', 1, (SwitchTdel(1, 1e-11), SwitchTdel(2, 2e-11)),
+                SwitchType.buffer_)),
+            (clb, ))
+    stream = StringIO()
+    arch.gen_arch_xml(stream)
+    reader = ArchitectureXMLReader(stream, 2, 2)
+    assert reader.models == list(arch.models)
+    assert reader.segments == list(arch.segments)
+    assert reader.switches == list(arch.switches)
+    assert reader.complex_blocks[0] == clb
+    assert reader.complex_blocks[0].modes[0].pb_types[0] is reader.complex_blocks[0].modes[1].pb_types[0]
+    assert [reader.get_tile(x, 1) for x in range(4)] == [arch.get_tile(x, 1) for x in range(4)]
+    back = StringIO()
+    reader.gen_arch_xml(back)
+    assert back.getvalue() == stream.getvalue()
+    # equal values of different types are not interned together
+    intern = reader._ArchitectureXMLReader__intern
+    delay = intern(DelayConstant('a', 'clk', None, 1e-10))
+    assert type(intern(TClockToQ('a', 'clk', None, 1e-10))) is TClockToQ
+    assert intern(DelayConstant('a', 'clk', None, 1e-10)) is delay
+    assert type(intern(TSetupOrHold('a', 'clk', 1.0)).value) is float
+    assert type(intern(TSetupOrHold('a', 'clk', 1)).value) is int
+    # unsupported features are rejected with a clear error
+    for old, new in (('length="4"', 'length="longline"'), ("fixed_layout", "auto_layout")):
+        with pytest.raises(ValueError) as e:
+            ArchitectureXMLReader(StringIO(stream.getvalue().replace(old.encode(), new.encode())))
+        assert new.split("=")[-1].strip('"') in str(e.value)
+
+def test_read_arch_xml_deep_modes():
+    def key_size(key):
+        return 1 + sum(key_size(k) for k in key) if isinstance(key, tuple) else 1
+    def read(depth):
+        pb = LeafPbType('LUT', '.names', inputs = (LeafPbTypePort('in', 2), ), outputs = (LeafPbTypePort('out', 1), ))
+        for _ in range(depth):
+            pb = IntermediatePbType('P', inputs = (PbTypePort('I', 2), ), outputs = (PbTypePort('O', 1), ),
+                    modes = tuple(Mode(name, pb_types = (pb, ), directs = (InterconnectItem('i', ('P.I', ), ('P.I', )),
+                        InterconnectItem('o', ('P.O', ), ('P.O', )))) for name in ('a', 'b')))
+        clb = TopPbType('CLB', 1, modes = (Mode('m', pb_types = (pb, )), ))
+        stream = StringIO()
+        MockArchArchitecture('mock', 4, 4, 2, 2, (), (Segment('L1', 0, 1, 'default'), ),
+                (Switch('default', 0, 1e-10), ), (clb, )).gen_arch_xml(stream)
+        reader = ArchitectureXMLReader(stream)
+        assert reader.complex_blocks[0] == clb
+        modes = reader.complex_blocks[0].modes[0].pb_types[0].modes
+        assert modes[0].pb_types[0] is modes[1].pb_types[0]
+        return len(stream.getvalue()), sum(key_size(k) for k in reader._ArchitectureXMLReader__pool)
+    # the XML repeats each level twice, but the keys of the interning pool only grow with the number of levels
+    (small_xml, small_keys), (large_xml, large_keys) = read(3), read(9)
+    assert large_xml > 32 * small_xml
+    assert large_keys < 2 * small_keys * 9 / 3
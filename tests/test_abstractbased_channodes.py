@@ -0,0 +1,60 @@
+import pytest
+
+from vprgen.abstractbased import ChannelNodeGenerator, RRGraphChecker
+from vprgen.abstractbased.impl.namedtuplebased import *
+
+try:
+    from io import BytesIO as StringIO
+except ImportError:
+    try:
+        from cStringIO import StringIO
+    except ImportError:
+        from StringIO import StringIO
+
+from mock_devices import *
+
+def test_channel_node_generator():
+    np = pytest.importorskip("numpy")
+    segments = (Segment('L1', 0, 1, 'mux', freq = 0.3, Rmetal = 2.0, Cmetal = 0.5),
+            Segment('L4', 1, 4, 'mux', freq = 0.7, Rmetal = 1.0, Cmetal = 0.25))
+    device = ColumnarDevice(*mock_rrg._replace(width = 9, height = 7, x_channel_width = 20, y_channel_width = 12,
+        segments = segments, edges = ()))
+    generator = ChannelNodeGenerator(device, first_id = 3, timing = True)
+    # 3 pairs of L1 tracks, and 7 pairs of staggered L4 tracks with the last group cut short in CHANX
+    chanx = generator.chanx
+    assert chanx.segment_ids.tolist() == [0] * 6 + [1] * 14
+    assert chanx.starts.tolist() == [1] * 6 + [1, 1, 2, 2, 3, 3, 4, 4, 1, 1, 2, 2, 3, 3]
+    assert chanx.directions.tolist()[:4] == [SegmentDirection.INC_DIR.value, SegmentDirection.DEC_DIR.value] * 2
+    assert generator.chany.segment_ids.tolist() == [0] * 4 + [1] * 8
+    batches = list(generator.iter_batches(batch_size = 40))
+    ids = np.concatenate([b["id"] for b in batches])
+    assert (ids == np.arange(3, 3 + generator.num_nodes)).all()
+    # every position of every track is covered by exactly one wire, and wires are looked up by position
+    for tracks in (generator.chanx, generator.chany):
+        covered = np.zeros((tracks.num_channels, tracks.width, tracks.span + 2), dtype = np.int64)
+        for batch in batches:
+            if batch["type"][0] != tracks.type_.value:
+                continue
+            horizontal = tracks.type_ is NodeType.CHANX
+            if horizontal:
+                chans, lows, highs = batch["ylow"], batch["xlow"], batch["xhigh"]
+            else:
+                chans, lows, highs = batch["xlow"], batch["ylow"], batch["yhigh"]
+            assert (highs - lows < tracks.lengths[batch["ptc"]]).all()
+            assert np.allclose(batch["R"], np.where(batch["segment_id"] == 0, 2.0, 1.0) * (highs - lows + 1))
+            for i, chan, ptc, low, high in zip(batch["id"], chans, batch["ptc"], lows, highs):
+                covered[chan, ptc, low:high + 1] += 1
+                assert tracks.locate(chan, ptc, (low + high) // 2)[0] == i
+                x, y = (high, chan) if horizontal else (chan, high)
+                assert generator.get_node_id(tracks.type_, x, y, ptc) == i
+        assert (covered[:, :, 1:-1] == 1).all() and not covered[:, :, 0].any() and not covered[:, :, -1].any()
+    # the first wire of a staggered track ends early, and later channels shift the stagger
+    assert tuple(chanx.wire_bounds(0, 8, 0)) == (1, 1)
+    assert tuple(chanx.wire_bounds(1, 8, 0)) == (1, 4)
+    # the nodes agree with the channel widths and segments
+    device.node_source = lambda: ChannelNodeGenerator(device).iter_batches(batch_size = 40)
+    checker = RRGraphChecker(device)
+    device.gen_rrg_xml(StringIO(), checker = checker)
+    assert checker.ok and checker.num_nodes == generator.num_nodes
+    with pytest.raises(ValueError):
+        ChannelNodeGenerator(mock_rrg._replace(x_channel_width = 5, segments = segments))
@@ -0,0 +1,47 @@
+import pytest
+
+from vprgen.abstractbased import RRGraphChecker
+from vprgen.abstractbased.impl.namedtuplebased import *
+
+try:
+    from io import BytesIO as StringIO
+except ImportError:
+    try:
+        from cStringIO import StringIO
+    except ImportError:
+        from StringIO import StringIO
+
+from mock_devices import *
+
+def test_rrg_checker():
+    # SOURCE nodes are on output pins
+    good = mock_rrg._replace(nodes = (Node(0, NodeType.SOURCE, NodeLoc(1, 1, 2)), ) + mock_rrg.nodes[1:])
+    checker = RRGraphChecker(good)
+    good.gen_rrg_xml(StringIO(), checker = checker)
+    assert checker.ok and (checker.num_nodes, checker.num_edges) == (4, 3)
+    bad = good._replace(nodes = good.nodes + (
+        Node(3, NodeType.SINK, NodeLoc(1, 1, 0)),                                   # duplicate
+        Node(5, NodeType.SINK, NodeLoc(1, 1, 3)),                                   # ptc out of range
+        Node(6, NodeType.SINK, NodeLoc(1, 1, 2)),                                   # output pin
+        Node(7, NodeType.IPIN, NodeLoc(0, 0, 0, side = Side.left)),                 # empty tile
+        Node(8, NodeType.CHANY, NodeLoc(1, 4, 0), SegmentDirection.INC_DIR, 0),     # outside of the grid
+        Node(9, NodeType.CHANY, NodeLoc(1, 1, 2), SegmentDirection.INC_DIR, 1),     # segment and ptc
+        ), edges = good.edges + (Edge(2, 4, 0), Edge(2, 3, 1)))
+    expected = {"duplicate_node": 1, "missing_node": 1, "ptc": 3, "location": 2, "segment": 1, "dangling_edge": 1,
+            "switch": 1}
+    checker = RRGraphChecker(bad, max_problems = 5)
+    bad.gen_rrg_xml(StringIO(), checker = checker)
+    assert checker.counts == expected and len(checker.problems) == 5
+    assert RRGraphChecker(bad).run(bad).counts == expected
+    with pytest.raises(ValueError):
+        checker.raise_if_failed()
+    # columnar nodes and edges
+    pytest.importorskip("numpy")
+    nodes, edges = bad.nodes, tuple(Edge(e.src_node, e.sink_node, e.switch_id) for e in bad.edges)
+    bad = ColumnarDevice(*bad._replace(edges = edges))
+    bad.node_source = lambda: [node_batch(nodes[:4]), node_batch(nodes[4:])]
+    bad.edge_source = lambda: edge_batch(edges)
+    assert RRGraphChecker(bad).run(bad).counts == expected
+    checker = RRGraphChecker(bad)
+    bad.gen_rrg_xml(StringIO(), checker = checker)
+    assert checker.counts == expected
@@ -0,0 +1,55 @@
+import pytest
+
+from vprgen._csr import CSRIndexBuilder
+from vprgen._xml import make_xml_generator
+from vprgen.abstractbased._columnar import iter_node_rows, iter_edge_rows, format_node_columns, format_edge_columns
+from vprgen.abstractbased.impl.namedtuplebased import *
+
+try:
+    from io import BytesIO as StringIO
+except ImportError:
+    try:
+        from cStringIO import StringIO
+    except ImportError:
+        from StringIO import StringIO
+
+from mock_devices import *
+
+def test_gen_rrg_xml_columns():
+    pytest.importorskip("numpy")
+    objects = mock_rrg._replace(edges = (mock_rrg.edges[0], Edge(1, 2, 0), mock_rrg.edges[2]))
+    columnar = ColumnarDevice(*objects)
+    columnar.node_source = lambda: [node_batch(objects.nodes[:3]), node_batch(objects.nodes[3:])]     # two batches
+    columnar.edge_source = lambda: edge_batch(objects.edges)
+    for pretty in (False, True):
+        for backend in ("lxml", "template"):
+            expected, actual = StringIO(), StringIO()
+            objects.gen_rrg_xml(expected, pretty, backend)
+            columnar.gen_rrg_xml(actual, pretty, backend)
+            assert actual.getvalue() == expected.getvalue()
+
+def test_missing_node_columns():
+    pytest.importorskip("numpy")
+    # pin nodes without "side"
+    batch = {"id": [0, 1], "type": [NodeType.SINK.value, NodeType.IPIN.value], "xlow": [1, 1], "ylow": [1, 1],
+            "ptc": [0, 0]}
+    assert [row[8] for row in iter_node_rows(dict(batch, side = [0, Side.top.value]))] == [None, "TOP"]
+    with pytest.raises(KeyError, match = "Missing column 'side'"):
+        list(iter_node_rows(batch))
+    with make_xml_generator(StringIO(), False, True, "template") as xg, pytest.raises(KeyError,
+            match = "Missing column 'side'"):
+        format_node_columns(xg, batch)
+
+def test_missing_edge_columns():
+    pytest.importorskip("numpy")
+    # edges without "sink"
+    batches = [{"src": [0], "sink": [1], "switch": [0]}, {"src": [1], "switch": [0]}]
+    with pytest.raises(KeyError, match = "Missing column 'sink' in edge batch"):
+        list(iter_edge_rows(batches))
+    with make_xml_generator(StringIO(), False, True, "template") as xg, pytest.raises(KeyError,
+            match = "Missing column 'sink' in edge batch"):
+        format_edge_columns(xg, batches)
+    device = ColumnarDevice(*mock_rrg)
+    device.edge_source = lambda: batches
+    with pytest.raises(KeyError, match = "Missing column 'sink' in edge batch"):
+        device.gen_rrg_xml(StringIO(), csr_index = CSRIndexBuilder())
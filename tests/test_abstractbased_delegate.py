@@ -0,0 +1,99 @@
+from vprgen._xml import make_xml_generator
+from vprgen.abstractbased import TileGrid
+from vprgen.abstractbased.impl.namedtuplebased import *
+
+try:
+    from io import BytesIO as StringIO
+except ImportError:
+    try:
+        from cStringIO import StringIO
+    except ImportError:
+        from StringIO import StringIO
+
+from xmltodict import parse
+from mock_devices import *
+
+def test_gen_rrg_xml_backends():
+    for pretty in (False, True):
+        outputs = []
+        for backend in ("lxml", "template"):
+            stream = StringIO()
+            mock_rrg.gen_rrg_xml(stream, pretty, backend)
+            outputs.append(stream.getvalue())
+        assert outputs[0] == outputs[1]
+
+def test_gen_edges_chunked():
+    edges = [Edge(i, i + 1, i % 3, {"fasm_features": "f{}".format(i)} if i % 7 == 3 else None) for i in range(50)]
+    for pretty in (False, True):
+        for backend in ("lxml", "template"):
+            expected = StringIO()
+            with make_xml_generator(expected, pretty, True, backend) as xg, xg.element("rr_edges"):
+                for edge in edges:
+                    if edge.metadata:
+                        mock_rrg._gen_edge(xg, edge)
+                    else:
+                        xg.element_leaf("edge", {"src_node": str(edge.src_node), "sink_node": str(edge.sink_node),
+                            "switch_id": str(edge.switch_id)})
+            for chunk_size in (1, 2, 7, 1000):
+                actual = StringIO()
+                with make_xml_generator(actual, pretty, True, backend) as xg, xg.element("rr_edges"):
+                    mock_rrg._gen_edges(xg, edges, chunk_size)
+                assert actual.getvalue() == expected.getvalue()
+
+def test_iter_tiles():
+    io, clb, ram = TopPbType('IO', 1), TopPbType('CLB', 2), TopPbType('RAM', 3, height = 2, width = 2)
+    width, height = 12, 9
+    class Dense(MockRRGArchitecture):
+        def get_tile(self, x, y):
+            if x in (0, width - 1) and 0 < y < height - 1:
+                return Tile('IO', 1, metadata = {"fasm_prefix": "IO_Y{}".format(y)})
+            elif x in (4, 5) and 1 <= y < 7:
+                return Tile('RAM', 3, x - 4, (y - 1) % 2)
+            elif 0 < x < width - 1 and 0 < y < height - 1:
+                return Tile('CLB', 2)
+            return None
+    dense = Dense(*mock_rrg._replace(width = width, height = height, complex_blocks = (io, clb, ram)))
+    class Sparse(Dense):
+        def get_tile(self, x, y):
+            raise AssertionError("get_tile called")
+        def iter_tiles(self):
+            # anchors in an arbitrary order
+            for x, y, tile in reversed(list(TileGrid.from_delegate(dense))):
+                if tile is not None and tile.xoffset == tile.yoffset == 0:
+                    yield x, y, tile
+    sparse = Sparse(*dense)
+    assert list(sparse._get_tile_grid()) == list(TileGrid.from_delegate(dense))
+    assert sparse._get_tile_grid().run_count == TileGrid.from_delegate(dense).run_count
+    for gen in ("gen_arch_xml", "gen_rrg_xml"):
+        expected, actual = StringIO(), StringIO()
+        getattr(dense, gen)(expected)
+        getattr(sparse, gen)(actual)
+        assert actual.getvalue() == expected.getvalue()
+
+def test_gen_nodes_timing():
+    # shared timing values are formatted once and produce the same output
+    nodes = [Node(i, NodeType.SINK, NodeLoc(1, 1, i), timing = intern_timing(1.5, 2e-15)) for i in range(3)]
+    for backend in ("lxml", "template"):
+        expected, actual = StringIO(), StringIO()
+        with make_xml_generator(expected, True, True, backend) as xg, xg.element("rr_nodes"):
+            for node in nodes:
+                with xg.element("node", {"capacity": "1", "id": str(node.id_), "type": "SINK"}):
+                    xg.element_leaf("loc", {"xlow": "1", "ylow": "1", "xhigh": "1", "yhigh": "1",
+                        "ptc": str(node.loc.ptc)})
+                    xg.element_leaf("timing", {"R": "1.5", "C": "2e-15"})
+        with make_xml_generator(actual, True, True, backend) as xg, xg.element("rr_nodes"):
+            mock_rrg._gen_nodes(xg, nodes)
+        assert actual.getvalue() == expected.getvalue()
+    # timing objects are memoized by value, not by identity
+    class MutableTiming(object):
+        R, C = 1.5, 2e-15
+    mutable = MutableTiming()
+    def changing():
+        for i, R in enumerate((1.5, 2, 2.0)):
+            mutable.R = R
+            yield Node(i, NodeType.SINK, NodeLoc(1, 1, i), timing = mutable)
+    actual = StringIO()
+    with make_xml_generator(actual, True, True, "template") as xg, xg.element("rr_nodes"):
+        mock_rrg._gen_nodes(xg, changing())
+    assert [t["@R"] for t in (n["timing"] for n in parse(actual.getvalue())["rr_nodes"]["node"])] == [
+            "1.5", "2", "2.0"]
@@ -0,0 +1,128 @@
+import pytest, random
+
+from vprgen.abstractbased import TileGrid, GridPattern
+from vprgen.abstractbased.impl.namedtuplebased import *
+from vprgen.abstractbased.impl.xmlreader import ArchitectureXMLReader
+
+try:
+    from io import BytesIO as StringIO
+except ImportError:
+    try:
+        from cStringIO import StringIO
+    except ImportError:
+        from StringIO import StringIO
+
+from itertools import product
+from mock_devices import *
+
+def test_tile_grid():
+    io, clb, ram = TopPbType('IO', 1), TopPbType('CLB', 2), TopPbType('RAM', 3, height = 2)
+    width, height = 10, 8
+    patterns = (GridPattern.fill(clb),
+            GridPattern.col(ram, 3, repeatx = 4, starty = 1, priority = 2),
+            GridPattern.region(io, 0, 0, priority = 10),
+            GridPattern.region(io, width - 1, width - 1, priority = 10),
+            GridPattern.row(None, 0, priority = 10),
+            GridPattern.single(ram, 8, 0, priority = 20, metadata = {"fasm_prefix": "RAM_X8"}))
+    grid = TileGrid.from_patterns(width, height, patterns)
+    # reference resolved by hand
+    def expected(x, y):
+        if y == 0 and x != 8:
+            return None     # the EMPTY row is applied after the IO columns with the same priority
+        elif x == 8 and y <= 1:
+            return Tile('RAM', 3, 0, y, {"fasm_prefix": "RAM_X8"} if y == 0 else None)
+        elif x in (0, width - 1):
+            return Tile('IO', 1)
+        elif x in (3, 7) and y < height - 1:
+            return Tile('RAM', 3, 0, (y - 1) % 2)
+        elif x in (3, 7):
+            return Tile('CLB', 2)   # the last RAM at y = 7 does not fit
+        return Tile('CLB', 2)
+    locations = list(product(range(width), range(height)))
+    assert [(x, y, grid.get_tile(x, y)) for x, y in locations] == [(x, y, expected(x, y)) for x, y in locations]
+    assert list(grid) == [(x, y, expected(x, y)) for x, y in locations]
+    assert grid.run_count < width * height
+    assert grid.block_type_ids()[3 * height + 2] == 3
+    # a grid materialized from ``get_tile`` calls it once per location
+    class Delegate(MockRRGArchitecture):
+        calls = 0
+        def get_tile(self, x, y):
+            Delegate.calls += 1
+            return grid.get_tile(x, y)
+    delegate = Delegate(*mock_rrg._replace(width = width, height = height))
+    materialized = TileGrid.from_delegate(delegate)
+    assert Delegate.calls == width * height and list(materialized) == list(grid)
+    assert list(materialized.iter_row_runs(0)) == [(0, 8, None), (8, 9, expected(8, 0)), (9, 10, None)]
+    # generators produce the same output from ``tile_grid``
+    patterned = ColumnarDevice(*delegate)
+    patterned.grid = grid
+    for gen in ("gen_arch_xml", "gen_rrg_xml"):
+        expected_out, actual_out = StringIO(), StringIO()
+        getattr(delegate, gen)(expected_out)
+        Delegate.calls = 0
+        getattr(patterned, gen)(actual_out)
+        assert Delegate.calls == 0 and actual_out.getvalue() == expected_out.getvalue()
+
+def test_gen_arch_xml_compress_layout():
+    io, clb, ram = (TopPbType('IO', 1), TopPbType('CLB', 2),
+            TopPbType('RAM', 3, height = 2, outputs = (TopPbTypeOutputOrClockPort('O', 1), )))
+    width, height = 42, 30
+    class Device(MockRRGArchitecture):
+        models = ()
+        def get_tile(self, x, y):
+            if x in (0, width - 1) and y in (0, height - 1):
+                return None
+            elif x in (0, width - 1) or y in (0, height - 1):
+                return Tile('IO', 1)
+            elif x == 7 and y == 7:
+                return Tile('CLB', 2, metadata = {"fasm_prefix": "SPECIAL"})
+            elif x % 8 == 4 and y < height - 1:
+                return Tile('RAM', 3, 0, (y - 1) % 2)
+            return Tile('CLB', 2)
+    device = Device(*mock_rrg._replace(width = width, height = height, complex_blocks = (io, clb, ram)))
+    singles, compressed = StringIO(), StringIO()
+    device.gen_arch_xml(singles)
+    device.gen_arch_xml(compressed, compress_layout = True)
+    assert len(compressed.getvalue()) * 10 < len(singles.getvalue())
+    # the layouts resolve to the same grid
+    grids = [list(ArchitectureXMLReader(StringIO(f.getvalue())).tile_grid) for f in (singles, compressed)]
+    assert grids[0] == grids[1] == list(TileGrid.from_delegate(device))
+    # a grid without regularity falls back to one <single> per block
+    rnd = random.Random(0)
+    tiles = {(x, y): rnd.choice((None, Tile('IO', 1), Tile('CLB', 2))) for x, y in product(range(5), range(5))}
+    class Random(Device):
+        def get_tile(self, x, y):
+            return tiles[x, y]
+    irregular = Random(*device._replace(width = 5, height = 5))
+    grid = TileGrid.from_delegate(irregular)
+    patterns = grid.to_patterns(irregular.complex_blocks)
+    assert list(TileGrid.from_patterns(5, 5, patterns)) == list(grid)
+
+def test_layout_tag_region():
+    clb, ram = (TopPbType('CLB', 1, outputs = (TopPbTypeOutputOrClockPort('O', 1), )),
+            TopPbType('RAM', 2, height = 2, outputs = (TopPbTypeOutputOrClockPort('O', 1), )))
+    width, height = 21, 8
+    class Device(MockRRGArchitecture):
+        models = ()
+        def get_tile(self, x, y):
+            if x % 4 == 2 and 1 <= y <= 4:
+                return Tile('RAM', 2, 0, (y - 1) % 2)
+            return Tile('CLB', 1)
+    device = Device(*mock_rrg._replace(width = width, height = height, complex_blocks = (clb, ram)))
+    grid = TileGrid.from_delegate(device)
+    patterns = grid.to_patterns(device.complex_blocks)
+    region = [p.to_layout_tag() for p in patterns if p.block is ram][0]
+    # <region> bounds are the last cells covered, so the RAMs at y = 1 and 3 cover rows 1 to 4
+    assert region == ("region", [("type", "RAM"), ("startx", "2"), ("endx", "18"), ("incrx", "4"), ("starty", "1"),
+        ("endy", "4"), ("priority", "2")])
+    assert GridPattern.from_layout_tag(region[0], dict(region[1][1:]), ram, width, height)[0].endy == 3
+    compressed = StringIO()
+    device.gen_arch_xml(compressed, compress_layout = True)
+    assert list(ArchitectureXMLReader(StringIO(compressed.getvalue())).tile_grid) == list(grid)
+    # expressions are evaluated without eval
+    attrs = {"startx": "(W - 1) / 2", "endx": "W-w", "starty": "7 / 2", "endy": "H - 2*h + 1"}
+    pattern = GridPattern.from_layout_tag("region", attrs, ram, width, height)[0]
+    assert (pattern.startx, pattern.endx, pattern.starty, pattern.endy) == (10, 20, 3, 4)
+    for expression in ("9**9**9**9", "4//2", "W +", "(1", "__import__('os')"):
+        with pytest.raises(ValueError):
+            GridPattern.from_layout_tag("single", {"x": expression, "y": "0"}, clb, width, height)
@@ -0,0 +1,58 @@
+import pytest
+
+from vprgen.abstractbased import PinNodeGenerator, RRGraphChecker, TileGrid, GridPattern
+from vprgen.abstractbased.impl.namedtuplebased import *
+
+try:
+    from io import BytesIO as StringIO
+except ImportError:
+    try:
+        from cStringIO import StringIO
+    except ImportError:
+        from StringIO import StringIO
+
+from mock_devices import *
+
+def test_pin_node_generator():
+    np = pytest.importorskip("numpy")
+    clb = TopPbType('CLB', 1, inputs = (TopPbTypeInputPort('I', 4, TopPbTypePortEquivalent.full), ),
+            outputs = (TopPbTypeOutputOrClockPort('O', 2), ))
+    ram = TopPbType('RAM', 2, height = 2, inputs = (TopPbTypeInputPort('A', 3), ),
+            outputs = (TopPbTypeOutputOrClockPort('D', 1), ),
+            pinlocations = PinLocations(PinLocationsPattern.custom, (
+                PinLocationsLoc(Side.left, ("RAM.A[1:0]", ), 0, 0),
+                PinLocationsLoc(Side.left, ("RAM.A[2]", ), 0, 1),
+                PinLocationsLoc(Side.right, ("RAM.D", "RAM.A[0]"), 0, 1), )))
+    grid = TileGrid.from_patterns(6, 5, (GridPattern.fill(clb), GridPattern.col(ram, 3, starty = 1)))
+    class Device(ColumnarDevice):
+        group_equivalent_pins = True
+    device = Device(*mock_rrg._replace(width = 6, height = 5, complex_blocks = (clb, ram), edges = ()))
+    device.grid = grid
+    generator = PinNodeGenerator(device)
+    device.node_source = lambda: generator.iter_batches(batch_size = 50)
+    # 26 CLBs with 3 pin classes and 6 pins on one side each, 2 RAMs with 4 pin classes and 5 pin nodes
+    assert generator.num_nodes == 26 * 9 + 2 * 9
+    batches = list(generator.iter_batches(batch_size = 50))
+    ids = np.concatenate([b["id"] for b in batches])
+    assert (ids == np.arange(generator.num_nodes)).all()
+    # the nodes agree with the grid and the <block_type> tags
+    checker = RRGraphChecker(device)
+    device.gen_rrg_xml(StringIO(), checker = checker)
+    assert checker.ok and checker.num_nodes == generator.num_nodes, checker.summary()
+    # nodes can be looked up by location, type, ptc and side
+    rows = {}
+    for batch in batches:
+        for row in zip(*(batch[k].tolist() for k in ("id", "type", "xlow", "ylow", "xhigh", "yhigh", "ptc", "side"))):
+            rows[row[0]] = row[1:]
+    i = generator.get_node_id(1, 1, NodeType.SINK, 0)
+    assert rows[i] == (NodeType.SINK.value, 1, 1, 1, 1, 0, rows[i][-1])
+    i = generator.get_node_id(3, 2, NodeType.IPIN, 0, Side.right)
+    assert rows[i] == (NodeType.IPIN.value, 3, 2, 3, 2, 0, Side.right.value)
+    i = generator.get_node_id(3, 2, NodeType.SOURCE, 3)
+    assert rows[i][:5] == (NodeType.SOURCE.value, 3, 1, 3, 2)
+    assert rows[generator.get_node_id(3, 1, NodeType.IPIN, 0, Side.left)][1:] == (3, 1, 3, 1, 0, Side.left.value)
+    # spread pins go round the sides of the tile
+    assert [rows[generator.get_node_id(0, 0, NodeType.IPIN, ptc, side)][-1] for ptc, side in
+            ((0, Side.top), (1, Side.right), (2, Side.bottom), (3, Side.left))] == [3, 1, 2, 0]
+    with pytest.raises(KeyError):
+        generator.get_node_id(0, 0, NodeType.IPIN, 0, Side.left)
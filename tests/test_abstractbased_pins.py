@@ -0,0 +1,66 @@
+from vprgen._xml import make_xml_generator
+from vprgen.abstractbased import BlockPin, BlockPinTable, BlockPinClass, RRGraphChecker, TileGrid, GridPattern
+from vprgen.abstractbased.impl.namedtuplebased import *
+
+try:
+    from io import BytesIO as StringIO
+except ImportError:
+    try:
+        from cStringIO import StringIO
+    except ImportError:
+        from StringIO import StringIO
+
+from xmltodict import parse
+from mock_devices import *
+
+def test_block_pin_table():
+    i, o, clk = TopPbTypeInputPort('I', 2), TopPbTypeOutputOrClockPort('O', 1), TopPbTypeOutputOrClockPort('clk', 1)
+    io = TopPbType('IO', 1, capacity = 2, inputs = (i, ), outputs = (o, ), clocks = (clk, ))
+    delegate = MockRRGArchitecture(*mock_rrg._replace(complex_blocks = (io, )))
+    table = delegate.get_block_pin_table(io)
+    assert table is BlockPinTable.of(io) and len(table) == 8
+    assert table[5] == BlockPin(5, i, 1, 1, "IO[1].I[1]", "INPUT", 5)
+    assert table.ptc("clk", z = 1) == 7 and table[table.ptc("O")].type_ == "OUTPUT"
+    assert table.outputs == table.class_outputs == bytearray((0, 0, 1, 0, 0, 0, 1, 0))
+    # <block_type> tags are memoized per block, but still follow the formatting of each generator
+    for backend in ("lxml", "template"):
+        outputs = []
+        for pretty in (True, False, True):
+            stream = StringIO()
+            with make_xml_generator(stream, pretty, True, backend) as xg:
+                delegate._gen_rrg_block(xg, io)
+            outputs.append(stream.getvalue())
+        assert outputs[0] == outputs[2] != outputs[1]
+        back = parse(outputs[1], encoding = "ascii")
+        assert [c["pin"]["#text"] for c in back["block_type"]["pin_class"]][6:] == ["IO[1].O[0]", "IO[1].clk[0]"]
+
+def test_group_equivalent_pins():
+    i = TopPbTypeInputPort('I', 4, TopPbTypePortEquivalent.full)
+    clb = TopPbType('CLB', 1, capacity = 2, inputs = (i, ), outputs = (TopPbTypeOutputOrClockPort('O', 2), ))
+    class Grouped(MockRRGArchitecture):
+        group_equivalent_pins = True
+    delegate = Grouped(*mock_rrg._replace(complex_blocks = (clb, )))
+    classes = delegate.get_block_pin_classes(clb)
+    assert classes[:3] == [BlockPinClass(0, "INPUT", (0, 1, 2, 3)), BlockPinClass(1, "OUTPUT", (4, )),
+            BlockPinClass(2, "OUTPUT", (5, ))]
+    assert len(classes) == 6 and classes[3].ptcs == (6, 7, 8, 9)
+    assert delegate.get_block_pin_table(clb)[8].pin_class == 3
+    assert len(MockRRGArchitecture(*delegate).get_block_pin_classes(clb)) == 12
+    outputs = []
+    for backend in ("lxml", "template"):
+        stream = StringIO()
+        with make_xml_generator(stream, True, True, backend) as xg:
+            delegate._gen_rrg_block(xg, clb)
+        outputs.append(stream.getvalue())
+    assert outputs[0] == outputs[1]
+    back = parse(outputs[0], encoding = "ascii")["block_type"]["pin_class"]
+    assert len(back) == 6 and [p["@ptc"] for p in back[3]["pin"]] == ["6", "7", "8", "9"]
+    # SOURCE/SINK nodes use the ptc of the class
+    checker = RRGraphChecker(delegate, grid = TileGrid.from_patterns(3, 3, (GridPattern.fill(clb), )))
+    checker.add_node(0, NodeType.SINK, 1, 1, 1, 1, 3)
+    checker.add_node(1, NodeType.SOURCE, 1, 1, 1, 1, 5)
+    checker.add_node(2, NodeType.IPIN, 1, 1, 1, 1, 9)
+    assert checker.ok
+    checker.add_node(3, NodeType.SINK, 1, 1, 1, 1, 9)
+    checker.add_node(4, NodeType.SOURCE, 1, 1, 1, 1, 3)
+    assert checker.counts == {"ptc": 2}
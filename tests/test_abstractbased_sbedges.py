@@ -0,0 +1,82 @@
+import pytest
+
+from vprgen.abstractbased import ChannelNodeGenerator, SwitchBlockEdgeGenerator, RRGraphChecker
+from vprgen.abstractbased.impl.namedtuplebased import *
+
+try:
+    from io import BytesIO as StringIO
+except ImportError:
+    try:
+        from cStringIO import StringIO
+    except ImportError:
+        from StringIO import StringIO
+
+from itertools import product
+from mock_devices import *
+
+def test_switch_block_edge_generator():
+    pytest.importorskip("numpy")
+    segments = (Segment('L1', 0, 1, 'default', freq = 0.5), Segment('L2', 1, 2, 'fast', sb = (True, False, True)))
+    switches = (Switch('default', 0, 1e-10), Switch('fast', 1, 5e-11))
+    device = ColumnarDevice(*mock_rrg._replace(width = 7, height = 6, x_channel_width = 12, y_channel_width = 8,
+        segments = segments, switches = switches, edges = ()))
+    chan_nodes = ChannelNodeGenerator(device)
+    device.node_source = chan_nodes.iter_batches
+    wires = {NodeType.CHANX: {}, NodeType.CHANY: {}}   # type -> channel -> (id, low, high, ptc, direction, segment)
+    for batch in chan_nodes.iter_batches():
+        for id_, type_, xlow, ylow, xhigh, yhigh, ptc, direction, segment in zip(*(batch[k].tolist() for k in
+                ("id", "type", "xlow", "ylow", "xhigh", "yhigh", "ptc", "direction", "segment_id"))):
+            if type_ == NodeType.CHANX.value:
+                wires[NodeType.CHANX].setdefault(ylow, []).append((id_, xlow, xhigh, ptc, direction, segment))
+            else:
+                wires[NodeType.CHANY].setdefault(xlow, []).append((id_, ylow, yhigh, ptc, direction, segment))
+    def side(type_, chan, b, high):
+        """Wires coming in and going out on the low or high side of the switch block after position b."""
+        incoming, outgoing = [], []
+        for id_, low, high_, ptc, direction, segment in sorted(wires[type_][chan], key = lambda w: w[3]):
+            length, pattern = segments[segment].length, segments[segment].sb or (True, True)
+            start = low if low != 1 or high_ - low + 1 == length else high_ - length + 1   # unclipped start
+            inc = direction == SegmentDirection.INC_DIR.value
+            if not high and inc and low <= b <= high_ and pattern[b - start + 1]:
+                incoming.append(id_)
+            elif high and not inc and low <= b + 1 <= high_ and pattern[start + length - 1 - b]:
+                incoming.append(id_)
+            elif (high and inc and low == b + 1) or (not high and not inc and high_ == b):
+                outgoing.append(id_)
+        return incoming, outgoing
+    formulas = {
+            SwitchBlockType.wilton: {"lt": lambda i, n: n - i, "lb": lambda i, n: n + i - 1,
+                "rt": lambda i, n: n + i - 1, "rb": lambda i, n: 2 * n - 2 - i,
+                "bl": lambda i, n: i + 1, "br": lambda i, n: 2 * n - 2 - i,
+                "tl": lambda i, n: n - i, "tr": lambda i, n: i + 1, },
+            SwitchBlockType.universal: {"lt": lambda i, n: n - 1 - i, "rb": lambda i, n: n - 1 - i,
+                "br": lambda i, n: n - 1 - i, "tl": lambda i, n: n - 1 - i, },
+            SwitchBlockType.subset: {}, }
+    mux = {"default": 0, "fast": 1}
+    switch_of = {id_: mux[segments[segment].mux] for chans in wires.values() for chan in chans.values()
+            for id_, _, _, _, _, segment in chan}
+    for type_, formula in formulas.items():
+        expected = set()
+        for x, y in product(range(6), range(5)):
+            sides = {"l": side(NodeType.CHANX, y, x, False), "r": side(NodeType.CHANX, y, x, True),
+                    "b": side(NodeType.CHANY, x, y, False), "t": side(NodeType.CHANY, x, y, True)}
+            for f, s in product("lrbt", repeat = 2):
+                n = len(sides[s][1])
+                if f == s or not n:
+                    continue
+                for i, src in enumerate(sides[f][0]):
+                    sink = sides[s][1][formula.get(f + s, lambda i, n: i)(i, n) % n]
+                    expected.add((src, sink, switch_of[sink]))
+        generator = SwitchBlockEdgeGenerator(device, chan_nodes, type_)
+        edges = [edge for batch in generator.iter_batches(batch_size = 100)
+                for edge in zip(*(batch[k].tolist() for k in ("src", "sink", "switch")))]
+        assert len(edges) == len(set(edges)) and set(edges) == expected
+    # the edges agree with the nodes
+    sb_edges = SwitchBlockEdgeGenerator(device, chan_nodes)
+    assert sb_edges.type_ is SwitchBlockType.wilton
+    device.edge_source = lambda: sb_edges.iter_batches(batch_size = 100)
+    checker = RRGraphChecker(device)
+    device.gen_rrg_xml(StringIO(), checker = checker)
+    assert checker.ok and checker.num_edges == len(expected)
+    with pytest.raises(ValueError):
+        SwitchBlockEdgeGenerator(device._replace(switches = switches[:1]), chan_nodes)
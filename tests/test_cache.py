@@ -0,0 +1,45 @@
+from vprgen.abstractbased.impl.namedtuplebased import *
+
+try:
+    from io import BytesIO as StringIO
+except ImportError:
+    try:
+        from cStringIO import StringIO
+    except ImportError:
+        from StringIO import StringIO
+
+from mock_devices import *
+
+def test_gen_rrg_xml_cache(tmpdir):
+    class Fingerprinted(MockRRGArchitecture):
+        accessed = []
+
+        def get_rrg_section_fingerprint(self, section):
+            return (section, self.switches if section == 'switches' else None)
+
+        def __getattribute__(self, name):
+            if name in ('nodes', 'edges', 'switches'):
+                Fingerprinted.accessed.append(name)
+            return super(Fingerprinted, self).__getattribute__(name)
+
+    for pretty in (False, True):
+        for backend in ("lxml", "template"):
+            cache_dir = str(tmpdir.join("{}_{}".format(pretty, backend)))
+            gold = StringIO()
+            mock_rrg.gen_rrg_xml(gold, pretty, backend)
+            delegate = Fingerprinted(*mock_rrg)
+            for _ in range(2):
+                stream = StringIO()
+                delegate.gen_rrg_xml(stream, pretty, backend, cache_dir = cache_dir)
+                assert stream.getvalue() == gold.getvalue()
+            # only fingerprints are computed on the second run
+            assert Fingerprinted.accessed.count('nodes') == 1
+            del Fingerprinted.accessed[:]
+            # a changed section is regenerated, the rest is reused
+            changed = Fingerprinted(*mock_rrg._replace(switches = (Switch('default', 0, 2e-10), )))
+            stream = StringIO()
+            changed.gen_rrg_xml(stream, pretty, backend, cache_dir = cache_dir)
+            assert b'Tdel="2e-10"' in stream.getvalue()
+            assert stream.getvalue().replace(b'2e-10', b'1e-10') == gold.getvalue()
+            assert 'nodes' not in Fingerprinted.accessed
+            del Fingerprinted.accessed[:]
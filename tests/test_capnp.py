@@ -0,0 +1,21 @@
+import pytest
+
+from vprgen import _capnp
+from vprgen._rrgbin import _load_schema
+
+def test_capnp_limits(tmpdir):
+    schema = _load_schema()
+    encoder = _capnp.CapnpEncoder(schema)
+    edges = _capnp.SpooledStructList(encoder, schema.structs["Edge"], str(tmpdir))
+    max_offset = _capnp._max_offset
+    try:
+        _capnp._max_offset = 64
+        with pytest.raises(ValueError) as e:
+            for i in range(100):
+                edges.append({"srcNode": i, "sinkNode": i + 1, "switchId": 0})
+        assert "2^29" in str(e.value)
+        with pytest.raises(ValueError):
+            _capnp._list_pointer(65, 2, 1)
+    finally:
+        _capnp._max_offset = max_offset
+        edges.close()
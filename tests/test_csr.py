@@ -0,0 +1,79 @@
+import pytest, random
+
+from vprgen import CSRIndex, CSRIndexBuilder
+from vprgen import _csr
+from vprgen.abstractbased.impl.namedtuplebased import *
+
+try:
+    from io import BytesIO as StringIO
+except ImportError:
+    try:
+        from cStringIO import StringIO
+    except ImportError:
+        from StringIO import StringIO
+
+from mock_devices import *
+
+def test_csr_index(tmpdir):
+    rnd = random.Random(0)
+    edges = tuple(Edge(rnd.randrange(40), rnd.randrange(40), rnd.randrange(3)) for i in range(2000))
+    out = {}
+    for e in edges:
+        out.setdefault(e.src_node, []).append((e.sink_node, e.switch_id))
+    fanouts = {}
+    for n, succ in out.items():
+        for sw in set(s for _, s in succ):
+            fanouts[sw] = max(fanouts.get(sw, 0), sum(1 for _, s in succ if s == sw))
+    # recorded while generating the rr graph, and standalone with and without numpy
+    builder = CSRIndexBuilder(50)
+    mock_rrg._replace(edges = edges).gen_rrg_xml(StringIO(), csr_index = builder)
+    indices = [builder.build(), CSRIndexBuilder(50).extend(edges).build()]
+    np = _csr.np
+    try:
+        _csr.np = None
+        indices.append(CSRIndexBuilder(50).extend(edges).build())
+        assert indices[-1].max_fanout_by_switch() == fanouts
+        assert indices[-1].undriven_nodes() == list(range(40, 50))
+    finally:
+        _csr.np = np
+    for index in indices:
+        assert index.num_nodes == 50 and index.num_edges == 2000
+        for n in range(50):
+            targets, switches = index.successors(n)
+            assert list(zip(targets, switches)) == out.get(n, [])
+            assert index.fanin(n) == sum(1 for e in edges if e.sink_node == n)
+        assert index.undriven_nodes() == list(range(40, 50))
+        assert index.unloaded_nodes() == list(range(40, 50))
+        assert index.max_fanout_by_switch() == fanouts
+    # saved and memory-mapped back in
+    path = str(tmpdir.join("rrg.csr"))
+    indices[0].save(path)
+    loaded = CSRIndex.load(path)
+    for name, _ in _csr._fields:
+        assert getattr(loaded, name).tolist() == getattr(indices[0], name).tolist()
+    assert loaded.fanout(3) == indices[0].fanout(3)
+    loaded.close()
+    # without ``memoryview.cast``, as on Python 2, the file is mapped with NumPy
+    if np is not None:
+        class OldMemoryView(object):
+            pass
+        _csr.memoryview = OldMemoryView
+        try:
+            loaded = CSRIndex.load(path)
+        finally:
+            del _csr.memoryview
+        assert isinstance(loaded.out_targets, np.ndarray)
+        assert loaded.successors(3)[0].tolist() == [t for t, _ in out.get(3, [])]
+        assert loaded.max_fanout_by_switch() == fanouts
+        loaded.close()
+    assert _csr._typecode(8) in ("l", "q") and _csr._typecode(4) == "i"
+    # edges referring to nodes outside of the graph, with and without numpy
+    for numpy in (np, None):
+        _csr.np = numpy
+        try:
+            for edge, bad in ((Edge(3, 50, 0), 50), (Edge(-1, 3, 0), -1)):
+                message = "node {}, which is outside of the graph of 50 nodes".format(bad)
+                with pytest.raises(ValueError, match = message):
+                    CSRIndexBuilder(50).extend(edges + (edge, )).build()
+        finally:
+            _csr.np = np
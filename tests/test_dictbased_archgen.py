@@ -294,3 +294,149 @@ def test_gen_block():
     # print("gold:")
     # print(dumps(gold, indent = 2))
     assert back == gold
+
+class MockRRGDelegate(ArchitectureDelegate):
+    def get_width(self):
+        return 3
+
+    def get_height(self):
+        return 3
+
+    def get_x_channel_width(self):
+        return 2
+
+    def get_y_channel_width(self):
+        return 2
+
+    def get_tile(self, x, y):
+        return {"type": "CLB", "block_type_id": 1} if (x, y) == (1, 1) else None
+
+    def iter_blocks(self):
+        yield {"name": "CLB", "id": 1, "input": [{"name": "I", "num_pins": 1}],
+                "output": [{"name": "O", "num_pins": 1}],
+                "pb_type": [{"name": "buf", "blif_model": ".names", "input": [{"name": "in", "num_pins": 1}],
+                    "output": [{"name": "out", "num_pins": 1}]}],
+                "interconnect": {"direct": [{"name": "i", "input": "CLB.I", "output": "buf.in"},
+                    {"name": "o", "input": "buf.out", "output": "CLB.O"}]}}
+
+    def iter_segments(self):
+        yield {"name": "L1", "id": 0, "length": 1, "mux": "default"}
+
+    def iter_switches(self):
+        yield {"name": "default", "id": 0, "type": "pass_gate", "Tdel": 1e-10}
+
+    def iter_nodes(self):
+        yield {"id": 0, "type": "OPIN", "loc": {"xlow": 1, "ylow": 1, "xhigh": 1, "yhigh": 1, "ptc": 1,
+            "side": "TOP"}}
+        yield {"id": 1, "type": "CHANY", "direction": "DEC_DIR", "segment_id": 0,
+                "loc": {"xlow": 1, "ylow": 1, "xhigh": 1, "yhigh": 2, "ptc": 0}, "timing": {"R": 1.0, "C": 2.0}}
+
+    def iter_edges(self):
+        yield {"src_node": 0, "sink_node": 1, "switch_id": 0}
+
+def test_gen_rrg_bin():
+    import pytest, os
+    capnp = pytest.importorskip("capnp")
+    schema = capnp.load(os.path.join(os.path.dirname(__file__), "..", "vprgen", "schema", "rr_graph_uxsdcxx.capnp"),
+            imports = [os.path.dirname(os.path.dirname(capnp.__file__))])
+    stream = StringIO()
+    MockRRGDelegate().gen_rrg_bin(stream)
+    with schema.RrGraph.from_bytes(stream.getvalue()) as rrg:
+        assert str(rrg.switches.switches[0].type) == "passGate"
+        assert [(str(c.type), c.pins[0].ptc) for c in rrg.blockTypes.blockTypes[1].pinClasses] == [
+                ("input", 0), ("output", 1)]
+        assert len(rrg.grid.gridLocs) == 9
+        nodes = rrg.rrNodes.nodes
+        assert (str(nodes[0].type), str(nodes[0].loc.side), nodes[0].loc.ptc) == ("opin", "top", 1)
+        assert (str(nodes[1].direction), nodes[1].loc.yhigh, nodes[1].timing.c) == ("decDir", 2, 2.0)
+        assert [(e.srcNode, e.sinkNode) for e in rrg.rrEdges.edges] == [(0, 1)]
+
+def test_compiled_validator():
+    from jsonschema import ValidationError
+    from vprgen.dictbased._delegate import _validate_node
+    _validate_node({"id": 0, "type": "CHANX", "direction": "INC_DIR", "segment_id": 0,
+        "loc": {"xlow": 1, "ylow": 1, "xhigh": 2, "yhigh": 1, "ptc": 0}})
+    _validate_node({"id": 1, "type": "IPIN", "loc": {"xlow": 1, "ylow": 1, "xhigh": 1, "yhigh": 1, "ptc": 0,
+        "side": "LEFT"}})
+    for node in ({"id": 0, "type": "CHANX", "loc": {"xlow": 1, "ylow": 1, "xhigh": 2, "yhigh": 1, "ptc": 0}},
+            {"id": 1, "type": "IPIN", "loc": {"xlow": 1, "ylow": 1, "xhigh": 1, "yhigh": 1, "ptc": 0}},
+            {"id": True, "type": "SINK", "loc": {"xlow": 1, "ylow": 1, "xhigh": 1, "yhigh": 1, "ptc": 0}}):
+        try:
+            _validate_node(node)
+        except ValidationError:
+            pass
+        else:
+            assert False
+
+def test_validation_policy():
+    from jsonschema import ValidationError
+    from vprgen.dictbased import ValidationPolicy
+    good = {"src_node": 0, "sink_node": 1, "switch_id": 0}
+    bad = {"src_node": 0, "sink_node": 1}
+    delegate = ArchitectureDelegate()
+    assert delegate.get_validation_policy().spec == "full"
+    delegate.set_validation_policy("first-2")
+    for edge in (good, good):
+        delegate._validate("edge", edge)
+    delegate._validate("edge", bad)  # not checked any more
+    delegate._validate("node", {"id": 0, "type": "SINK",   # counted per kind
+        "loc": {"xlow": 1, "ylow": 1, "xhigh": 1, "yhigh": 1, "ptc": 0}})
+    assert delegate.get_validation_policy().checked == {"edge": 2, "node": 1}
+    delegate.set_validation_policy("off")
+    delegate._validate("edge", bad)
+    assert delegate.get_validation_policy().checked == {}
+    delegate.set_validation_policy(ValidationPolicy("sampled(0.25)", seed = 1))
+    for _ in range(1000):
+        delegate._validate("edge", good)
+    assert 150 < delegate.get_validation_policy().checked["edge"] < 350
+    delegate.set_validation_policy("full")
+    try:
+        delegate._validate("edge", bad)
+    except ValidationError:
+        pass
+    else:
+        assert False
+    try:
+        ValidationPolicy("sometimes")
+    except ValueError:
+        pass
+    else:
+        assert False
+
+def test_iter_tiles():
+    class SparseDelegate(MockRRGDelegate):
+        def get_width(self):
+            return 4
+
+        def get_tile(self, x, y):
+            if x in (1, 2) and y == 1:
+                return {"type": "CLB", "block_type_id": 1, "xoffset": x - 1}
+            return None
+
+        def iter_blocks(self):
+            for block in MockRRGDelegate.iter_blocks(self):
+                block["width"] = 2
+                yield block
+
+    class AnchoredDelegate(SparseDelegate):
+        def get_tile(self, x, y):
+            raise AssertionError("get_tile called")
+
+        def iter_tiles(self):
+            yield 1, 1, {"type": "CLB", "block_type_id": 1}
+
+    for gen in ("gen_arch_xml", "gen_rrg_xml"):
+        expected, actual = StringIO(), StringIO()
+        getattr(SparseDelegate(), gen)(expected)
+        getattr(AnchoredDelegate(), gen)(actual)
+        assert actual.getvalue() == expected.getvalue()
+    assert list(AnchoredDelegate()._iter_grid())[7] == (2, 1, {"type": "CLB", "block_type_id": 1, "xoffset": 1,
+        "yoffset": 0})
+
+    class UnknownBlockDelegate(AnchoredDelegate):
+        def iter_tiles(self):
+            yield 1, 1, {"type": "DSP", "block_type_id": 7}
+
+    import pytest
+    with pytest.raises(ValueError, match = r"Tile at \(1, 1\) has unknown block_type_id: 7"):
+        list(UnknownBlockDelegate()._iter_grid())
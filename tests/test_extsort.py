@@ -0,0 +1,27 @@
+import random
+
+from vprgen.abstractbased.impl.namedtuplebased import *
+
+try:
+    from io import BytesIO as StringIO
+except ImportError:
+    try:
+        from cStringIO import StringIO
+    except ImportError:
+        from StringIO import StringIO
+
+from mock_devices import *
+
+def test_gen_rrg_xml_sort_edges(tmpdir):
+    rnd = random.Random(0)
+    edges = tuple(Edge(rnd.randrange(50), rnd.randrange(50), rnd.randrange(2),
+        {"fasm_features": str(i)} if i % 101 == 0 else None) for i in range(5000))
+    for pretty in (False, True):
+        expected, actual = StringIO(), StringIO()
+        mock_rrg._replace(edges = tuple(sorted(edges, key = lambda e: (e.src_node, e.sink_node, e.switch_id,
+            0 if e.metadata is None else 1 + int(e.metadata["fasm_features"]))))).gen_rrg_xml(expected, pretty)
+        # small memory to force multiple runs
+        mock_rrg._replace(edges = edges).gen_rrg_xml(actual, pretty, sort_edges = True, sort_memory = 200000,
+                tmpdir = str(tmpdir))
+        assert actual.getvalue() == expected.getvalue()
+    assert not tmpdir.listdir()
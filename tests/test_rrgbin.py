@@ -0,0 +1,37 @@
+import pytest, os
+
+try:
+    from io import BytesIO as StringIO
+except ImportError:
+    try:
+        from cStringIO import StringIO
+    except ImportError:
+        from StringIO import StringIO
+
+from mock_devices import *
+
+def test_gen_rrg_bin():
+    capnp = pytest.importorskip("capnp")
+    schema = capnp.load(os.path.join(os.path.dirname(__file__), "..", "vprgen", "schema", "rr_graph_uxsdcxx.capnp"),
+            imports = [os.path.dirname(os.path.dirname(capnp.__file__))])
+    stream = StringIO()
+    mock_rrg.gen_rrg_bin(stream)
+    with schema.RrGraph.from_bytes(stream.getvalue()) as rrg:
+        assert rrg.toolName == "vprgen"
+        assert rrg.channels.channel.chanWidthMax == 2
+        assert [(l.index, l.info) for l in rrg.channels.xLists] == [(y, 2) for y in range(4)]
+        assert [(s.id, s.name, s.timing.rPerMeter) for s in rrg.segments.segments] == [(0, 'L1', 0)]
+        assert [(s.id, s.name, str(s.type)) for s in rrg.switches.switches] == [(0, 'default', 'mux')]
+        assert [b.name for b in rrg.blockTypes.blockTypes] == ["EMPTY", "CLB"]
+        assert [(str(c.type), c.pins[0].ptc, c.pins[0].value) for c in rrg.blockTypes.blockTypes[1].pinClasses] == [
+                ("input", 0, "CLB.I[0]"), ("input", 1, "CLB.I[1]"), ("output", 2, "CLB.O[0]")]
+        assert [(g.x, g.y, g.blockTypeId) for g in rrg.grid.gridLocs if g.blockTypeId] == [
+                (1, 1, 1), (1, 2, 1), (2, 1, 1), (2, 2, 1)]
+        nodes = rrg.rrNodes.nodes
+        assert [(n.id, str(n.type)) for n in nodes] == [(0, "source"), (1, "opin"), (2, "chanx"), (3, "ipin")]
+        assert str(nodes[1].loc.side) == "right"
+        assert (str(nodes[2].direction), nodes[2].loc.xhigh, nodes[2].segment.segmentId) == ("incDir", 2, 0)
+        assert nodes[2].timing.r == 101.0
+        edges = rrg.rrEdges.edges
+        assert [(e.srcNode, e.sinkNode, e.switchId) for e in edges] == [(0, 1, 0), (1, 2, 0), (2, 3, 0)]
+        assert [(m.name, m.value) for m in edges[1].metadata.metas] == [("fasm_features", "O_to_X")]
@@ -0,0 +1,62 @@
+import pytest
+
+from vprgen import BufferedOutputStream, ParallelCompressedStream
+from vprgen._xml import make_xml_generator
+
+from io import BytesIO
+
+class CountingStream(BytesIO):
+    def __init__(self):
+        super(CountingStream, self).__init__()
+        self.writes = 0
+
+    def write(self, data):
+        self.writes += 1
+        return super(CountingStream, self).write(data)
+
+def test_buffered_output_stream():
+    sink = CountingStream()
+    with BufferedOutputStream(sink, 16) as out:
+        out.write(b"0123456789")
+        assert sink.writes == 0
+        out.write(b"0123456789")
+        assert sink.writes == 1
+        out.write(b"x" * 40)
+        assert sink.writes == 3
+        out.write(b"abc")
+    assert sink.getvalue() == b"0123456789" * 2 + b"x" * 40 + b"abc"
+    assert out.bytes_written == out.bytes_flushed == 63
+    assert out.flush_count == sink.writes == 4
+
+def test_buffered_xml_generation():
+    for backend in ("lxml", "template"):
+        plain, sink = BytesIO(), CountingStream()
+        for stream in (plain, BufferedOutputStream(sink, 1024)):
+            with make_xml_generator(stream, True, backend = backend) as xg:
+                with xg.element("root"):
+                    for i in range(100):
+                        xg.element_leaf("element", {"key": i})
+            if stream is not plain:
+                stream.flush()
+        assert plain.getvalue() == sink.getvalue()
+
+def test_parallel_compressed_stream():
+    import gzip, zlib
+    data = b"".join(b"<edge src_node=\"%d\" sink_node=\"%d\"></edge>" % (i, i + 1) for i in range(10000))
+    sink = BytesIO()
+    with ParallelCompressedStream(sink, "gzip", block_size = 4096, max_workers = 4) as out:
+        for i in range(0, len(data), 1000):
+            out.write(data[i:i + 1000])
+    assert out.bytes_written == len(data)
+    assert out.bytes_compressed == len(sink.getvalue())
+    assert gzip.GzipFile(fileobj = BytesIO(sink.getvalue())).read() == data
+    # make sure the output really is a series of gzip members
+    assert zlib.decompressobj(31).decompress(sink.getvalue()) == data[:4096]
+
+def test_parallel_compressed_stream_xz():
+    lzma = pytest.importorskip("lzma")
+    data = b"0123456789abcdef" * 10000
+    sink = BytesIO()
+    with ParallelCompressedStream(sink, "xz", block_size = 10000, max_workers = 2, level = 0) as out:
+        out.write(data)
+    assert lzma.decompress(sink.getvalue()) == data
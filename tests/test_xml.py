@@ -1,4 +1,4 @@
-from vprgen._xml import XMLGenerator
+from vprgen._xml import XMLGenerator, make_xml_generator
 
 try:
     from io import BytesIO as StringIO
@@ -14,3 +14,30 @@ def test_basic():
         with xg.element("root"):
             xg.element_leaf("element", {"key": "value"}, "plain text")
     assert stream.getvalue() == b'<root><element key="value">plain text</element></root>'
+
+def test_template_backend():
+    def gen(backend, pretty):
+        stream = StringIO()
+        with make_xml_generator(stream, pretty, backend = backend) as xg:
+            with xg.element("root", {"a": 'x&<>"\n\t\r', "f": 1.2e-10, "i": 3}):
+                xg.element_leaf("empty")
+                xg.element_leaf("element", {"key": "value"}, "a&b<c>d\r")
+                with xg.element("nested"):
+                    xg.element_leaf("element", {"key": u"é"}, "")
+        return stream.getvalue()
+    for pretty in (False, True):
+        assert gen("lxml", pretty) == gen("template", pretty)
+
+def test_compile_element():
+    def gen(backend, pretty):
+        stream = StringIO()
+        with make_xml_generator(stream, pretty, True, backend) as xg:
+            with xg.element("root"):
+                emit_leaf = xg.compile_element("leaf", ("a", "b"))
+                emit_nested = xg.compile_element("nested", ("a", ), (("x", ("b", "c")), ("y", ())))
+                emit_leaf(1, 2.5)
+                emit_nested("A", 3, "C")
+        return stream.getvalue()
+    assert gen("lxml", False) == gen("template", False) == (b'<root><leaf a="1" b="2.5"></leaf>'
+            b'<nested a="A"><x b="3" c="C"></x><y></y></nested></root>')
+    assert gen("lxml", True) == gen("template", True)
@@ -0,0 +1,2 @@
+from vprgen._stream import BufferedOutputStream, ParallelCompressedStream
+from vprgen._csr import CSRIndex, CSRIndexBuilder
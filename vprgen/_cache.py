@@ -0,0 +1,106 @@
+from future.builtins import object
+
+from contextlib import contextmanager
+from tempfile import mkstemp
+import hashlib
+import glob
+import os
+
+_CACHE_FORMAT_VERSION = 1
+_COPY_CHUNK_SIZE = 1024 * 1024
+
+# ----------------------------------------------------------------------------
+# -- Recording Output Stream -------------------------------------------------
+# ----------------------------------------------------------------------------
+class _RecordingStream(object):
+    """A write-only file-like object that passes everything to the underlying stream, and optionally copies it into a
+    recording file."""
+    def __init__(self, f):
+        self.__f = f
+        self.recording = None
+
+    def write(self, data):
+        if self.recording is not None:
+            self.recording.write(data)
+        return self.__f.write(data)
+
+    def flush(self):
+        flush = getattr(self.__f, "flush", None)
+        if flush is not None:
+            flush()
+
+# ----------------------------------------------------------------------------
+# -- Per-section Fragment Cache ----------------------------------------------
+# ----------------------------------------------------------------------------
+class SectionCache(object):
+    """On-disk cache of the serialized sections of a generated XML file.
+
+    Each section is stored as a byte fragment named after the section and a digest of its fingerprint. When a section
+    is generated again with the same fingerprint, the stored fragment is copied into the output instead. Only the
+    latest fragment of each section is kept.
+
+    Args:
+        directory (:obj:`str`): the cache directory. Created if it does not exist
+        context: anything else affecting the serialized bytes, e.g. pretty printing. Must have a stable ``repr``
+    """
+    def __init__(self, directory, context = None):
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        self.__directory = directory
+        self.__context = context
+        self.__stream = None
+
+    def tap(self, ostream):
+        """Wrap ``ostream`` so that sections written into it can be recorded. The returned stream must be used as
+        the output stream of the XML generator."""
+        self.__stream = _RecordingStream(ostream)
+        return self.__stream
+
+    def __path(self, section, fingerprint):
+        digest = hashlib.sha1(repr((_CACHE_FORMAT_VERSION, self.__context, section, fingerprint))
+                .encode("utf-8")).hexdigest()
+        return os.path.join(self.__directory, "{}.{}.xml".format(section, digest))
+
+    @contextmanager
+    def section(self, xmlgen, section, fingerprint):
+        """Reuse or record a section.
+
+        If ``fingerprint`` is None, nothing is cached and the body is always executed. Otherwise, if a fragment with
+        the same fingerprint is stored, it is written out through ``xmlgen`` and the context yields True, meaning the
+        body should skip generating the section. If not, the context yields False and the bytes generated in the body
+        are recorded.
+
+        Args:
+            xmlgen: the XML generator, writing into the stream returned by `tap`
+            section (:obj:`str`): name of the section
+            fingerprint: fingerprint of the section. Must have a stable ``repr``
+        """
+        if fingerprint is None:
+            yield False
+            return
+        path = self.__path(section, fingerprint)
+        if os.path.isfile(path):
+            with open(path, "rb") as f:
+                while True:
+                    chunk = f.read(_COPY_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    xmlgen.write_raw(chunk)
+            yield True
+            return
+        fd, tmp = mkstemp(dir = self.__directory, prefix = section + ".", suffix = ".tmp")
+        try:
+            with os.fdopen(fd, "wb") as recording:
+                xmlgen.flush()
+                self.__stream.recording = recording
+                try:
+                    yield False
+                    xmlgen.flush()
+                finally:
+                    self.__stream.recording = None
+            for stale in glob.glob(os.path.join(self.__directory, section + ".*.xml")):
+                os.remove(stale)
+            os.rename(tmp, path)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
@@ -0,0 +1,449 @@
+"""Minimal pure-Python Cap'n Proto serializer.
+
+Supports the subset of the schema language used by VPR's routing resource graph schema: top-level enums and structs
+whose fields are primitives, enums, ``Text``, ``Data``, ``List(T)`` and other structs. Unions, groups, generics and
+nested declarations are not supported.
+"""
+
+from future.builtins import object, range
+from future.utils import iteritems
+
+from collections import OrderedDict
+from tempfile import TemporaryFile
+from array import array
+import struct
+import sys
+import re
+
+# ----------------------------------------------------------------------------
+# -- Schema ------------------------------------------------------------------
+# ----------------------------------------------------------------------------
+# log2 of the size in bits and `struct` format of primitive types
+_primitives = {
+        "Bool": (0, None),
+        "Int8": (3, "<b"),
+        "UInt8": (3, "<B"),
+        "Int16": (4, "<h"),
+        "UInt16": (4, "<H"),
+        "Int32": (5, "<i"),
+        "UInt32": (5, "<I"),
+        "Int64": (6, "<q"),
+        "UInt64": (6, "<Q"),
+        "Float32": (5, "<f"),
+        "Float64": (6, "<d"),
+        }
+
+# element size codes of list pointers
+_list_element_sizes = {0: 1, 3: 2, 4: 3, 5: 4, 6: 5}
+
+# pointer offsets are signed 30-bit word counts, and list sizes are 29-bit element or word counts. Messages are
+# written as a single segment, so every pointer must reach its target directly, without far pointers
+_max_offset = (1 << 29) - 1
+_max_list_size = (1 << 29) - 1
+
+_comment = re.compile(r'#[^\n]*')
+_declaration = re.compile(r'\b(enum|struct)\s+(\w+)\s*\{([^{}]*)\}')
+_enumerant = re.compile(r'(\w+)\s*@(\d+)\s*;')
+_field = re.compile(r'(\w+)\s*@(\d+)\s*:\s*([\w()]+)\s*(?:=\s*([^;]+?))?\s*;')
+
+class _HoleSet(object):
+    """Tracks unused space in the data section, following the allocation strategy of the Cap'n Proto compiler."""
+    def __init__(self):
+        self.holes = [0] * 6
+
+    def try_allocate(self, lg_size):
+        if lg_size >= 6:
+            return None
+        if self.holes[lg_size]:
+            offset, self.holes[lg_size] = self.holes[lg_size], 0
+            return offset
+        offset = self.try_allocate(lg_size + 1)
+        if offset is None:
+            return None
+        self.holes[lg_size] = offset * 2 + 1
+        return offset * 2
+
+    def add_holes_at_end(self, lg_size, offset):
+        while lg_size < 6:
+            self.holes[lg_size] = offset
+            lg_size += 1
+            offset = (offset + 1) // 2
+
+class _Field(object):
+    """A field of a struct.
+
+    Attributes:
+        name (:obj:`str`): name of the field
+        type_ (:obj:`str`): type of the field as written in the schema
+        lg_size (:obj:`int`): log2 of the size in bits for data fields, None for pointer fields
+        offset (:obj:`int`): offset in units of the field size for data fields, or pointer index for pointer fields
+        default: default value for data fields
+    """
+    __slots__ = ["name", "type_", "lg_size", "offset", "default", "format_"]
+
+    def __init__(self, name, type_, lg_size, default):
+        self.name = name
+        self.type_ = type_
+        self.lg_size = lg_size
+        self.offset = None
+        self.default = default
+        self.format_ = None
+
+class StructLayout(object):
+    """Wire layout of a struct.
+
+    Attributes:
+        name (:obj:`str`): name of the struct
+        fields (:obj:`OrderedDict` [:obj:`str`, `_Field` ]): fields in ordinal order
+        data_words (:obj:`int`): size of the data section in words
+        pointer_count (:obj:`int`): size of the pointer section in words
+    """
+    def __init__(self, name, fields):
+        self.name = name
+        self.fields = OrderedDict((f.name, f) for f in fields)
+        self.data_words = 0
+        self.pointer_count = 0
+        holes = _HoleSet()
+        for f in fields:
+            if f.lg_size is None:
+                f.offset = self.pointer_count
+                self.pointer_count += 1
+                continue
+            offset = holes.try_allocate(f.lg_size)
+            if offset is None:
+                offset = self.data_words << (6 - f.lg_size)
+                self.data_words += 1
+                holes.add_holes_at_end(f.lg_size, offset + 1)
+            f.offset = offset
+
+    @property
+    def words(self):
+        return self.data_words + self.pointer_count
+
+class CapnpSchema(object):
+    """Parsed Cap'n Proto schema.
+
+    Attributes:
+        enums (:obj:`dict` [:obj:`str`, :obj:`dict` [:obj:`str`, :obj:`int` ]]): enumerants of each enum
+        structs (:obj:`dict` [:obj:`str`, `StructLayout` ]): layout of each struct
+    """
+    def __init__(self, text):
+        text = _comment.sub('', text)
+        if re.search(r'\bunion\b|\bgroup\b', text):
+            raise NotImplementedError("Unions and groups are not supported")
+        self.enums = {}
+        declarations = []
+        for kind, name, body in _declaration.findall(text):
+            if kind == "enum":
+                self.enums[name] = {e: int(i) for e, i in _enumerant.findall(body)}
+            else:
+                declarations.append((name, body))
+        self.structs = {}
+        for name, body in declarations:
+            fields = []
+            for field_name, ordinal, type_, default in sorted(_field.findall(body), key = lambda f: int(f[1])):
+                fields.append(self.__make_field(field_name, type_, default.strip() if default else None))
+            self.structs[name] = StructLayout(name, fields)
+
+    @classmethod
+    def load(cls, path):
+        with open(path) as f:
+            return cls(f.read())
+
+    def __make_field(self, name, type_, default):
+        if type_ in self.enums:
+            enumerants = self.enums[type_]
+            field = _Field(name, type_, 4, enumerants[default] if default else 0)
+            field.format_ = "<H"
+        elif type_ in _primitives:
+            lg_size, format_ = _primitives[type_]
+            if type_ == "Bool":
+                value = default == "true"
+            elif type_.startswith("Float"):
+                value = float(default) if default else 0.0
+            else:
+                value = int(default, 0) if default else 0
+            field = _Field(name, type_, lg_size, value)
+            field.format_ = format_
+        elif type_ == "Void":
+            raise NotImplementedError("Void fields are not supported")
+        else:
+            field = _Field(name, type_, None, None)
+        return field
+
+# ----------------------------------------------------------------------------
+# -- Encoding ----------------------------------------------------------------
+# ----------------------------------------------------------------------------
+def _pad(data):
+    """Pad ``data`` to a multiple of 8 bytes."""
+    rem = len(data) % 8
+    return data + b'\0' * (8 - rem) if rem else data
+
+def _check_offset(offset):
+    if not -_max_offset - 1 <= offset <= _max_offset:
+        raise ValueError("Pointer offset of {} words exceeds the limit of 2^29 words of a single-segment message "
+                "(far pointers are not supported)".format(offset))
+
+def _struct_pointer(offset, layout):
+    _check_offset(offset)
+    return struct.pack("<iHH", (offset << 2), layout.data_words, layout.pointer_count)
+
+def _list_pointer(offset, size_code, count):
+    _check_offset(offset)
+    if count > _max_list_size:
+        raise ValueError("List size of {} exceeds the limit of 2^29 - 1 elements or words".format(count))
+    return struct.pack("<iI", (offset << 2) | 1, size_code | (count << 3))
+
+class _Blob(object):
+    """A position-independent encoding of an object reachable through a pointer.
+
+    The object starts at the first word of ``data``, and all objects it points to follow it within ``data``.
+    """
+    __slots__ = ["data", "pointer"]
+
+    def __init__(self, data, pointer):
+        self.data = data        # bytes, padded to words
+        self.pointer = pointer  # function(offset) -> 8-byte pointer
+
+class CapnpEncoder(object):
+    """Encodes plain Python values into Cap'n Proto wire format.
+
+    Struct values are mappings from field names to values; unset fields keep their default values. Enum values are
+    enumerant names. List values are sequences.
+
+    Args:
+        schema (`CapnpSchema`): the schema
+    """
+    def __init__(self, schema):
+        self.schema = schema
+
+    def encode_struct_body(self, layout, values):
+        """Encode the data and pointer sections of a struct.
+
+        Returns:
+            :obj:`tuple` [:obj:`bytearray`, :obj:`list` [:obj:`tuple` [:obj:`int`, `_Blob` ]]]: the struct body with
+                null pointers, and the pointer index and blob of each non-null pointer field
+        """
+        body = bytearray(layout.words * 8)
+        children = []
+        for name, value in iteritems(values):
+            if value is None:
+                continue
+            f = layout.fields[name]
+            if f.lg_size is None:
+                children.append((f.offset, self.encode_pointer(f.type_, value)))
+            elif f.lg_size == 0:
+                if bool(value) != f.default:
+                    body[f.offset // 8] |= 1 << (f.offset % 8)
+            else:
+                if f.type_ in self.schema.enums:
+                    value = self.schema.enums[f.type_][value]
+                offset = f.offset << (f.lg_size - 3)
+                if f.default:
+                    struct.pack_into(f.format_, body, offset, value)
+                    default = struct.pack(f.format_, f.default)
+                    for i in range(len(default)):
+                        body[offset + i] ^= default[i]
+                else:
+                    struct.pack_into(f.format_, body, offset, value)
+        return body, children
+
+    def link(self, body, pointer_base, children, start):
+        """Append ``children`` after ``body`` and fill in their pointers.
+
+        Args:
+            body (:obj:`bytearray`): the encoded object, modified in place
+            pointer_base (:obj:`int`): word position of the first pointer of the pointer section, relative to the
+                beginning of ``body``
+            children: pointer index and blob of each non-null pointer
+            start (:obj:`int`): word position where the first child is placed, relative to the beginning of ``body``
+        """
+        for index, blob in children:
+            position = pointer_base + index
+            body[position * 8:position * 8 + 8] = blob.pointer(start - position - 1)
+            start += len(blob.data) // 8
+        for _, blob in children:
+            body += blob.data
+        return body
+
+    def encode_struct(self, layout, values):
+        """Encode a struct and everything it points to into a `_Blob`."""
+        body, children = self.encode_struct_body(layout, values)
+        data = self.link(body, layout.data_words, children, layout.words)
+        return _Blob(bytes(data), lambda offset: _struct_pointer(offset, layout))
+
+    def encode_pointer(self, type_, value):
+        """Encode a pointer field value of type ``type_`` into a `_Blob`."""
+        if type_ == "Text":
+            encoded = value.encode("utf-8") + b'\0'
+            return _Blob(_pad(encoded), lambda offset: _list_pointer(offset, 2, len(encoded)))
+        elif type_ == "Data":
+            return _Blob(_pad(bytes(value)), lambda offset: _list_pointer(offset, 2, len(value)))
+        elif type_ in self.schema.structs:
+            return self.encode_struct(self.schema.structs[type_], value)
+        elif type_.startswith("List(") and type_.endswith(")"):
+            return self.encode_list(type_[5:-1], value)
+        raise NotImplementedError("Unsupported type: {}".format(type_))
+
+    def encode_list(self, element_type, values):
+        """Encode a list of ``element_type`` elements into a `_Blob`."""
+        values = list(values)
+        count = len(values)
+        if element_type in self.schema.structs:
+            layout = self.schema.structs[element_type]
+            words = layout.words
+            data = bytearray(struct.pack("<iHH", count << 2, layout.data_words, layout.pointer_count))
+            element_children = []
+            for value in values:
+                body, children = self.encode_struct_body(layout, value)
+                data += body
+                element_children.append(children)
+            start = 1 + count * words
+            for i, children in enumerate(element_children):
+                data = self.link(data, 1 + i * words + layout.data_words, children, start)
+                start += sum(len(blob.data) // 8 for _, blob in children)
+            return _Blob(bytes(data), lambda offset: _list_pointer(offset, 7, count * words))
+        elif element_type in self.schema.enums or element_type in _primitives:
+            if element_type in self.schema.enums:
+                enumerants = self.schema.enums[element_type]
+                lg_size, format_, values = 4, "<H", [enumerants[v] for v in values]
+            else:
+                lg_size, format_ = _primitives[element_type]
+            if lg_size == 0:
+                data = bytearray((count + 7) // 8)
+                for i, v in enumerate(values):
+                    if v:
+                        data[i // 8] |= 1 << (i % 8)
+                data = bytes(data)
+            else:
+                data = struct.pack("<{}{}".format(count, format_[1]), *values)
+            return _Blob(_pad(data), lambda offset: _list_pointer(offset, _list_element_sizes[lg_size], count))
+        else:
+            blobs = [self.encode_pointer(element_type, v) for v in values]
+            data = bytearray(count * 8)
+            self.link(data, 0, list(enumerate(blobs)), count)
+            return _Blob(bytes(data), lambda offset: _list_pointer(offset, 6, count))
+
+# ----------------------------------------------------------------------------
+# -- Streaming Composite Lists -----------------------------------------------
+# ----------------------------------------------------------------------------
+class SpooledStructList(object):
+    """A composite list which is encoded element by element into temporary files, so that lists too big to fit in
+    memory can be written out once their length is known.
+
+    Elements are spooled with pointers relative to the (yet unknown) end of the element section. When the list is
+    written out, the pointers are patched with the final element count.
+
+    Args:
+        encoder (`CapnpEncoder`): the encoder
+        layout (`StructLayout`): layout of the elements
+        tmpdir (:obj:`str`): directory for the temporary files
+    """
+    _PATCH_CHUNK = 4096    # elements patched per read
+
+    def __init__(self, encoder, layout, tmpdir = None):
+        self.__encoder = encoder
+        self.__layout = layout
+        self.__elements = TemporaryFile(dir = tmpdir)
+        self.__children = TemporaryFile(dir = tmpdir)
+        self.__children_words = 0
+        self.count = 0
+
+    def append(self, values):
+        layout, encoder = self.__layout, self.__encoder
+        body, children = encoder.encode_struct_body(layout, values)
+        # every pointer in the list points forward within it once patched, so the list must stay within the reach of a
+        # pointer. This also keeps the unpatched offsets, which are at least minus the size of the list, in range
+        words = self.words + layout.words + sum(len(blob.data) // 8 for _, blob in children)
+        if words > _max_offset or self.count + 1 > _max_list_size:
+            raise ValueError("List of {} elements and {} words exceeds the limit of 2^29 words of a single-segment "
+                    "message (far pointers are not supported)".format(self.count + 1, words))
+        if children:
+            # pointer offsets are first computed as if the element section ended right before this element, then
+            # patched by adding the size of the element section when the list is written out
+            base = self.count * layout.words + layout.data_words
+            start = self.__children_words
+            for index, blob in children:
+                position = base + index
+                p = (layout.data_words + index) * 8
+                body[p:p + 8] = blob.pointer(start - position - 1)
+                start += len(blob.data) // 8
+                self.__children.write(blob.data)
+            self.__children_words = start
+        self.__elements.write(body)
+        self.count += 1
+
+    @property
+    def words(self):
+        """Size of the encoded list, excluding the list pointer, in words."""
+        return 1 + self.count * self.__layout.words + self.__children_words
+
+    def pointer(self, offset):
+        return _list_pointer(offset, 7, self.count * self.__layout.words)
+
+    def write(self, ostream):
+        """Write the encoded list out to ``ostream``."""
+        layout = self.__layout
+        ostream.write(struct.pack("<iHH", self.count << 2, layout.data_words, layout.pointer_count))
+        delta = (self.count * layout.words) << 2
+        pointer_slots = [(layout.data_words + i) * 2 for i in range(layout.pointer_count)]
+        stride = layout.words * 2
+        self.__elements.seek(0)
+        while True:
+            chunk = self.__elements.read(self._PATCH_CHUNK * layout.words * 8)
+            if not chunk:
+                break
+            words = array("i")
+            if hasattr(words, "frombytes"):
+                words.frombytes(chunk)
+            else:   # Python 2
+                words.fromstring(chunk)
+            if sys.byteorder == "big":
+                words.byteswap()
+            for slot in pointer_slots:
+                for i in range(slot, len(words), stride):
+                    if words[i] or words[i + 1]:
+                        words[i] += delta
+            if sys.byteorder == "big":
+                words.byteswap()
+            ostream.write(words.tobytes() if hasattr(words, "tobytes") else words.tostring())
+        self.__children.seek(0)
+        while True:
+            chunk = self.__children.read(1 << 20)
+            if not chunk:
+                break
+            ostream.write(chunk)
+
+    def close(self):
+        self.__elements.close()
+        self.__children.close()
+
+def write_message(ostream, root_layout, root_body, root_children):
+    """Write a single-segment message in the standard stream framing.
+
+    Args:
+        ostream: a file-like object
+        root_layout (`StructLayout`): layout of the root struct
+        root_body (:obj:`bytearray`): data and pointer sections of the root struct, from
+            `CapnpEncoder.encode_struct_body`
+        root_children: pointer index and blob-like object of each non-null pointer of the root struct. A blob-like
+            object has either a ``data`` attribute, or ``words`` and ``write`` like `SpooledStructList`
+    """
+    def words_of(blob):
+        return blob.words if hasattr(blob, "write") else len(blob.data) // 8
+    start = root_layout.words
+    for index, blob in root_children:
+        position = root_layout.data_words + index
+        root_body[position * 8:position * 8 + 8] = blob.pointer(start - position - 1)
+        start += words_of(blob)
+    total = 1 + start
+    if total >= (1 << 32):
+        raise ValueError("Message too large for a single segment")
+    ostream.write(struct.pack("<II", 0, total))
+    ostream.write(_struct_pointer(0, root_layout))
+    ostream.write(bytes(root_body))
+    for _, blob in root_children:
+        if hasattr(blob, "write"):
+            blob.write(ostream)
+        else:
+            ostream.write(blob.data)
@@ -0,0 +1,293 @@
+from future.builtins import object, range, map, zip
+
+from itertools import islice
+from operator import attrgetter
+from array import array
+import struct
+import mmap
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+def _typecode(itemsize):
+    """Get an `array.array` typecode of ``itemsize`` bytes, or the largest one available. Python 2 has no "q"."""
+    typecodes = []
+    for typecode in ("i", "l", "q"):
+        try:
+            typecodes.append((array(typecode).itemsize, typecode))
+        except ValueError:
+            pass
+    return next((typecode for size, typecode in typecodes if size == itemsize), max(typecodes)[1])
+
+_MAGIC = b"VPRGCSR1"
+_HEADER = struct.Struct("<8sqq")    # magic, number of nodes, number of edges
+_NODE_TYPECODE = _typecode(8)       # node ids and offsets
+_SWITCH_TYPECODE = "i"              # switch ids
+_TAP_CHUNK_SIZE = 65536
+# arrays in the order they are stored in a saved index
+_fields = (("out_offsets", _NODE_TYPECODE),
+        ("out_targets", _NODE_TYPECODE),
+        ("in_offsets", _NODE_TYPECODE),
+        ("in_sources", _NODE_TYPECODE),
+        ("out_switches", _SWITCH_TYPECODE),
+        ("in_switches", _SWITCH_TYPECODE), )
+
+def _numpy_view(values):
+    """View a typed array or memoryview as a NumPy array without copying."""
+    if isinstance(values, np.ndarray):
+        return values
+    return np.frombuffer(values, dtype = np.dtype(values.typecode if isinstance(values, array) else values.format))
+
+def _map_array(buf, position, typecode, count):
+    """Get a read-only view of ``count`` items of ``typecode`` at ``position`` in the memory-mapped ``buf``.
+
+    This is a `memoryview` where `memoryview.cast` exists, i.e. on Python 3, otherwise a NumPy array over the file, or
+    a copy in an `array.array` if NumPy is not available either.
+    """
+    size = count * array(typecode).itemsize
+    if hasattr(memoryview, "cast"):
+        return memoryview(buf)[position:position + size].cast(typecode)
+    elif np is not None:
+        return np.frombuffer(buf, dtype = np.dtype(typecode), count = count, offset = position)
+    values = array(typecode)
+    values.fromstring(buf[position:position + size])
+    return values
+
+def _check_node_range(low, high, num_nodes):
+    """Check that the node ids between ``low`` and ``high`` are in ``range(num_nodes)``."""
+    for id_ in (low, high):
+        if not 0 <= id_ < num_nodes:
+            raise ValueError("An edge refers to node {}, which is outside of the graph of {} nodes".format(
+                int(id_), num_nodes))
+
+def _group(keys, values, switches, num_nodes):
+    """Counting sort ``values`` and ``switches`` by ``keys``, preserving the order of edges with the same key.
+
+    Returns:
+        offsets, grouped values and grouped switches as typed arrays
+
+    Raises:
+        ValueError: if a key is not in ``range(num_nodes)``
+    """
+    if np is not None and len(keys):
+        keys_ = _numpy_view(keys)
+        _check_node_range(keys_.min(), keys_.max(), num_nodes)
+        order = np.argsort(keys_, kind = "stable")
+        offsets = np.zeros(num_nodes + 1, dtype = np.int64)
+        np.cumsum(np.bincount(keys_, minlength = num_nodes), out = offsets[1:])
+        return (array(_NODE_TYPECODE, offsets.tobytes()), array(_NODE_TYPECODE, _numpy_view(values)[order].tobytes()),
+                array(_SWITCH_TYPECODE, _numpy_view(switches)[order].tobytes()))
+    if len(keys):
+        _check_node_range(min(keys), max(keys), num_nodes)
+    offsets = array(_NODE_TYPECODE, [0]) * (num_nodes + 1)
+    for key in keys:
+        offsets[key + 1] += 1
+    for i in range(num_nodes):
+        offsets[i + 1] += offsets[i]
+    positions = offsets[:-1]
+    grouped_values = array(_NODE_TYPECODE, [0]) * len(keys)
+    grouped_switches = array(_SWITCH_TYPECODE, [0]) * len(keys)
+    for key, value, switch in zip(keys, values, switches):
+        position = positions[key]
+        grouped_values[position] = value
+        grouped_switches[position] = switch
+        positions[key] = position + 1
+    return offsets, grouped_values, grouped_switches
+
+# ----------------------------------------------------------------------------
+# -- CSR Index ---------------------------------------------------------------
+# ----------------------------------------------------------------------------
+class CSRIndex(object):
+    """Forward and reverse adjacency of a routing resource graph in compressed sparse row (CSR) form.
+
+    The outgoing edges of node ``n`` are ``out_targets[out_offsets[n]:out_offsets[n + 1]]`` with switch ids
+    ``out_switches[...]`` over the same range, in the order they were recorded. Incoming edges are stored the same
+    way in ``in_offsets``, ``in_sources`` and ``in_switches``. The arrays are `array.array` objects, or views over a
+    memory-mapped file if the index is loaded with `load`.
+
+    Args:
+        num_nodes (:obj:`int`): number of nodes. Node ids must be in ``range(num_nodes)``
+        **arrays: the six arrays described above
+    """
+    def __init__(self, num_nodes, **arrays):
+        self.num_nodes = num_nodes
+        for name, _ in _fields:
+            setattr(self, name, arrays[name])
+        self.__mmap = None
+
+    @property
+    def num_edges(self):
+        return len(self.out_targets)
+
+    def fanout(self, node):
+        """Number of edges driven by ``node``."""
+        return self.out_offsets[node + 1] - self.out_offsets[node]
+
+    def fanin(self, node):
+        """Number of edges driving ``node``."""
+        return self.in_offsets[node + 1] - self.in_offsets[node]
+
+    def successors(self, node):
+        """Sink nodes and switch ids of the edges driven by ``node``."""
+        lo, hi = self.out_offsets[node], self.out_offsets[node + 1]
+        return self.out_targets[lo:hi], self.out_switches[lo:hi]
+
+    def predecessors(self, node):
+        """Source nodes and switch ids of the edges driving ``node``."""
+        lo, hi = self.in_offsets[node], self.in_offsets[node + 1]
+        return self.in_sources[lo:hi], self.in_switches[lo:hi]
+
+    def undriven_nodes(self):
+        """List the nodes without any incoming edges."""
+        if np is not None:
+            return np.flatnonzero(np.diff(_numpy_view(self.in_offsets)) == 0).tolist()
+        offsets = self.in_offsets
+        return [n for n in range(self.num_nodes) if offsets[n] == offsets[n + 1]]
+
+    def unloaded_nodes(self):
+        """List the nodes without any outgoing edges."""
+        if np is not None:
+            return np.flatnonzero(np.diff(_numpy_view(self.out_offsets)) == 0).tolist()
+        offsets = self.out_offsets
+        return [n for n in range(self.num_nodes) if offsets[n] == offsets[n + 1]]
+
+    def max_fanout_by_switch(self):
+        """Get the largest number of edges of each switch driven by a single node.
+
+        Returns:
+            :obj:`dict` [:obj:`int`, :obj:`int` ]: mapping from switch id to the maximum fanout
+        """
+        if np is not None:
+            if not self.num_edges:
+                return {}
+            offsets, switches = _numpy_view(self.out_offsets), _numpy_view(self.out_switches).astype(np.int64)
+            stride = int(switches.max()) + 1
+            pairs = np.repeat(np.arange(self.num_nodes, dtype = np.int64), np.diff(offsets)) * stride + switches
+            keys, counts = np.unique(pairs, return_counts = True)
+            fanouts = np.zeros(stride, dtype = np.int64)
+            np.maximum.at(fanouts, keys % stride, counts)
+            return {switch: int(fanouts[switch]) for switch in np.flatnonzero(fanouts).tolist()}
+        result = {}
+        offsets, switches = self.out_offsets, self.out_switches
+        for node in range(self.num_nodes):
+            lo, hi = offsets[node], offsets[node + 1]
+            if lo == hi:
+                continue
+            counts = {}
+            for switch in switches[lo:hi]:
+                counts[switch] = counts.get(switch, 0) + 1
+            for switch, count in counts.items():
+                if count > result.get(switch, 0):
+                    result[switch] = count
+        return result
+
+    def save(self, path):
+        """Save the index to ``path``, in a format which can be memory-mapped by `load`."""
+        with open(path, "wb") as f:
+            f.write(_HEADER.pack(_MAGIC, self.num_nodes, self.num_edges))
+            for name, _ in _fields:
+                values = getattr(self, name)
+                if isinstance(values, array):
+                    values.tofile(f)
+                else:
+                    f.write(values)
+
+    @classmethod
+    def load(cls, path):
+        """Memory-map an index saved with `save`. The arrays are read-only views over the file, see `_map_array`.
+
+        Saved indices are portable between platforms where node ids are stored in arrays of the same item size, which
+        is 8 bytes except on Python 2 on Windows.
+        """
+        with open(path, "rb") as f:
+            buf = mmap.mmap(f.fileno(), 0, access = mmap.ACCESS_READ)
+        magic, num_nodes, num_edges = _HEADER.unpack_from(buf)
+        if magic != _MAGIC:
+            buf.close()
+            raise ValueError("Not a saved CSR index: {}".format(path))
+        arrays, position = {}, _HEADER.size
+        for name, typecode in _fields:
+            count = num_nodes + 1 if name.endswith("offsets") else num_edges
+            arrays[name] = _map_array(buf, position, typecode, count)
+            position += count * array(typecode).itemsize
+        index = cls(num_nodes, **arrays)
+        index.__mmap = buf
+        return index
+
+    def close(self):
+        """Release the memory-mapped file, if any. The index cannot be used afterwards, and no slices of its arrays
+        may be alive."""
+        if self.__mmap is not None:
+            for name, _ in _fields:
+                if isinstance(getattr(self, name), memoryview):
+                    getattr(self, name).release()
+                setattr(self, name, None)
+            self.__mmap.close()
+            self.__mmap = None
+
+# ----------------------------------------------------------------------------
+# -- CSR Index Builder -------------------------------------------------------
+# ----------------------------------------------------------------------------
+class CSRIndexBuilder(object):
+    """Records routing edges into compact typed arrays, and builds a `CSRIndex` out of them.
+
+    A builder can be passed to `ArchitectureDelegate.gen_rrg_xml`, which records every edge it generates, or used
+    standalone with `extend`.
+
+    Args:
+        num_nodes (:obj:`int`): number of nodes. If not given, the largest node id recorded plus one
+    """
+    def __init__(self, num_nodes = None):
+        self.num_nodes = num_nodes
+        self.__src = array(_NODE_TYPECODE)
+        self.__sink = array(_NODE_TYPECODE)
+        self.__switch = array(_SWITCH_TYPECODE)
+
+    def __len__(self):
+        return len(self.__src)
+
+    def add(self, src_node, sink_node, switch_id):
+        """Record one edge."""
+        self.__src.append(src_node)
+        self.__sink.append(sink_node)
+        self.__switch.append(switch_id)
+
+    def add_columns(self, src, sink, switch):
+        """Record edges in bulk from three sequences of the same length."""
+        for column, values in ((self.__src, src), (self.__sink, sink), (self.__switch, switch)):
+            column.fromlist(values.tolist() if hasattr(values, "tolist") else list(values))
+
+    def tap(self, edges):
+        """Record edges implementing `AbstractEdge` while passing them through.
+
+        Returns:
+            An iterator over ``edges``. Edges are recorded in chunks as the iterator is consumed.
+        """
+        fields = tuple(map(attrgetter, ("src_node", "sink_node", "switch_id")))
+        edges = iter(edges)
+        while True:
+            chunk = list(islice(edges, _TAP_CHUNK_SIZE))
+            if not chunk:
+                return
+            for column, field in zip((self.__src, self.__sink, self.__switch), fields):
+                column.extend(map(field, chunk))
+            for edge in chunk:
+                yield edge
+
+    def extend(self, edges):
+        """Record edges implementing `AbstractEdge`."""
+        for _ in self.tap(edges):
+            pass
+        return self
+
+    def build(self):
+        """Build the forward and reverse CSR index of the recorded edges."""
+        num_nodes = self.num_nodes
+        if num_nodes is None:
+            num_nodes = max(max(self.__src), max(self.__sink)) + 1 if len(self.__src) else 0
+        out_offsets, out_targets, out_switches = _group(self.__src, self.__sink, self.__switch, num_nodes)
+        in_offsets, in_sources, in_switches = _group(self.__sink, self.__src, self.__switch, num_nodes)
+        return CSRIndex(num_nodes, out_offsets = out_offsets, out_targets = out_targets, out_switches = out_switches,
+                in_offsets = in_offsets, in_sources = in_sources, in_switches = in_switches)
@@ -0,0 +1,108 @@
+from future.builtins import object, range, map, zip
+
+from tempfile import TemporaryFile
+from itertools import islice, chain, compress, count, repeat
+from operator import attrgetter, add
+from array import array
+import heapq
+
+# each record is (src_node, sink_node, switch_id, metadata index) packed as 4 signed longs
+_RECORD_ITEMS = 4
+_TYPECODE = "l"
+# estimated memory taken by one record while a run is collected in memory: a 4-tuple, its integers and a list slot
+_RECORD_MEMORY = 200
+_DEFAULT_MEMORY = 256 * 1024 * 1024
+_MIN_BLOCK_RECORDS = 1024
+_NO_METADATA = (0, )
+
+class ExternalEdgeSort(object):
+    """Sort routing edges by source node, then sink node, then switch, using a bounded amount of memory.
+
+    Edges are collected into runs, each sorted in memory and spilled to an anonymous temporary file as packed binary
+    records. The sorted edges are then produced by a k-way merge of the runs, reading each run in blocks. Edges with
+    metadata are supported, but their metadata is kept in memory.
+
+    Args:
+        memory (:obj:`int`): approximate number of bytes used by the in-memory runs and the merge buffers
+        tmpdir (:obj:`str`): directory for the temporary files
+    """
+    def __init__(self, memory = None, tmpdir = None):
+        self.__run_size = max(_MIN_BLOCK_RECORDS, (memory or _DEFAULT_MEMORY) // _RECORD_MEMORY)
+        self.__tmpdir = tmpdir
+        self.__runs = []
+        self.__pending = []
+        self.metadata = [None]  # metadata index 0 means no metadata
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+    @property
+    def run_count(self):
+        """Number of runs spilled to temporary files."""
+        return len(self.__runs)
+
+    def add(self, src_node, sink_node, switch_id, metadata = None):
+        """Add one edge."""
+        index = 0
+        if metadata:
+            index = len(self.metadata)
+            self.metadata.append(metadata)
+        self.__pending.append((src_node, sink_node, switch_id, index))
+        if len(self.__pending) >= self.__run_size:
+            self.__spill()
+
+    def extend(self, edges):
+        """Add edges implementing `AbstractEdge`."""
+        fields, metadata = attrgetter("src_node", "sink_node", "switch_id"), attrgetter("metadata")
+        edges = iter(edges)
+        while True:
+            chunk = list(islice(edges, min(_MIN_BLOCK_RECORDS * 64, self.__run_size - len(self.__pending))))
+            if not chunk:
+                break
+            rows = list(map(add, map(fields, chunk), repeat(_NO_METADATA)))
+            for i in compress(count(), map(metadata, chunk)):
+                rows[i] = rows[i][:3] + (len(self.metadata), )
+                self.metadata.append(chunk[i].metadata)
+            self.__pending.extend(rows)
+            if len(self.__pending) >= self.__run_size:
+                self.__spill()
+
+    def __spill(self):
+        pending, self.__pending = self.__pending, []
+        pending.sort()
+        f = TemporaryFile(dir = self.__tmpdir)
+        for start in range(0, len(pending), _MIN_BLOCK_RECORDS * 64):
+            array(_TYPECODE, chain.from_iterable(pending[start:start + _MIN_BLOCK_RECORDS * 64])).tofile(f)
+        self.__runs.append((f, len(pending)))
+
+    def __read_run(self, f, size, block):
+        f.seek(0)
+        while size > 0:
+            n = min(block, size)
+            records = array(_TYPECODE)
+            records.fromfile(f, n * _RECORD_ITEMS)
+            size -= n
+            for row in zip(*(records[i::_RECORD_ITEMS] for i in range(_RECORD_ITEMS))):
+                yield row
+
+    def __iter__(self):
+        """Iterate the sorted edges as (src_node, sink_node, switch_id, metadata index) tuples. Metadata index 0
+        means no metadata. Otherwise it indexes into `metadata`."""
+        if not self.__runs:
+            self.__pending.sort()
+            return iter(self.__pending)
+        if self.__pending:
+            self.__spill()
+        block = max(_MIN_BLOCK_RECORDS, self.__run_size // len(self.__runs))
+        return heapq.merge(*(self.__read_run(f, size, block) for f, size in self.__runs))
+
+    def close(self):
+        """Release the temporary files."""
+        for f, _ in self.__runs:
+            f.close()
+        self.__runs = []
+        self.__pending = []
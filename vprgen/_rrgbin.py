@@ -0,0 +1,236 @@
+from future.builtins import object
+from future.utils import iteritems
+
+from vprgen._capnp import CapnpSchema, CapnpEncoder, SpooledStructList, write_message
+
+import struct
+import os
+
+_schema_path = os.path.join(os.path.dirname(__file__), "schema", "rr_graph_uxsdcxx.capnp")
+_schema = None
+
+def _load_schema():
+    global _schema
+    if _schema is None:
+        _schema = CapnpSchema.load(_schema_path)
+    return _schema
+
+# XML spellings of enum values used by the generators -> enumerant names in the Cap'n Proto schema
+_switch_types = {
+        "mux": "mux",
+        "tristate": "tristate",
+        "pass_gate": "passGate",
+        "short": "short",
+        "buffer": "buffer",
+        }
+_pin_types = {
+        "OPEN": "open",
+        "OUTPUT": "output",
+        "INPUT": "input",
+        }
+_node_types = {
+        "CHANX": "chanx",
+        "CHANY": "chany",
+        "SOURCE": "source",
+        "SINK": "sink",
+        "OPIN": "opin",
+        "IPIN": "ipin",
+        }
+_node_directions = {
+        "INC_DIR": "incDir",
+        "DEC_DIR": "decDir",
+        "BI_DIR": "biDir",
+        }
+_loc_sides = {
+        "LEFT": "left",
+        "RIGHT": "right",
+        "TOP": "top",
+        "BOTTOM": "bottom",
+        }
+
+def _metadata(metadata):
+    """Convert a metadata mapping into a ``MetadataType`` struct value."""
+    if not metadata:
+        return None
+    metas = []
+    for key, value in iteritems(metadata):
+        if isinstance(value, str):
+            metas.append({"name": key, "value": value})
+        else:
+            metas.extend({"name": key, "value": v} for v in value)
+    return {"metas": metas}
+
+class _ListHolder(object):
+    """A struct whose only non-null pointer is a spooled composite list."""
+    def __init__(self, layout, field, items):
+        self.__layout = layout
+        self.__index = layout.fields[field].offset
+        self.__items = items
+
+    @property
+    def words(self):
+        return self.__layout.words + self.__items.words
+
+    def pointer(self, offset):
+        return struct.pack("<iHH", offset << 2, self.__layout.data_words, self.__layout.pointer_count)
+
+    def write(self, ostream):
+        layout = self.__layout
+        body = bytearray(layout.words * 8)
+        position = layout.data_words + self.__index
+        body[position * 8:position * 8 + 8] = self.__items.pointer(layout.pointer_count - self.__index - 1)
+        ostream.write(bytes(body))
+        self.__items.write(ostream)
+
+class RRGraphBinaryWriter(object):
+    """Writes VPR's routing resource graph in the Cap'n Proto binary format (``.bin`` rr_graph files).
+
+    Channels, switches, segments and block types are kept in memory. Grid locations, nodes and edges are encoded as
+    soon as they are added and spooled to temporary files, so memory use does not grow with the size of the graph.
+    The message is written out when the context exits without an exception.
+
+    Values are given in the same spelling used in the XML format, e.g. "CHANX", "INC_DIR", "LEFT" or "pass_gate".
+
+    Args:
+        ostream: a binary file-like object
+        tmpdir (:obj:`str`): directory for the temporary files
+        tool_name (:obj:`str`): value of the ``tool_name`` attribute
+        tool_version (:obj:`str`): value of the ``tool_version`` attribute
+        tool_comment (:obj:`str`): value of the ``tool_comment`` attribute
+    """
+    def __init__(self, ostream, tmpdir = None, tool_name = "vprgen", tool_version = None, tool_comment = None):
+        schema = _load_schema()
+        self.__ostream = ostream
+        self.__encoder = CapnpEncoder(schema)
+        self.__root = {
+                "toolName": tool_name,
+                "toolVersion": tool_version,
+                "toolComment": tool_comment,
+                }
+        self.__switches = []
+        self.__segments = []
+        self.__block_types = []
+        self.__grid = SpooledStructList(self.__encoder, schema.structs["GridLoc"], tmpdir)
+        self.__nodes = SpooledStructList(self.__encoder, schema.structs["Node"], tmpdir)
+        self.__edges = SpooledStructList(self.__encoder, schema.structs["Edge"], tmpdir)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        try:
+            if exc_type is None:
+                self.write()
+        finally:
+            self.close()
+        return False
+
+    def set_channels(self, channel, x_lists, y_lists):
+        """Set the <channels> section.
+
+        Args:
+            channel (:obj:`dict`): attributes of the <channel> tag
+            x_lists (:obj:`Sequence` [:obj:`tuple` [:obj:`int`, :obj:`int` ]]): index and info of each <x_list> tag
+            y_lists (:obj:`Sequence` [:obj:`tuple` [:obj:`int`, :obj:`int` ]]): index and info of each <y_list> tag
+        """
+        self.__root["channels"] = {
+                "channel": {
+                    "chanWidthMax": channel["chan_width_max"],
+                    "xMax": channel["x_max"],
+                    "xMin": channel["x_min"],
+                    "yMax": channel["y_max"],
+                    "yMin": channel["y_min"], },
+                "xLists": [{"index": index, "info": info} for index, info in x_lists],
+                "yLists": [{"index": index, "info": info} for index, info in y_lists],
+                }
+
+    def add_segment(self, id_, name, R_per_meter, C_per_meter):
+        """Add a <segment> tag."""
+        self.__segments.append({
+            "id": id_,
+            "name": name,
+            "timing": {"rPerMeter": R_per_meter, "cPerMeter": C_per_meter}, })
+
+    def add_switch(self, id_, name, type_, R, Cin, Cout, Tdel):
+        """Add a <switch> tag."""
+        self.__switches.append({
+            "id": id_,
+            "name": name,
+            "type": _switch_types[type_],
+            "timing": {"r": R, "cin": Cin, "cout": Cout, "tdel": Tdel},
+            "sizing": {"bufSize": 0, "muxTransSize": 0}, })
+
+    def add_block_type(self, id_, name, width, height, pin_classes):
+        """Add a <block_type> tag.
+
+        Args:
+            pin_classes (:obj:`Iterable` [:obj:`tuple` [:obj:`str`, :obj:`Iterable` [:obj:`tuple` [:obj:`int`,
+                :obj:`str` ]]]]): type of each <pin_class> tag, and the ptc and name of each <pin> tag under it
+        """
+        self.__block_types.append({
+            "id": id_,
+            "name": name,
+            "width": width,
+            "height": height,
+            "pinClasses": [{
+                "type": _pin_types[type_],
+                "pins": [{"ptc": ptc, "value": value} for ptc, value in pins],
+                } for type_, pins in pin_classes], })
+
+    def add_grid_loc(self, x, y, block_type_id, width_offset, height_offset):
+        """Add a <grid_loc> tag."""
+        self.__grid.append({
+            "x": x,
+            "y": y,
+            "blockTypeId": block_type_id,
+            "widthOffset": width_offset,
+            "heightOffset": height_offset, })
+
+    def add_node(self, id_, type_, capacity, xlow, ylow, xhigh, yhigh, ptc, side = None, direction = None,
+            R = 0, C = 0, segment_id = None, metadata = None):
+        """Add a <node> tag."""
+        self.__nodes.append({
+            "id": id_,
+            "type": _node_types[type_],
+            "capacity": capacity,
+            "direction": _node_directions[direction] if direction else None,
+            "loc": {
+                "xlow": xlow,
+                "ylow": ylow,
+                "xhigh": xhigh,
+                "yhigh": yhigh,
+                "ptc": ptc,
+                "side": _loc_sides[side] if side else None, },
+            "timing": {"r": R, "c": C},
+            "segment": {"segmentId": segment_id} if segment_id is not None else None,
+            "metadata": _metadata(metadata), })
+
+    def add_edge(self, src_node, sink_node, switch_id, metadata = None):
+        """Add an <edge> tag."""
+        self.__edges.append({
+            "srcNode": src_node,
+            "sinkNode": sink_node,
+            "switchId": switch_id,
+            "metadata": _metadata(metadata), })
+
+    def write(self):
+        """Write the message out."""
+        schema, encoder = self.__encoder.schema, self.__encoder
+        root = dict(self.__root)
+        root["switches"] = {"switches": self.__switches}
+        root["segments"] = {"segments": self.__segments}
+        root["blockTypes"] = {"blockTypes": self.__block_types}
+        layout = schema.structs["RrGraph"]
+        body, children = encoder.encode_struct_body(layout, root)
+        for field, struct_name, list_field, items in (
+                ("grid", "GridLocs", "gridLocs", self.__grid),
+                ("rrNodes", "RrNodes", "nodes", self.__nodes),
+                ("rrEdges", "RrEdges", "edges", self.__edges), ):
+            children.append((layout.fields[field].offset, _ListHolder(schema.structs[struct_name], list_field, items)))
+        write_message(self.__ostream, layout, body, children)
+
+    def close(self):
+        """Release the temporary files."""
+        self.__grid.close()
+        self.__nodes.close()
+        self.__edges.close()
@@ -0,0 +1,211 @@
+from future.builtins import object
+
+from contextlib import contextmanager
+from collections import deque
+from multiprocessing import cpu_count
+import zlib
+
+# ----------------------------------------------------------------------------
+# -- Large-block Buffered Output Stream --------------------------------------
+# ----------------------------------------------------------------------------
+class BufferedOutputStream(object):
+    """A write-only file-like object that collects bytes in a reusable buffer and flushes them to the underlying
+    stream in large blocks.
+
+    Args:
+        f (file-like object): the underlying output stream
+        flush_size (:obj:`int`): number of bytes collected before the buffer is flushed to ``f``
+
+    Attributes:
+        bytes_written (:obj:`int`): number of bytes written into this stream
+        bytes_flushed (:obj:`int`): number of bytes flushed to the underlying stream
+        flush_count (:obj:`int`): number of ``write`` calls issued to the underlying stream
+    """
+    DEFAULT_FLUSH_SIZE = 16 * 1024 * 1024
+
+    def __init__(self, f, flush_size = DEFAULT_FLUSH_SIZE):
+        if flush_size <= 0:
+            raise ValueError("Flush size must be positive")
+        self.__f = f
+        self.__size = flush_size
+        self.__buffer = bytearray(flush_size)
+        self.__view = memoryview(self.__buffer)
+        self.__pos = 0
+        self.bytes_written = 0
+        self.bytes_flushed = 0
+        self.flush_count = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.flush()
+        return False
+
+    @property
+    def flush_size(self):
+        return self.__size
+
+    def __flush_buffer(self):
+        if self.__pos:
+            self.__write_through(self.__view[:self.__pos])
+            self.__pos = 0
+
+    def __write_through(self, data):
+        self.__f.write(data)
+        self.bytes_flushed += len(data)
+        self.flush_count += 1
+
+    def write(self, data):
+        n = len(data)
+        pos = self.__pos
+        if pos + n > self.__size:
+            self.__flush_buffer()
+            pos = 0
+            if n >= self.__size:
+                self.__write_through(data)
+                self.bytes_written += n
+                return n
+        self.__view[pos:pos + n] = data
+        self.__pos = pos + n
+        self.bytes_written += n
+        return n
+
+    def flush(self):
+        """Flush buffered bytes to the underlying stream, then flush the underlying stream."""
+        self.__flush_buffer()
+        flush = getattr(self.__f, "flush", None)
+        if flush is not None:
+            flush()
+
+# ----------------------------------------------------------------------------
+# -- Parallel Compressed Output Stream ---------------------------------------
+# ----------------------------------------------------------------------------
+def _gzip_compressor(level):
+    level = 6 if level is None else level
+    def compress(block):
+        # wbits = 31: emit a complete gzip member with header and trailer
+        compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+        return compressor.compress(block) + compressor.flush()
+    return compress
+
+def _xz_compressor(level):
+    import lzma
+    level = 6 if level is None else level
+    def compress(block):
+        return lzma.compress(block, format = lzma.FORMAT_XZ, preset = level)
+    return compress
+
+_compressors = {
+        "gzip": _gzip_compressor,
+        "xz": _xz_compressor,
+        }
+
+class ParallelCompressedStream(object):
+    """A write-only file-like object that cuts the written bytes into fixed-size blocks and compresses them
+    independently on a thread pool.
+
+    Each block is compressed into a self-contained gzip member or xz stream, and the compressed blocks are written to
+    the underlying stream in order. Concatenated gzip members and xz streams are valid files which any reader can
+    decompress. At most two blocks per worker are in flight, so memory use is bounded regardless of output size.
+
+    Args:
+        f (file-like object): the underlying output stream
+        compression (:obj:`str`): "gzip" or "xz"
+        block_size (:obj:`int`): number of uncompressed bytes per block
+        max_workers (:obj:`int`): number of compression threads. Defaults to the number of CPUs
+        level (:obj:`int`): compression level (gzip) or preset (xz)
+
+    Attributes:
+        bytes_written (:obj:`int`): number of uncompressed bytes written into this stream
+        bytes_compressed (:obj:`int`): number of compressed bytes written to the underlying stream
+    """
+    DEFAULT_BLOCK_SIZE = 4 * 1024 * 1024
+
+    def __init__(self, f, compression = "gzip", block_size = DEFAULT_BLOCK_SIZE, max_workers = None, level = None):
+        from concurrent.futures import ThreadPoolExecutor
+        try:
+            self.__compress = _compressors[compression](level)
+        except KeyError:
+            raise ValueError("Unknown compression: {}".format(compression))
+        if block_size <= 0:
+            raise ValueError("Block size must be positive")
+        max_workers = max_workers or cpu_count() or 1
+        self.__f = f
+        self.__block_size = block_size
+        self.__executor = ThreadPoolExecutor(max_workers)
+        self.__max_pending = 2 * max_workers
+        self.__pending = deque()
+        self.__buffer = bytearray()
+        self.__closed = False
+        self.bytes_written = 0
+        self.bytes_compressed = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+    def __collect(self):
+        compressed = self.__pending.popleft().result()
+        self.__f.write(compressed)
+        self.bytes_compressed += len(compressed)
+
+    def __submit(self, block):
+        while len(self.__pending) >= self.__max_pending:
+            self.__collect()
+        self.__pending.append(self.__executor.submit(self.__compress, block))
+
+    def write(self, data):
+        if self.__closed:
+            raise ValueError("I/O operation on closed stream")
+        buf, size = self.__buffer, self.__block_size
+        buf.extend(data)
+        self.bytes_written += len(data)
+        if len(buf) >= size:
+            offset = 0
+            while len(buf) - offset >= size:
+                self.__submit(bytes(buf[offset:offset + size]))
+                offset += size
+            del buf[:offset]
+        return len(data)
+
+    def flush(self):
+        """Compress the partially filled block, wait for all pending blocks and flush the underlying stream."""
+        if self.__buffer:
+            self.__submit(bytes(self.__buffer))
+            del self.__buffer[:]
+        while self.__pending:
+            self.__collect()
+        flush = getattr(self.__f, "flush", None)
+        if flush is not None:
+            flush()
+
+    def close(self):
+        """Flush everything and shut down the thread pool. The underlying stream is not closed."""
+        if self.__closed:
+            return
+        try:
+            self.flush()
+        finally:
+            self.__closed = True
+            self.__executor.shutdown()
+
+@contextmanager
+def wrap_output(ostream, buffer_size = None, compression = None):
+    """Wrap ``ostream`` with a `ParallelCompressedStream` if ``compression`` is given, then with a
+    `BufferedOutputStream` if ``buffer_size`` is given.
+
+    Everything is flushed when the context exits.
+    """
+    if compression:
+        with ParallelCompressedStream(ostream, compression) as compressed, \
+                wrap_output(compressed, buffer_size) as wrapped:
+            yield wrapped
+    elif buffer_size:
+        with BufferedOutputStream(ostream, buffer_size) as buffered:
+            yield buffered
+    else:
+        yield ostream
@@ -8,6 +8,32 @@ try:
 except ImportError:
     from collections import Mapping
 
+import re
+
+_empty_iterable = tuple()
+
+def _element_template(tag, keys, children, depth, pretty):
+    """Build a ``str.format`` template of an element with a fixed set of attributes and a fixed set of text-less leaf
+    children, written at ``depth``. A child with None attribute names is a slot for a pre-formatted fragment."""
+    def indentation(depth):
+        return '\t' * depth if pretty and depth > 0 else ''
+    def newline(depth):
+        return '\n' if pretty and depth > 0 else ''
+    def start(tag, keys, depth):
+        return indentation(depth) + '<' + tag + ''.join(' {}="{{}}"'.format(k) for k in keys) + '>'
+    if not children:
+        return start(tag, keys, depth) + '</' + tag + '>' + newline(depth)
+    return (start(tag, keys, depth) + newline(depth + 1) +
+            ''.join((indentation(depth + 1) + '{}' if child_keys is None else
+                start(child_tag, child_keys, depth + 1) + '</' + child_tag + '>') + newline(depth + 1)
+                for child_tag, child_keys in children) +
+            indentation(depth) + '</' + tag + '>' + newline(depth))
+
+def leaf_template(tag, keys):
+    """Build a ``str.format`` template of a text-less leaf element without indentation, e.g. to pre-format a fragment
+    filling a slot in the template from `element_template`."""
+    return _element_template(tag, keys, _empty_iterable, 0, False)
+
 # ----------------------------------------------------------------------------
 # -- Stream-based XML Generator ----------------------------------------------
 # ----------------------------------------------------------------------------
@@ -38,7 +64,7 @@ class XMLGenerator(object):
         if self.__skip_stringify:
             return d
         else:
-            return {k: '{:g}'.format(v) if isinstance(v, float) else str(v) for k, v in iteritems(d)} 
+            return {k: '{:g}'.format(v) if isinstance(v, float) else str(v) for k, v in iteritems(d)}
 
     def _indent(self):
         if self.__pretty and self._depth > 0:
@@ -73,9 +99,234 @@ class XMLGenerator(object):
     def element(self, tag, attrs = None):
         return self.__XMLElementContextManager(self, tag, self._stringify(attrs or {}))
 
+    def flush(self):
+        """Write everything generated so far out to the output stream."""
+        self._xf.flush()
+
+    def write_raw(self, data):
+        """Write ``data``, a pre-serialized fragment, out to the output stream as is."""
+        self._xf.flush()
+        self.__f.write(data)
+
     def element_leaf(self, tag, attrs = None, text = None):
         self._indent()
         with self._xf.element(tag, self._stringify(attrs or {})):
             if text:
                 self._xf.write(text)
         self._newline()
+
+    def element_template(self, tag, keys, children = _empty_iterable):
+        """Get a ``str.format`` template of an element with a fixed set of attributes and a fixed set of text-less leaf
+        children at the current depth. Elements formatted with the template and written with `write_raw` are
+        identical to those generated with `element` and `element_leaf`.
+
+        Args:
+            tag (:obj:`str`): tag of the element
+            keys (:obj:`tuple` [:obj:`str` ]): attribute names of the element, in order
+            children (:obj:`tuple` [:obj:`tuple` [:obj:`str`, :obj:`tuple` [:obj:`str` ]]]): tag and attribute names of
+                each child, in order. If the attribute names are None, the child is left as a slot for a fragment
+                pre-formatted with `leaf_template`
+        """
+        return _element_template(tag, keys, children, self._depth, self.__pretty)
+
+    def compile_element(self, tag, keys, children = _empty_iterable):
+        """Precompile an element with a fixed set of attributes and a fixed set of text-less leaf children.
+
+        Args:
+            tag (:obj:`str`): tag of the element
+            keys (:obj:`tuple` [:obj:`str` ]): attribute names of the element, in order
+            children (:obj:`tuple` [:obj:`tuple` [:obj:`str`, :obj:`tuple` [:obj:`str` ]]]): tag and attribute names of
+                each child, in order
+
+        Returns:
+            A function which takes the attribute values of the element followed by those of each child, flattened,
+            converts them with ``str`` and writes the element out. The values must not need XML escaping.
+        """
+        nkeys = len(keys)
+        def emit(*values):
+            values = [str(v) for v in values]
+            attrs = dict(zip(keys, values[:nkeys]))
+            if not children:
+                self.element_leaf(tag, attrs)
+                return
+            with self.element(tag, attrs):
+                pos = nkeys
+                for child_tag, child_keys in children:
+                    self.element_leaf(child_tag, dict(zip(child_keys, values[pos:pos + len(child_keys)])))
+                    pos += len(child_keys)
+        return emit
+
+# ----------------------------------------------------------------------------
+# -- Template-based XML Generator --------------------------------------------
+# ----------------------------------------------------------------------------
+_attr_special = re.compile('[&<>"\n\r\t]')
+_text_special = re.compile('[&<>\r]')
+
+def _escape_attr(s):
+    """Escape an attribute value the same way libxml2 does."""
+    if _attr_special.search(s) is None:
+        return s
+    return (s.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;').replace('"', '&quot;')
+            .replace('\n', '&#10;').replace('\r', '&#13;').replace('\t', '&#9;'))
+
+def _escape_text(s):
+    """Escape a text node the same way libxml2 does."""
+    if _text_special.search(s) is None:
+        return s
+    return s.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;').replace('\r', '&#13;')
+
+class TemplateXMLGenerator(object):
+    """A XML Generator which writes raw bytes rendered from precompiled per-tag templates.
+
+    The output is byte-identical to `XMLGenerator`, but each tag costs one string formatting and one ``write`` call
+    instead of a trip through lxml.
+
+    Args:
+        f (file-like object): the output stream
+        pretty (:obj:`bool`): if the output XML should be nicely broken into multiple lines and indented
+        skip_stringify (:obj:`bool`): assumes the dict passed into `element` and `element_leaf` are already converted
+            to string objects
+    """
+    def __init__(self, f, pretty = False, skip_stringify = False):
+        self.__f = f
+        self.__pretty = pretty
+        self.__skip_stringify = skip_stringify
+        self.__starts = {}
+        self.__ends = {}
+
+    def __enter__(self):
+        self._write = self.__f.write
+        self._depth = 0
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+    def _stringify(self, d):
+        if self.__skip_stringify:
+            return d
+        else:
+            return {k: '{:g}'.format(v) if isinstance(v, float) else str(v) for k, v in iteritems(d)}
+
+    def _indentation(self):
+        return '\t' * self._depth if self.__pretty and self._depth > 0 else ''
+
+    def _newline(self):
+        return '\n' if self.__pretty and self._depth > 0 else ''
+
+    def _start_template(self, tag, keys):
+        """Get the precompiled start tag template for ``tag`` with attributes ``keys`` at the current depth."""
+        key = (tag, keys, self._depth)
+        try:
+            return self.__starts[key]
+        except KeyError:
+            template = self.__starts[key] = (self._indentation() + '<' + tag +
+                    ''.join(' {}="{{}}"'.format(k) for k in keys) + '>')
+            return template
+
+    def _end_template(self, tag, leaf = False):
+        """Get the precompiled end tag template for ``tag`` at the current depth."""
+        key = (tag, leaf, self._depth)
+        try:
+            return self.__ends[key]
+        except KeyError:
+            template = self.__ends[key] = (('' if leaf else self._indentation()) + '</' + tag + '>' +
+                    self._newline())
+            return template
+
+    def _start(self, tag, attrs):
+        attrs = self._stringify(attrs or {})
+        keys = tuple(attrs)
+        return self._start_template(tag, keys).format(*(_escape_attr(attrs[k]) for k in keys))
+
+    class __XMLElementContextManager(object):
+        """Context manager for an XML element."""
+        def __init__(self, generator, tag, attrs):
+            self.__gen = generator
+            self.__tag = tag
+            self.__attrs = attrs
+
+        def __enter__(self):
+            start = self.__gen._start(self.__tag, self.__attrs)
+            self.__gen._depth += 1
+            self.__gen._write((start + self.__gen._newline()).encode('ascii', 'xmlcharrefreplace'))
+
+        def __exit__(self, exc_type, exc_value, traceback):
+            self.__gen._depth -= 1
+            self.__gen._write(self.__gen._end_template(self.__tag).encode('ascii'))
+            return False
+
+    def element(self, tag, attrs = None):
+        return self.__XMLElementContextManager(self, tag, attrs)
+
+    def flush(self):
+        """Write everything generated so far out to the output stream. Nothing is buffered by this generator."""
+        pass
+
+    def write_raw(self, data):
+        """Write ``data``, a pre-serialized fragment, out to the output stream as is."""
+        self._write(data)
+
+    def element_leaf(self, tag, attrs = None, text = None):
+        start = self._start(tag, attrs)
+        if text:
+            start += _escape_text(text)
+        self._write((start + self._end_template(tag, True)).encode('ascii', 'xmlcharrefreplace'))
+
+    def element_template(self, tag, keys, children = _empty_iterable):
+        """Get a ``str.format`` template of an element with a fixed set of attributes and a fixed set of text-less leaf
+        children at the current depth. Elements formatted with the template and written with `write_raw` are
+        identical to those generated with `element` and `element_leaf`.
+
+        Args:
+            tag (:obj:`str`): tag of the element
+            keys (:obj:`tuple` [:obj:`str` ]): attribute names of the element, in order
+            children (:obj:`tuple` [:obj:`tuple` [:obj:`str`, :obj:`tuple` [:obj:`str` ]]]): tag and attribute names of
+                each child, in order. If the attribute names are None, the child is left as a slot for a fragment
+                pre-formatted with `leaf_template`
+        """
+        return _element_template(tag, keys, children, self._depth, self.__pretty)
+
+    def compile_element(self, tag, keys, children = _empty_iterable):
+        """Precompile an element with a fixed set of attributes and a fixed set of text-less leaf children.
+
+        The whole element, including indentation at the current depth, is compiled into a single template.
+
+        Args:
+            tag (:obj:`str`): tag of the element
+            keys (:obj:`tuple` [:obj:`str` ]): attribute names of the element, in order
+            children (:obj:`tuple` [:obj:`tuple` [:obj:`str`, :obj:`tuple` [:obj:`str` ]]]): tag and attribute names of
+                each child, in order
+
+        Returns:
+            A function which takes the attribute values of the element followed by those of each child, flattened,
+            formats them with ``str.format`` and writes the element out. The values must not need XML escaping.
+        """
+        fmt, write = self.element_template(tag, keys, children).format, self._write
+        def emit(*values):
+            write(fmt(*values).encode('ascii'))
+        return emit
+
+# ----------------------------------------------------------------------------
+# -- Backend Selection -------------------------------------------------------
+# ----------------------------------------------------------------------------
+_backends = {
+        "lxml": XMLGenerator,
+        "template": TemplateXMLGenerator,
+        }
+
+def make_xml_generator(f, pretty = False, skip_stringify = False, backend = "lxml"):
+    """Create an XML generator using the specified ``backend``.
+
+    Args:
+        f (file-like object): the output stream
+        pretty (:obj:`bool`): if the output XML should be nicely broken into multiple lines and indented
+        skip_stringify (:obj:`bool`): assumes the dict passed into `element` and `element_leaf` are already converted
+            to string objects
+        backend (:obj:`str`): "lxml" or "template"
+    """
+    try:
+        cls = _backends[backend]
+    except KeyError:
+        raise ValueError("Unknown XML generator backend: {}".format(backend))
+    return cls(f, pretty, skip_stringify)
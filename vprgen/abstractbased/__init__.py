@@ -1,2 +1,8 @@
 from vprgen.abstractbased._abstract import *
 from vprgen.abstractbased._delegate import ArchitectureDelegate
+from vprgen.abstractbased._check import RRGraphChecker
+from vprgen.abstractbased._grid import TileGrid, GridPattern
+from vprgen.abstractbased._pins import BlockPin, BlockPinClass, BlockPinTable
+from vprgen.abstractbased._pinnodes import PinNodeGenerator
+from vprgen.abstractbased._channodes import ChannelTracks, ChannelNodeGenerator
+from vprgen.abstractbased._sbedges import SwitchBlockEdgeGenerator
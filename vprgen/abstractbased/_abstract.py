@@ -778,6 +778,11 @@ class AbstractSbLoc(with_metaclass(ABCMeta, object)):
     # Python 2 and 3 compatible type checking
     switch_override.fget.__annotations__ = {"return": Optional[str]}
 
+class SwitchBlockType(Enum):
+    wilton = 0
+    subset = 1
+    universal = 2
+
 class SwitchblockLocationsPattern(Enum):
     external_full_internal_straight = 0
     all_ = 1
@@ -0,0 +1,223 @@
+from future.builtins import object, range
+
+from vprgen.abstractbased._abstract import NodeType, SegmentDirection
+from vprgen.abstractbased._columnar import _require_numpy
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from typing import Optional, Mapping, Iterator
+from fractions import Fraction
+
+_batch_size = 65536
+
+def _allocate_tracks(segments, width):
+    """Get the number of tracks of each segment in a unidirectional channel of ``width`` tracks.
+
+    Tracks are handed out in pairs, one per direction, and in groups of one pair per staggered start of the segment,
+    to the segment with the largest remaining demand, as VPR does for unidirectional segments.
+    """
+    if width % 2:
+        raise ValueError("Unidirectional channels need an even channel width, not {}".format(width))
+    segments = list(segments)
+    result = [0] * len(segments)
+    if not segments:
+        if width:
+            raise ValueError("No segments to lay out {} tracks with".format(width))
+        return result
+    freqs = [Fraction(segment.freq) for segment in segments]
+    total = sum(freqs)
+    if total <= 0:
+        raise ValueError("Segments must have a positive total frequency")
+    pairs = width // 2
+    demand = [pairs * freq / (total * segment.length) for freq, segment in zip(freqs, segments)]
+    i = 0
+    while pairs > 0:
+        i = max(range(len(segments)), key = lambda j: (demand[j], -j))
+        demand[i] -= 1
+        result[i] += segments[i].length
+        pairs -= segments[i].length
+    if pairs < 0:
+        result[i] += pairs
+    return [2 * count for count in result]
+
+# ----------------------------------------------------------------------------
+# -- Channel Tracks ----------------------------------------------------------
+# ----------------------------------------------------------------------------
+class ChannelTracks(object):
+    """Track layout of all channels along one axis, and the wires on each track.
+
+    Channels are numbered by their coordinate across the axis, and positions along a channel go from 1 to ``span``,
+    following VPR's coordinates: CHANX channel ``y`` covers x from 1 to ``width - 2`` for y from 0 to
+    ``height - 2``, and CHANY channel ``x`` covers y from 1 to ``height - 2`` for x from 0 to ``width - 2``.
+
+    Tracks are allocated to segments by `_allocate_tracks`, in the order of the segments. Within the tracks of a
+    segment of length L, even tracks are INC_DIR and odd tracks DEC_DIR, and track j starts its wires at an offset of
+    ``(j // 2) % L + 1``. As in VPR, the offset also shifts by one position per channel, and wires are clipped at the
+    ends of the channel. All wire boundaries are computed arithmetically, without storing individual wires.
+
+    Attributes:
+        type_ (`NodeType`): CHANX or CHANY
+        num_channels (:obj:`int`): number of channels
+        span (:obj:`int`): number of positions along each channel
+        segments (:obj:`list` [`AbstractSegment` ]): the segments
+        segment_index, segment_ids, lengths, starts, directions: NumPy arrays indexed by track: index into
+            ``segments``, segment id, length of the segment, start offset, and `SegmentDirection` value
+        first_ids: NumPy array of the id of the first wire of each track of each channel, indexed by
+            ``[channel, track]``. Wires of a track have consecutive ids
+        num_nodes (:obj:`int`): total number of wires
+    """
+    def __init__(self, type_, segments, width, num_channels, span, first_id = 0):
+        self.type_ = type_
+        self.num_channels = num_channels = max(num_channels, 0)
+        self.span = span = max(span, 0)
+        self.segments = segments = list(segments)
+        index, offsets = [], []
+        for i, count in enumerate(_allocate_tracks(segments, width)):
+            index.extend([i] * count)
+            offsets.extend(range(count))
+        self.segment_index = np.array(index, dtype = np.int64)
+        offsets = np.array(offsets, dtype = np.int64)
+        self.segment_ids = np.array([segments[i].id_ for i in index], dtype = np.int64)
+        self.lengths = np.array([segments[i].length for i in index], dtype = np.int64)
+        self.starts = (offsets // 2) % np.maximum(self.lengths, 1) + 1
+        self.directions = np.where(offsets % 2 == 0, SegmentDirection.INC_DIR.value, SegmentDirection.DEC_DIR.value)
+        counts = self.__wire_counts(np.arange(num_channels)[:, None], np.arange(len(index))[None, :]).ravel()
+        self.first_ids = first_id + (np.cumsum(counts) - counts).reshape(num_channels, len(index))
+        self.num_nodes = int(counts.sum())
+
+    @property
+    def width(self):
+        """Number of tracks in each channel."""
+        return len(self.segment_index)
+
+    def __aligned(self, chans, tracks):
+        """First position after 1 where a wire of each track starts, between 1 and the length of the segment, and
+        the length of the segment."""
+        lengths = self.lengths[tracks]
+        return (self.starts[tracks] - chans - 1) % lengths + 1, lengths
+
+    def __wire_counts(self, chans, tracks):
+        aligned, lengths = self.__aligned(chans, tracks)
+        return (aligned > 1) + np.where(aligned <= self.span, (self.span - aligned) // lengths + 1, 0)
+
+    def wire_bounds(self, chans, tracks, index):
+        """Get the first and the last position of the ``index``-th wire of each of the given tracks.
+
+        Arguments are NumPy arrays, or anything broadcastable with them.
+        """
+        aligned, lengths = self.__aligned(chans, tracks)
+        shift = (aligned > 1).astype(np.int64)
+        starts = np.where(index < shift, 1, aligned + (index - shift) * lengths)
+        ends = np.minimum(aligned + (index + 1 - shift) * lengths - 1, self.span)
+        return starts, ends
+
+    def wire_offsets(self, chans, tracks, positions):
+        """Get the offset of ``positions`` in the wires covering them on the given tracks, counted from the low end of
+        the wire as if it was not clipped at the ends of the channel.
+
+        Arguments are NumPy arrays, or anything broadcastable with them.
+        """
+        aligned, lengths = self.__aligned(chans, tracks)
+        return (positions - aligned) % lengths
+
+    def locate(self, chans, tracks, positions):
+        """Get the id, first position and last position of the wires covering ``positions`` on the given tracks.
+
+        Arguments are NumPy arrays, or anything broadcastable with them. Positions must be between 1 and ``span``.
+
+        Returns:
+            (ids, starts, ends): NumPy arrays
+        """
+        chans, tracks, positions = np.broadcast_arrays(*(np.asarray(a, dtype = np.int64)
+            for a in (chans, tracks, positions)))
+        aligned, lengths = self.__aligned(chans, tracks)
+        index = (positions - aligned + lengths) // lengths - (aligned == 1)
+        starts, ends = self.wire_bounds(chans, tracks, index)
+        return self.first_ids[chans, tracks] + index, starts, ends
+    # Python 2 and 3 compatible type checking
+    locate.__annotations__ = {"return": tuple}
+
+    def iter_batches(self, batch_size = None, timing = False):
+        """Iterate the wires as columnar nodes in batches of about ``batch_size`` nodes, in the order of their ids.
+
+        Columns are "id", "type", "xlow", "ylow", "xhigh", "yhigh", "ptc", "direction" and "segment_id", plus "R"
+        and "C" from ``Rmetal`` and ``Cmetal`` of the segment times the length of the wire if ``timing`` is set.
+        """
+        batch_size = batch_size or _batch_size
+        width = self.width
+        if not self.num_nodes:
+            return
+        per_channel = max(1, self.num_nodes // self.num_channels)
+        step = max(1, batch_size // per_channel)
+        rmetal = np.array([s.Rmetal for s in self.segments], dtype = np.float64)[self.segment_index]
+        cmetal = np.array([s.Cmetal for s in self.segments], dtype = np.float64)[self.segment_index]
+        for c0 in range(0, self.num_channels, step):
+            chans = np.arange(c0, min(c0 + step, self.num_channels))
+            counts = self.__wire_counts(chans[:, None], np.arange(width)[None, :]).ravel()
+            total = int(counts.sum())
+            if not total:
+                continue
+            owner = np.repeat(np.arange(len(counts)), counts)
+            index = np.arange(total) - np.repeat(np.cumsum(counts) - counts, counts)
+            chan, track = chans[owner // width], owner % width
+            low, high = self.wire_bounds(chan, track, index)
+            batch = {
+                    "id": np.arange(total, dtype = np.int64) + self.first_ids[c0, 0],
+                    "type": np.full(total, self.type_.value),
+                    "ptc": track,
+                    "direction": self.directions[track],
+                    "segment_id": self.segment_ids[track], }
+            if self.type_ is NodeType.CHANX:
+                batch.update(xlow = low, xhigh = high, ylow = chan, yhigh = chan)
+            else:
+                batch.update(xlow = chan, xhigh = chan, ylow = low, yhigh = high)
+            if timing:
+                wire_lengths = high - low + 1
+                batch.update(R = rmetal[track] * wire_lengths, C = cmetal[track] * wire_lengths)
+            yield batch
+    # Python 2 and 3 compatible type checking
+    iter_batches.__annotations__ = {"batch_size": Optional[int], "timing": bool, "return": Iterator[Mapping]}
+
+# ----------------------------------------------------------------------------
+# -- Channel Node Generator --------------------------------------------------
+# ----------------------------------------------------------------------------
+class ChannelNodeGenerator(object):
+    """Generates the CHANX and CHANY nodes of all channels from the segments of an `ArchitectureDelegate`, in the
+    columnar form of `ArchitectureDelegate.node_columns`.
+
+    CHANX tracks are laid out over ``x_channel_width`` and CHANY tracks over ``y_channel_width``, see
+    `ChannelTracks`. Node ids are consecutive, CHANX nodes first, then by channel, track and position.
+
+    Args:
+        delegate (`ArchitectureDelegate`):
+        first_id (:obj:`int`): id of the first node
+        timing (:obj:`bool`): if the nodes get R and C from ``Rmetal`` and ``Cmetal`` of their segment
+    """
+    def __init__(self, delegate, first_id = 0, timing = False):
+        _require_numpy()
+        width, height, segments = delegate.width, delegate.height, list(delegate.segments)
+        self.chanx = ChannelTracks(NodeType.CHANX, segments, delegate.x_channel_width, height - 1, width - 2,
+                first_id)
+        self.chany = ChannelTracks(NodeType.CHANY, segments, delegate.y_channel_width, width - 1, height - 2,
+                first_id + self.chanx.num_nodes)
+        self.first_id = first_id
+        self.num_nodes = self.chanx.num_nodes + self.chany.num_nodes
+        self.timing = timing
+
+    def iter_batches(self, batch_size = None):
+        """Iterate the nodes in batches of about ``batch_size`` nodes. See `ChannelTracks.iter_batches`."""
+        for tracks in (self.chanx, self.chany):
+            for batch in tracks.iter_batches(batch_size, self.timing):
+                yield batch
+    # Python 2 and 3 compatible type checking
+    iter_batches.__annotations__ = {"batch_size": Optional[int], "return": Iterator[Mapping]}
+
+    def get_node_id(self, type_, x, y, ptc):
+        """Get the id of the CHANX or CHANY node on track ``ptc`` covering (x, y)."""
+        tracks, chan, position = (self.chanx, y, x) if type_ is NodeType.CHANX else (self.chany, x, y)
+        return int(tracks.locate(chan, ptc, position)[0])
+    # Python 2 and 3 compatible type checking
+    get_node_id.__annotations__ = {"type_": NodeType, "x": int, "y": int, "ptc": int, "return": int}
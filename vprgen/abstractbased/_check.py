@@ -0,0 +1,316 @@
+from future.builtins import object, range, map, zip
+
+from vprgen.abstractbased._abstract import NodeType
+from vprgen.abstractbased._columnar import iter_column_batches, iter_edge_batches
+
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+_chan_node_types = frozenset((NodeType.CHANX, NodeType.CHANY))
+_output_node_types = frozenset((NodeType.OPIN, NodeType.SOURCE))
+_class_node_types = frozenset((NodeType.SOURCE, NodeType.SINK))
+_missing_examples = 10
+
+# ----------------------------------------------------------------------------
+# -- Routing Resource Graph Checker ------------------------------------------
+# ----------------------------------------------------------------------------
+class RRGraphChecker(object):
+    """Streaming consistency checker for the routing resource graph of an `ArchitectureDelegate`.
+
+    The checker looks at nodes and edges as they are generated, e.g. by passing it to
+    `ArchitectureDelegate.gen_rrg_xml`, or standalone with `run`. Seen node ids are kept in a bitmap, and switch ids,
+    segment ids, the pins of each block and the block at each grid location are precomputed, so memory stays bounded
+    by one bit per node plus the size of the grid. Problems are counted by kind, and only the first ``max_problems``
+    are kept with a message.
+
+    The kinds of problems are:
+
+        * "duplicate_node": a node id is negative or used more than once
+        * "missing_node": a node id below the largest one is never used
+        * "segment": a channel node refers to a segment id not in ``segments``
+        * "location": a node is outside of the grid, or a pin node is on an empty tile
+        * "ptc": a channel node's ptc is outside of the channel width, or a pin node's ptc is outside of the pin
+          range of the block, or refers to a pin of the wrong direction. SOURCE and SINK nodes are checked against
+          the pin classes of the block instead
+        * "switch": an edge refers to a switch id not in ``switches``
+        * "dangling_edge": an edge refers to a node id which was not generated
+
+    Args:
+        delegate (`ArchitectureDelegate`):
+        max_problems (:obj:`int`): maximum number of problems kept with a message
+        grid (`TileGrid`): the materialized grid. If None, it is taken from the delegate when first needed.
+            `ArchitectureDelegate.gen_rrg_xml` hands over the grid it materializes
+    """
+    def __init__(self, delegate, max_problems = 100, grid = None):
+        self.max_problems = max_problems
+        self.problems = []
+        self.counts = {}
+        self.num_nodes = 0
+        self.num_edges = 0
+        self.__width, self.__height = delegate.width, delegate.height
+        self.__channel_widths = {NodeType.CHANX: delegate.x_channel_width, NodeType.CHANY: delegate.y_channel_width}
+        self.__switches = frozenset(switch.id_ for switch in delegate.switches)
+        self.__segments = frozenset(segment.id_ for segment in delegate.segments)
+        # block type id -> bytearray with 1 for each output pin, indexed by ptc, and likewise for pin classes
+        tables = [(block.id_, delegate.get_block_pin_table(block)) for block in delegate.complex_blocks]
+        self.__pins = {block_type_id: table.outputs for block_type_id, table in tables}
+        self.__classes = {block_type_id: table.class_outputs for block_type_id, table in tables}
+        self.grid = grid
+        self.__delegate = delegate
+        self.__block_type_ids = None
+        self.__bitmap = bytearray()
+        self.__max_id = -1
+        self.__pin_arrays_ = {}
+
+    @property
+    def ok(self):
+        """If no problem has been found."""
+        return not self.counts
+
+    def report(self, kind, message):
+        """Record a problem of the given ``kind``."""
+        self.counts[kind] = self.counts.get(kind, 0) + 1
+        if len(self.problems) < self.max_problems:
+            self.problems.append((kind, message))
+
+    def summary(self):
+        """Get a human-readable summary of the problems found."""
+        lines = ["{} nodes, {} edges checked, {} problems found".format(self.num_nodes, self.num_edges,
+            sum(self.counts.values()))]
+        lines.extend("    {}: {}".format(kind, count) for kind, count in sorted(self.counts.items()))
+        lines.extend("    [{}] {}".format(kind, message) for kind, message in self.problems)
+        omitted = sum(self.counts.values()) - len(self.problems)
+        if omitted > 0:
+            lines.append("    ... {} more".format(omitted))
+        return "\n".join(lines)
+
+    def raise_if_failed(self):
+        """Raise a `ValueError` with the summary if any problem has been found."""
+        if not self.ok:
+            raise ValueError(self.summary())
+
+    # -- Nodes ---------------------------------------------------------------
+    def __get_block_type_ids(self):
+        """Get the block type id of each grid location, indexed by ``x * height + y``."""
+        if self.__block_type_ids is None:
+            if self.grid is None:
+                self.grid = self.__delegate._get_tile_grid()
+            self.__block_type_ids = self.grid.block_type_ids()
+        return self.__block_type_ids
+
+    def __grow(self, max_id):
+        if max_id > self.__max_id:
+            self.__max_id = max_id
+            size = (max_id >> 3) + 1
+            if size > len(self.__bitmap):
+                self.__bitmap.extend(bytearray(max(size, 2 * len(self.__bitmap)) - len(self.__bitmap)))
+
+    def __check_node(self, id_, type_, xlow, ylow, xhigh, yhigh, ptc, segment_id):
+        """Check one node which is not a duplicate."""
+        if not (0 <= xlow <= xhigh < self.__width and 0 <= ylow <= yhigh < self.__height):
+            self.report("location", "Node {} at ({}, {})-({}, {}) is outside of the {}x{} grid".format(
+                id_, xlow, ylow, xhigh, yhigh, self.__width, self.__height))
+        elif type_ in _chan_node_types:
+            if segment_id not in self.__segments:
+                self.report("segment", "Node {} refers to undefined segment {}".format(id_, segment_id))
+            if not 0 <= ptc < self.__channel_widths[type_]:
+                self.report("ptc", "{} node {} has ptc {} outside of the channel width {}".format(
+                    type_.name, id_, ptc, self.__channel_widths[type_]))
+        else:
+            block_type_id = self.__get_block_type_ids()[xlow * self.__height + ylow]
+            if block_type_id == 0:
+                self.report("location", "{} node {} is on the empty tile ({}, {})".format(
+                    type_.name, id_, xlow, ylow))
+                return
+            what, plural = ("pin class", "pin classes") if type_ in _class_node_types else ("pin", "pins")
+            pins = (self.__classes if type_ in _class_node_types else self.__pins).get(block_type_id)
+            if pins is None:
+                self.report("location", "{} node {} is on tile ({}, {}) of undefined block type {}".format(
+                    type_.name, id_, xlow, ylow, block_type_id))
+            elif not 0 <= ptc < len(pins):
+                self.report("ptc", "{} node {} has ptc {} outside of the {} {} of block type {}".format(
+                    type_.name, id_, ptc, len(pins), plural, block_type_id))
+            elif pins[ptc] != (type_ in _output_node_types):
+                self.report("ptc", "{} node {} has ptc {} which is an {} {} of block type {}".format(
+                    type_.name, id_, ptc, "output" if pins[ptc] else "input", what, block_type_id))
+
+    def add_node(self, id_, type_, xlow, ylow, xhigh, yhigh, ptc, segment_id = None):
+        """Check one node. ``type_`` is a `NodeType`."""
+        self.num_nodes += 1
+        if id_ < 0:
+            self.report("duplicate_node", "Negative node id {}".format(id_))
+            return
+        self.__grow(id_)
+        byte, bit = id_ >> 3, 1 << (id_ & 7)
+        if self.__bitmap[byte] & bit:
+            self.report("duplicate_node", "Node id {} is used more than once".format(id_))
+            return
+        self.__bitmap[byte] |= bit
+        self.__check_node(id_, type_, xlow, ylow, xhigh, yhigh, ptc, segment_id)
+
+    def tap_nodes(self, nodes):
+        """Check nodes implementing `AbstractNode` while passing them through."""
+        for node in nodes:
+            loc = node.loc
+            self.add_node(node.id_, node.type_, loc.xlow, loc.ylow, loc.xhigh, loc.yhigh, loc.ptc,
+                    node.segment_id if node.type_ in _chan_node_types else None)
+            yield node
+
+    def tap_node_columns(self, columns):
+        """Check batches of columnar nodes while passing them through. See `ArchitectureDelegate.node_columns`."""
+        for batch in iter_column_batches(columns):
+            ids = batch["id"].astype(np.int64)
+            self.num_nodes += len(ids)
+            if not len(ids):
+                yield batch
+                continue
+            for id_ in ids[ids < 0].tolist():
+                self.report("duplicate_node", "Negative node id {}".format(id_))
+            keep = np.flatnonzero(ids >= 0)
+            ids = ids[keep]
+            if not len(ids):
+                yield batch
+                continue
+            self.__grow(int(ids.max()))
+            bitmap = np.frombuffer(self.__bitmap, dtype = np.uint8)
+            seen = (bitmap[ids >> 3] >> (ids & 7).astype(np.uint8)) & 1
+            _, first = np.unique(ids, return_index = True)
+            fresh = np.zeros(len(ids), dtype = bool)
+            fresh[first] = True
+            fresh &= seen == 0
+            for id_ in ids[~fresh].tolist():
+                self.report("duplicate_node", "Node id {} is used more than once".format(id_))
+            np.bitwise_or.at(bitmap, ids >> 3, (1 << (ids & 7)).astype(np.uint8))
+            del bitmap
+            keep = keep[fresh]
+            types = batch["type"][keep]
+            xlow, ylow = batch["xlow"][keep], batch["ylow"][keep]
+            xhigh, yhigh = batch.get("xhigh", batch["xlow"])[keep], batch.get("yhigh", batch["ylow"])[keep]
+            ptc = batch["ptc"][keep]
+            segment = batch["segment_id"][keep] if "segment_id" in batch else np.full(len(keep), -1)
+            suspect = self.__suspect_nodes(types, xlow, ylow, xhigh, yhigh, ptc, segment)
+            for id_, type_, xl, yl, xh, yh, p, s in zip(*(c[suspect].tolist() for c in (ids[fresh], types,
+                    xlow, ylow, xhigh, yhigh, ptc, segment))):
+                self.__check_node(id_, NodeType(type_), xl, yl, xh, yh, p, s)
+            yield batch
+
+    def __suspect_nodes(self, types, xlow, ylow, xhigh, yhigh, ptc, segment):
+        """Vectorized check of a batch of columnar nodes, returning a mask of the nodes with problems. They are checked
+        again one by one to report the problems."""
+        suspect = ~((0 <= xlow) & (xlow <= xhigh) & (xhigh < self.__width) &
+                (0 <= ylow) & (ylow <= yhigh) & (yhigh < self.__height))
+        chan = np.isin(types, [t.value for t in _chan_node_types])
+        widths = np.where(types == NodeType.CHANX.value, self.__channel_widths[NodeType.CHANX],
+                self.__channel_widths[NodeType.CHANY])
+        suspect |= chan & ~(np.isin(segment, list(self.__segments)) & (0 <= ptc) & (ptc < widths))
+        is_class = np.isin(types, [t.value for t in _class_node_types])
+        candidates = ~(chan | suspect)
+        for classes in (False, True):
+            pin = candidates & (is_class if classes else ~is_class)
+            if not pin.any():
+                continue
+            limits, offsets, directions = self.__pin_arrays(classes)
+            grid = self.__get_block_type_ids()
+            grid = np.frombuffer(grid, dtype = np.dtype(grid.typecode))
+            block_types = grid[xlow[pin] * self.__height + ylow[pin]]
+            defined = block_types < len(limits)
+            block_types = np.where(defined, block_types, 0)
+            p = ptc[pin]
+            ok = defined & (0 <= p) & (p < limits[block_types])
+            is_output = np.isin(types[pin][ok], [t.value for t in _output_node_types])
+            ok[ok] = directions[offsets[block_types[ok]] + p[ok]] == is_output
+            suspect[np.flatnonzero(pin)[~ok]] = True
+        return suspect
+
+    def __pin_arrays(self, classes):
+        """Get the pin counts and the offsets into the concatenated pin directions of each block type, indexed by
+        block type id, plus the concatenated pin directions. Block types which are empty or undefined have 0 pins.
+        If ``classes`` is set, pin classes are used instead of pins."""
+        arrays = self.__pin_arrays_.get(classes)
+        if arrays is None:
+            pins_by_block = self.__classes if classes else self.__pins
+            size = max(list(pins_by_block) + [0]) + 1
+            limits, offsets = np.zeros(size, dtype = np.int64), np.zeros(size, dtype = np.int64)
+            directions, position = bytearray(), 0
+            for block_type_id, pins in pins_by_block.items():
+                limits[block_type_id], offsets[block_type_id] = len(pins), position
+                directions.extend(pins)
+                position += len(pins)
+            arrays = self.__pin_arrays_[classes] = (limits, offsets,
+                    np.frombuffer(bytes(directions) or b"\0", dtype = np.uint8) == 1)
+        return arrays
+
+    # -- Edges ---------------------------------------------------------------
+    def __has_node(self, id_):
+        return 0 <= id_ <= self.__max_id and self.__bitmap[id_ >> 3] & (1 << (id_ & 7))
+
+    def add_edge(self, src_node, sink_node, switch_id):
+        """Check one edge. All nodes must have been checked before."""
+        self.num_edges += 1
+        if switch_id not in self.__switches:
+            self.report("switch", "Edge {} -> {} refers to undefined switch {}".format(
+                src_node, sink_node, switch_id))
+        for id_ in (src_node, sink_node):
+            if not self.__has_node(id_):
+                self.report("dangling_edge", "Edge {} -> {} refers to undefined node {}".format(
+                    src_node, sink_node, id_))
+
+    def tap_edges(self, edges):
+        """Check edges implementing `AbstractEdge` while passing them through."""
+        for edge in edges:
+            self.add_edge(edge.src_node, edge.sink_node, edge.switch_id)
+            yield edge
+
+    def tap_edge_columns(self, columns):
+        """Check batches of columnar edges while passing them through. See `ArchitectureDelegate.edge_columns`."""
+        bitmap = None
+        for batch in iter_edge_batches(columns):
+            src, sink, switch = (batch[k].astype(np.int64) for k in ("src", "sink", "switch"))
+            self.num_edges += len(src)
+            if bitmap is None:
+                bitmap = np.frombuffer(bytes(self.__bitmap), dtype = np.uint8)
+            def defined(ids):
+                ok = (ids >= 0) & (ids <= self.__max_id)
+                ok[ok] = (bitmap[ids[ok] >> 3] >> (ids[ok] & 7).astype(np.uint8)) & 1 == 1
+                return ok
+            bad = ~(np.isin(switch, list(self.__switches)) & defined(src) & defined(sink))
+            for s, t, w in zip(src[bad].tolist(), sink[bad].tolist(), switch[bad].tolist()):
+                self.num_edges -= 1
+                self.add_edge(s, t, w)
+            yield batch
+
+    # -- Finishing -----------------------------------------------------------
+    def finish(self):
+        """Check for node ids which are never used. Call once after all nodes have been checked."""
+        missing = []
+        for byte in range((self.__max_id >> 3) + 1):
+            value = self.__bitmap[byte]
+            if value == 0xff:
+                continue
+            for id_ in range(byte << 3, min((byte + 1) << 3, self.__max_id + 1)):
+                if not value & (1 << (id_ & 7)):
+                    if len(missing) < _missing_examples:
+                        missing.append(id_)
+                    self.counts["missing_node"] = self.counts.get("missing_node", 0) + 1
+        if missing:
+            if len(self.problems) < self.max_problems:
+                self.problems.append(("missing_node", "{} node ids below {} are never used, e.g. {}".format(
+                    self.counts["missing_node"], self.__max_id, ", ".join(map(str, missing)))))
+
+    def run(self, delegate):
+        """Check all nodes and edges of ``delegate`` without generating anything.
+
+        Returns:
+            `RRGraphChecker`: self
+        """
+        columns = delegate.node_columns
+        for _ in (self.tap_nodes(delegate.nodes) if columns is None else self.tap_node_columns(columns)):
+            pass
+        self.finish()
+        columns = delegate.edge_columns
+        for _ in (self.tap_edges(delegate.edges) if columns is None else self.tap_edge_columns(columns)):
+            pass
+        return self
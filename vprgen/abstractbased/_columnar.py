@@ -0,0 +1,178 @@
+from vprgen.abstractbased._abstract import NodeType, SegmentDirection, Side
+
+try:
+    from collections.abc import Mapping
+except ImportError:
+    from collections import Mapping
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Enum value -> name lookup tables, indexed by the integer codes stored in the columns
+_node_type_names = {t.value: t.name for t in NodeType}
+_direction_names = {d.value: d.name for d in SegmentDirection}
+_side_names = {s.value: s.name.upper() for s in Side}
+
+_chan_node_types = (NodeType.CHANX.value, NodeType.CHANY.value)
+_pin_node_types = (NodeType.IPIN.value, NodeType.OPIN.value)
+_edge_columns = ("src", "sink", "switch")
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("The columnar node/edge protocol requires numpy")
+
+def _lookup_table(names):
+    """Build an object array mapping integer codes to names."""
+    table = np.empty(max(names) + 1, dtype = object)
+    for value, name in names.items():
+        table[value] = name
+    return table
+
+def iter_column_batches(columns, required = (), kind = "column"):
+    """Iterate the batches of a columnar node/edge description.
+
+    ``columns`` is either a single mapping from column names to arrays, or an iterable of such mappings. Each column
+    is converted with ``numpy.asarray``. A `KeyError` naming the ``kind`` of batch is raised if a batch lacks one of
+    the ``required`` columns.
+    """
+    _require_numpy()
+    for batch in ((columns, ) if isinstance(columns, Mapping) else columns):
+        for key in required:
+            if batch.get(key) is None:
+                raise KeyError("Missing column '{}' in {} batch".format(key, kind))
+        yield {k: np.asarray(v) for k, v in batch.items()}
+
+def iter_edge_batches(columns):
+    """Iterate the batches of a columnar edge description, checking that each has the "src", "sink" and "switch"
+    columns."""
+    return iter_column_batches(columns, _edge_columns, "edge")
+
+# ----------------------------------------------------------------------------
+# -- Nodes -------------------------------------------------------------------
+# ----------------------------------------------------------------------------
+def _node_fields(batch):
+    """Get the columns of a node batch, with defaults filled in."""
+    def column(key, default = None):
+        c = batch.get(key)
+        if c is not None:
+            return c
+        elif default is None:
+            raise KeyError("Missing column '{}' in node batch".format(key))
+        return np.full(len(fields["id"]), default)
+    fields = {}
+    for key in ("id", "type", "xlow", "ylow", "ptc"):
+        fields[key] = column(key)
+    fields["capacity"] = column("capacity", 1)
+    fields["R"] = column("R", 0)
+    fields["C"] = column("C", 0)
+    fields["xhigh"] = batch.get("xhigh", fields["xlow"])
+    fields["yhigh"] = batch.get("yhigh", fields["ylow"])
+    # pin and channel columns are only required if the batch has such nodes
+    for key, types in (("side", _pin_node_types),
+            ("direction", _chan_node_types),
+            ("segment_id", _chan_node_types), ):
+        if key in batch or np.isin(fields["type"], types).any():
+            fields[key] = column(key)
+    return fields
+
+def _node_kinds(types):
+    """Indices of channel, pin and class nodes in a batch."""
+    is_chan = np.isin(types, _chan_node_types)
+    is_pin = np.isin(types, _pin_node_types)
+    return (np.flatnonzero(is_chan), np.flatnonzero(is_pin), np.flatnonzero(~(is_chan | is_pin)))
+
+def format_node_columns(xmlgen, columns):
+    """Generate a series of <node> tags from columnar node data, formatting each batch as a whole and writing it out
+    with a single `write_raw` call.
+
+    Each batch maps column names to arrays of the same length:
+
+        * required: "id", "type" (`NodeType` values), "xlow", "ylow", "ptc"
+        * required for IPIN/OPIN nodes: "side" (`Side` values)
+        * required for CHANX/CHANY nodes: "direction" (`SegmentDirection` values), "segment_id"
+        * optional: "xhigh" and "yhigh" (default to "xlow" and "ylow"), "capacity" (defaults to 1), "R" and "C"
+          (default to 0)
+
+    Values are formatted as the Python scalars returned by ``tolist``, so the output is identical to generating the
+    same nodes one by one.
+    """
+    type_names, side_names, direction_names = (_lookup_table(_node_type_names), _lookup_table(_side_names),
+            _lookup_table(_direction_names))
+    fmt_chan = xmlgen.element_template("node", ("capacity", "id", "type", "direction"), (
+        ("loc", ("xlow", "ylow", "xhigh", "yhigh", "ptc")),
+        ("timing", ("R", "C")),
+        ("segment", ("segment_id", )), )).format
+    fmt_pin = xmlgen.element_template("node", ("capacity", "id", "type"), (
+        ("loc", ("xlow", "ylow", "xhigh", "yhigh", "ptc", "side")),
+        ("timing", ("R", "C")), )).format
+    fmt_class = xmlgen.element_template("node", ("capacity", "id", "type"), (
+        ("loc", ("xlow", "ylow", "xhigh", "yhigh", "ptc")),
+        ("timing", ("R", "C")), )).format
+    for batch in iter_column_batches(columns):
+        f = _node_fields(batch)
+        n = len(f["id"])
+        if n == 0:
+            continue
+        chan, pin, class_ = _node_kinds(f["type"])
+        names = type_names[f["type"]]
+        out = np.empty(n, dtype = object)
+        def take(idx, *keys):
+            return [f[k][idx].tolist() for k in keys]
+        if len(chan):
+            out[chan] = list(map(fmt_chan, *(take(chan, "capacity", "id") + [names[chan].tolist(),
+                direction_names[f["direction"][chan]].tolist()] +
+                take(chan, "xlow", "ylow", "xhigh", "yhigh", "ptc", "R", "C", "segment_id"))))
+        if len(pin):
+            out[pin] = list(map(fmt_pin, *(take(pin, "capacity", "id") + [names[pin].tolist()] +
+                take(pin, "xlow", "ylow", "xhigh", "yhigh", "ptc") + [side_names[f["side"][pin]].tolist()] +
+                take(pin, "R", "C"))))
+        if len(class_):
+            out[class_] = list(map(fmt_class, *(take(class_, "capacity", "id") + [names[class_].tolist()] +
+                take(class_, "xlow", "ylow", "xhigh", "yhigh", "ptc", "R", "C"))))
+        xmlgen.write_raw("".join(out.tolist()).encode("ascii"))
+
+def iter_node_rows(columns):
+    """Iterate columnar node data row by row.
+
+    Yields:
+        A :obj:`tuple` of id, type name, capacity, xlow, ylow, xhigh, yhigh, ptc, side name, direction name, R, C and
+        segment id for each node. Side name is None for non-pin nodes. Direction name and segment id are None for
+        non-channel nodes.
+    """
+    for batch in iter_column_batches(columns):
+        f = _node_fields(batch)
+        cols = [f[k].tolist() for k in ("id", "type", "capacity", "xlow", "ylow", "xhigh", "yhigh", "ptc", "R", "C")]
+        n = len(cols[0])
+        sides = f["side"].tolist() if "side" in f else [None] * n
+        directions = f["direction"].tolist() if "direction" in f else [None] * n
+        segments = f["segment_id"].tolist() if "segment_id" in f else [None] * n
+        for id_, type_, capacity, xlow, ylow, xhigh, yhigh, ptc, R, C, side, direction, segment_id in zip(
+                *(cols + [sides, directions, segments])):
+            is_chan, is_pin = type_ in _chan_node_types, type_ in _pin_node_types
+            yield (id_, _node_type_names[type_], capacity, xlow, ylow, xhigh, yhigh, ptc,
+                    _side_names[side] if is_pin else None,
+                    _direction_names[direction] if is_chan else None,
+                    R, C, segment_id if is_chan else None)
+
+# ----------------------------------------------------------------------------
+# -- Edges -------------------------------------------------------------------
+# ----------------------------------------------------------------------------
+def format_edge_columns(xmlgen, columns):
+    """Generate a series of <edge> tags from columnar edge data, formatting each batch as a whole and writing it out
+    with a single `write_raw` call.
+
+    Each batch maps "src", "sink" and "switch" to arrays of the same length.
+    """
+    fmt = xmlgen.element_template("edge", ("src_node", "sink_node", "switch_id")).format
+    for batch in iter_edge_batches(columns):
+        if len(batch["src"]):
+            xmlgen.write_raw("".join(map(fmt, batch["src"].tolist(), batch["sink"].tolist(),
+                batch["switch"].tolist())).encode("ascii"))
+
+def iter_edge_rows(columns):
+    """Iterate columnar edge data row by row, yielding (src, sink, switch) tuples."""
+    for batch in iter_edge_batches(columns):
+        for row in zip(batch["src"].tolist(), batch["sink"].tolist(), batch["switch"].tolist()):
+            yield row
@@ -12,13 +12,42 @@ except ImportError:
     from collections import Iterable
 
 from vprgen.abstractbased._abstract import *
-from vprgen._xml import XMLGenerator
+from vprgen._stream import wrap_output
+from vprgen._xml import XMLGenerator, make_xml_generator, leaf_template, _escape_text
+from vprgen._rrgbin import RRGraphBinaryWriter
+from vprgen._cache import SectionCache
+from vprgen._extsort import ExternalEdgeSort
+from vprgen.abstractbased._columnar import (format_node_columns, format_edge_columns, iter_node_rows,
+        iter_edge_rows, iter_edge_batches)
+from vprgen._csr import CSRIndexBuilder
+from vprgen.abstractbased._check import RRGraphChecker
+from vprgen.abstractbased._grid import TileGrid, GridPattern
+from vprgen.abstractbased._pins import BlockPinTable, BlockPinClass
 
 from abc import ABCMeta, abstractproperty
-from typing import Iterable, Union, Optional
-from itertools import product, count
+from typing import Iterable, Union, Optional, Sequence, Tuple, List
+from collections import namedtuple, OrderedDict
+from itertools import product, count, islice, compress, starmap
+from operator import attrgetter, itemgetter
+from functools import partial
 
 _empty_iterable = tuple()
+_chan_node_types = frozenset((NodeType.CHANX, NodeType.CHANY))
+_pin_node_types = frozenset((NodeType.IPIN, NodeType.OPIN))
+_side_names = {side: side.name.upper() for side in Side}
+_edge_chunk_size = 65536
+_node_chunk_size = 16384
+_timing_memo_size = 65536
+_block_type_memo_size = 1024
+_block_type_memo = {}   # (id(table), template) -> (table, bytes). Tables are kept alive so that ids are not reused
+_pin_fragment = '<pin ptc="{}">{}</pin>'
+_EdgeRow = namedtuple("_EdgeRow", "src_node sink_node switch_id metadata")
+
+def _tap_edge_columns(csr_index, columns):
+    """Record each batch of columnar edges into ``csr_index`` while passing it through."""
+    for batch in iter_edge_batches(columns):
+        csr_index.add_columns(batch["src"], batch["sink"], batch["switch"])
+        yield batch
 
 # ----------------------------------------------------------------------------
 # -- Architecture Delegate ---------------------------------------------------
@@ -100,21 +129,114 @@ class ArchitectureDelegate(with_metaclass(ABCMeta, object)):
     # Python 2 and 3 compatible type checking
     edges.fget.__annotations__ = {"return": Iterable[AbstractEdge]}
 
+    @property
+    def node_columns(self):
+        """Nodes in columnar form, used instead of `nodes` if not None.
+
+        Either a mapping from column names to NumPy arrays (or anything accepted by ``numpy.asarray``), or an
+        iterable of such mappings, one per batch. Columns are "id", "type" (`NodeType` values), "xlow", "ylow",
+        "ptc", "side" (`Side` values, for IPIN/OPIN nodes), "direction" (`SegmentDirection` values, for CHANX/CHANY
+        nodes), "segment_id" (for CHANX/CHANY nodes), and optionally "xhigh", "yhigh", "capacity", "R" and "C".
+        Values of rows not requiring a column are ignored.
+        """
+        return None
+    # Python 2 and 3 compatible type checking
+    node_columns.fget.__annotations__ = {"return": Optional[Union[Mapping, Iterable[Mapping]]]}
+
+    @property
+    def edge_columns(self):
+        """Edges in columnar form, used instead of `edges` if not None.
+
+        Either a mapping from "src", "sink" and "switch" to NumPy arrays (or anything accepted by ``numpy.asarray``),
+        or an iterable of such mappings, one per batch. Edges in columnar form do not have metadata.
+        """
+        return None
+    # Python 2 and 3 compatible type checking
+    edge_columns.fget.__annotations__ = {"return": Optional[Union[Mapping, Iterable[Mapping]]]}
+
+    @property
+    def tile_grid(self):
+        """Materialized grid used instead of calling `get_tile` for each location, if not None.
+
+        By default, each generator materializes the grid from `get_tile` once per call. Return a `TileGrid` built
+        once with `TileGrid.from_delegate`, or with `TileGrid.from_patterns` without defining `get_tile` at all, to
+        share it between generators.
+        """
+        return None
+    # Python 2 and 3 compatible type checking
+    tile_grid.fget.__annotations__ = {"return": Optional[TileGrid]}
+
+    @property
+    def group_equivalent_pins(self):
+        """If the pins of each top-level port declared ``equivalent`` share one <pin_class> per block instance in the
+        routing resource graph, instead of one <pin_class> per pin.
+
+        With shared pin classes, only one SOURCE or SINK node is needed per class, and the ptc of the node is the index
+        of the class, see `get_block_pin_classes`. IPIN and OPIN nodes keep using the ptc of the pin.
+        """
+        return False
+    # Python 2 and 3 compatible type checking
+    group_equivalent_pins.fget.__annotations__ = {"return": bool}
+
+    @property
+    def switch_block_type(self):
+        """Switch block pattern declared in the architecture XML, and used by `SwitchBlockEdgeGenerator` by default."""
+        return SwitchBlockType.wilton
+    # Python 2 and 3 compatible type checking
+    switch_block_type.fget.__annotations__ = {"return": SwitchBlockType}
+
     def get_tile(self, x, y):
         """Get the complex block at tile (x, y)."""
         return None
     # Python 2 and 3 compatible type checking
     get_tile.__annotations__ = {"x": int, "y": int, "return": Optional[AbstractTile]}
 
+    def iter_tiles(self):
+        """Iterate (x, y, tile) of anchor tiles only, i.e. tiles with zero offsets, used instead of calling `get_tile`
+        for each location if not None.
+
+        Offset tiles of multi-tile blocks are filled in from the width and height of the block, and all other
+        locations are empty. Ignored if `tile_grid` is not None.
+        """
+        return None
+    # Python 2 and 3 compatible type checking
+    iter_tiles.__annotations__ = {"return": Optional[Iterable[Tuple[int, int, AbstractTile]]]}
+
+    def get_rrg_section_fingerprint(self, section):
+        """Get a cheap fingerprint of a section of the routing resource graph, used to reuse the section from the
+        cache of `gen_rrg_xml` when it is unchanged.
+
+        ``section`` is one of "channels", "segments", "switches", "block_types", "grid", "rr_nodes" and "rr_edges".
+        The fingerprint can be any value with a stable ``repr``, e.g. a version string, a hash or a tuple of
+        parameters, and must change whenever the section changes. If None is returned, the section is always
+        generated. By default only "channels" is fingerprinted, with the grid size and channel widths.
+        """
+        if section == "channels":
+            return (self.width, self.height, self.x_channel_width, self.y_channel_width)
+        return None
+    # Python 2 and 3 compatible type checking
+    get_rrg_section_fingerprint.__annotations__ = {"section": str}
+
     # -- API -----------------------------------------------------------------
-    def gen_arch_xml(self, ostream, pretty = True):
+    def gen_arch_xml(self, ostream, pretty = True, backend = "lxml", buffer_size = None, compression = None,
+            compress_layout = False):
         """Stream generate VPR's architecture description XML.
 
         Args:
             ostream: a file-like object, like a `file` or a `StringIO`
             pretty (:obj:`bool`): if the output XML file should be nicely broken into multiple lines and indented
+            backend (:obj:`str`): the XML generator backend. "lxml" streams each tag through `lxml.etree.xmlfile`,
+                "template" writes precompiled byte templates directly to ``ostream``. Both produce identical output
+            buffer_size (:obj:`int`): if set, output is collected in a buffer of this many bytes and flushed to
+                ``ostream`` in large blocks
+            compression (:obj:`str`): if set to "gzip" or "xz", output is compressed in independent blocks on a
+                thread pool before written to ``ostream``
+            compress_layout (:obj:`bool`): if set, the layout is described with <fill>, <col>, <row> and <region>
+                tags found by `TileGrid.to_patterns`, falling back to <single> tags for exceptions, instead of one
+                <single> tag per block. The layout resolved by VPR is the same
         """
-        with XMLGenerator(ostream, pretty, True) as xmlgen:
+        with wrap_output(ostream, buffer_size, compression) as ostream, \
+                make_xml_generator(ostream, pretty, True, backend) as xmlgen:
             with xmlgen.element("architecture"):
                 # 1. models
                 with xmlgen.element("models"):
@@ -137,10 +259,18 @@ class ArchitectureDelegate(with_metaclass(ABCMeta, object)):
                     "name": self.name,
                     "width": str(self.width),
                     "height": str(self.height), }):
-                    for x, y in product(range(self.width), range(self.height)):
-                        tile = self.get_tile(x, y)
-                        if tile:
-                            self._gen_arch_tile(xmlgen, tile, x, y)
+                    if compress_layout:
+                        for pattern in self._get_tile_grid().to_patterns(self.complex_blocks):
+                            self._gen_arch_layout_pattern(xmlgen, pattern)
+                    else:
+                        anchors = None if self.tile_grid is not None else self.iter_tiles()
+                        if anchors is None:
+                            anchors = self._get_tile_grid()
+                        else:
+                            anchors = sorted(anchors, key = itemgetter(0, 1))
+                        for x, y, tile in anchors:
+                            if tile:
+                                self._gen_arch_tile(xmlgen, tile, x, y)
                 # 6. directs
                 try:
                     next(iter(self.directs))
@@ -154,75 +284,303 @@ class ArchitectureDelegate(with_metaclass(ABCMeta, object)):
                     xmlgen.element_leaf("sizing", {"R_minW_nmos": "0", "R_minW_pmos": "0"})
                     xmlgen.element_leaf("connection_block", {"input_switch_name": next(iter(self.switches)).name})
                     xmlgen.element_leaf("area", {"grid_logic_tile_area": "0"})
-                    xmlgen.element_leaf("switch_block", {"type": "wilton", "fs": "3"})
+                    xmlgen.element_leaf("switch_block", {"type": self.switch_block_type.name, "fs": "3"})
                     xmlgen.element_leaf("default_fc", {"in_type": "frac", "in_val": "0.5",
                         "out_type": "frac", "out_val": "0.5"})
 
-    def gen_rrg_xml(self, ostream, pretty = True):
+    def gen_rrg_xml(self, ostream, pretty = True, backend = "lxml", buffer_size = None, compression = None,
+            cache_dir = None, edge_chunk_size = None, sort_edges = False, sort_memory = None, tmpdir = None,
+            csr_index = None, checker = None):
         """Stream generate VPR's routing resource graph XML.
 
         Args:
             ostream: a file-like object, like a `file` or a `StringIO`
             pretty (:obj:`bool`): if the output XML file should be nicely broken into multiple lines and indented
+            backend (:obj:`str`): the XML generator backend. "lxml" streams each tag through `lxml.etree.xmlfile`,
+                "template" writes precompiled byte templates directly to ``ostream``. Both produce identical output
+            buffer_size (:obj:`int`): if set, output is collected in a buffer of this many bytes and flushed to
+                ``ostream`` in large blocks
+            compression (:obj:`str`): if set to "gzip" or "xz", output is compressed in independent blocks on a
+                thread pool before written to ``ostream``
+            cache_dir (:obj:`str`): if set, each section with a fingerprint from `get_rrg_section_fingerprint` is
+                stored in this directory, and reused as is the next time it is generated with the same fingerprint
+            edge_chunk_size (:obj:`int`): number of edges formatted and written out at a time. Defaults to 65536
+            sort_edges (:obj:`bool`): if set, <edge> tags are sorted by source node, then sink node, then switch. Edges
+                are sorted out of core, so the full list of edges does not need to fit in memory
+            sort_memory (:obj:`int`): approximate number of bytes of memory used for sorting edges. Defaults to 256MB
+            tmpdir (:obj:`str`): directory for the temporary files used for sorting edges
+            csr_index (`CSRIndexBuilder`): if set, every generated edge is recorded into this builder. The <rr_edges>
+                section is then never reused from the cache
+            checker (`RRGraphChecker`): if set, every generated node and edge is checked by this checker in the same
+                pass. The <rr_nodes> and <rr_edges> sections are then never reused from the cache
         """
-        with XMLGenerator(ostream, pretty, True) as xmlgen:
-            with xmlgen.element("rr_graph"):
-                # 1. channels
-                with xmlgen.element("channels"):
-                    xmlgen.element_leaf("channel", {
-                        "chan_width_max": str(max(self.x_channel_width, self.y_channel_width)),
-                        "x_max": str(self.x_channel_width),
-                        "x_min": str(self.x_channel_width),
-                        "y_max": str(self.y_channel_width),
-                        "y_min": str(self.y_channel_width), })
-                    for y in range(self.height):
-                        xmlgen.element_leaf("x_list", {
-                            "index": str(y),
-                            "info": str(self.x_channel_width), })
-                    for x in range(self.width):
-                        xmlgen.element_leaf("y_list", {
-                            "index": str(x),
-                            "info": str(self.y_channel_width), })
-                # 2. segments
-                with xmlgen.element("segments"):
-                    for segment in self.segments:
-                        self._gen_rrg_segment(xmlgen, segment)
-                # 3. switches
-                with xmlgen.element("switches"):
-                    for switch in self.switches:
-                        self._gen_rrg_switch(xmlgen, switch)
-                # 4. blocks
-                with xmlgen.element("block_types"):
-                    xmlgen.element_leaf("block_type", {
-                        "name": "EMPTY",
-                        "id": "0",
-                        "width": "1",
-                        "height": "1", })
-                    for block in self.complex_blocks:
-                        self._gen_rrg_block(xmlgen, block)
-                # 5. grid
-                with xmlgen.element("grid"):
-                    for x, y in product(range(self.width), range(self.height)):
-                        tile = self.get_tile(x, y)
-                        if tile is None:
-                            xmlgen.element_leaf("grid_loc", {
-                                "block_type_id": "0",
-                                "height_offset": "0",
-                                "width_offset": "0",
-                                "x": str(x),
-                                "y": str(y), })
-                        else:
-                            self._gen_rrg_tile(xmlgen, tile, x, y)
-                # 6. nodes
-                with xmlgen.element("rr_nodes"):
-                    for node in self.nodes:
-                        self._gen_node(xmlgen, node)
-                # 7. edges
-                with xmlgen.element("rr_edges"):
-                    for edge in self.edges:
-                        self._gen_edge(xmlgen, edge)
+        sections = (("channels", self._gen_rrg_channels),
+                ("segments", self._gen_rrg_segments),
+                ("switches", self._gen_rrg_switches),
+                ("block_types", self._gen_rrg_block_types),
+                ("grid", partial(self._gen_rrg_grid, checker = checker)),
+                ("rr_nodes", partial(self._gen_rrg_nodes, checker = checker)),
+                ("rr_edges", partial(self._gen_rrg_edges, chunk_size = edge_chunk_size,
+                    sort = dict(memory = sort_memory, tmpdir = tmpdir) if sort_edges else None,
+                    csr_index = csr_index, checker = checker)), )
+        # sections which must be generated to be seen by the index builder or the checker
+        uncached = set()
+        if csr_index is not None:
+            uncached.add("rr_edges")
+        if checker is not None:
+            uncached.update(("rr_nodes", "rr_edges"))
+        with wrap_output(ostream, buffer_size, compression) as ostream:
+            cache = None
+            if cache_dir is not None:
+                cache = SectionCache(cache_dir, pretty)
+                ostream = cache.tap(ostream)
+            with make_xml_generator(ostream, pretty, True, backend) as xmlgen, xmlgen.element("rr_graph"):
+                for section, gen in sections:
+                    if cache is None:
+                        gen(xmlgen)
+                        continue
+                    fingerprint = None if section in uncached else self.get_rrg_section_fingerprint(section)
+                    with cache.section(xmlgen, section, fingerprint) as hit:
+                        if not hit:
+                            gen(xmlgen)
+
+    def gen_rrg_bin(self, ostream, buffer_size = None, compression = None, tmpdir = None):
+        """Stream generate VPR's routing resource graph in the Cap'n Proto binary format.
+
+        The graph is the same as the one generated by `gen_rrg_xml`. Nodes and edges are spooled to temporary files
+        while they are generated, then the message is written out to ``ostream``.
+
+        Args:
+            ostream: a binary file-like object
+            buffer_size (:obj:`int`): if set, output is collected in a buffer of this many bytes and flushed to
+                ``ostream`` in large blocks
+            compression (:obj:`str`): if set to "gzip" or "xz", output is compressed in independent blocks on a
+                thread pool before written to ``ostream``
+            tmpdir (:obj:`str`): directory for the temporary files
+        """
+        with wrap_output(ostream, buffer_size, compression) as ostream, \
+                RRGraphBinaryWriter(ostream, tmpdir) as writer:
+            # 1. channels
+            writer.set_channels({
+                "chan_width_max": max(self.x_channel_width, self.y_channel_width),
+                "x_max": self.x_channel_width,
+                "x_min": self.x_channel_width,
+                "y_max": self.y_channel_width,
+                "y_min": self.y_channel_width, },
+                [(y, self.x_channel_width) for y in range(self.height)],
+                [(x, self.y_channel_width) for x in range(self.width)])
+            # 2. segments
+            for segment in self.segments:
+                writer.add_segment(segment.id_, segment.name, segment.Rmetal, segment.Cmetal)
+            # 3. switches
+            for switch in self.switches:
+                if isinstance(switch.Tdel, Iterable):
+                    raise NotImplementedError("rr_graph with a list of <Tdel> tags not supported yet")
+                writer.add_switch(switch.id_, switch.name,
+                        "buffer" if switch.type_ is SwitchType.buffer_ else switch.type_.name,
+                        switch.R, switch.Cin, switch.Cout, switch.Tdel)
+            # 4. blocks
+            writer.add_block_type(0, "EMPTY", 1, 1, _empty_iterable)
+            for block in self.complex_blocks:
+                table = self.get_block_pin_table(block)
+                writer.add_block_type(block.id_, block.name, block.width, block.height,
+                        ((pin_class.type_, tuple((ptc, table[ptc].name) for ptc in pin_class.ptcs))
+                            for pin_class in table.classes))
+            # 5. grid
+            for x, y, tile in self._get_tile_grid():
+                if tile is None:
+                    writer.add_grid_loc(x, y, 0, 0, 0)
+                else:
+                    writer.add_grid_loc(x, y, tile.block_type_id, tile.xoffset, tile.yoffset)
+            # 6. nodes
+            columns = self.node_columns
+            if columns is not None:
+                for (id_, type_, capacity, xlow, ylow, xhigh, yhigh, ptc, side, direction, R, C,
+                        segment_id) in iter_node_rows(columns):
+                    writer.add_node(id_, type_, capacity, xlow, ylow, xhigh, yhigh, ptc, side, direction, R, C,
+                            segment_id)
+            for node in (self.nodes if columns is None else _empty_iterable):
+                type_, loc, timing = node.type_, node.loc, node.timing
+                R, C = (timing.R, timing.C) if timing else (0, 0)
+                if type_ in _chan_node_types:
+                    writer.add_node(node.id_, type_.name, node.capacity, loc.xlow, loc.ylow, loc.xhigh, loc.yhigh,
+                            loc.ptc, direction = node.direction.name, R = R, C = C, segment_id = node.segment_id)
+                else:
+                    writer.add_node(node.id_, type_.name, node.capacity, loc.xlow, loc.ylow, loc.xhigh, loc.yhigh,
+                            loc.ptc, side = _side_names[loc.side] if type_ in _pin_node_types else None, R = R, C = C)
+            # 7. edges
+            columns = self.edge_columns
+            if columns is not None:
+                for src, sink, switch in iter_edge_rows(columns):
+                    writer.add_edge(src, sink, switch)
+            for edge in (self.edges if columns is None else _empty_iterable):
+                writer.add_edge(edge.src_node, edge.sink_node, edge.switch_id, edge.metadata)
+
+    def get_block_pin_table(self, block):
+        """Get the pins of ``block`` by ptc, e.g. to build IPIN, OPIN, SOURCE and SINK nodes numbered the same way as
+        the generated <block_type> tags. The table is built once per block object.
+
+        Returns:
+            `BlockPinTable`:
+        """
+        return BlockPinTable.of(block, self.group_equivalent_pins)
+    # Python 2 and 3 compatible type checking
+    get_block_pin_table.__annotations__ = {"block": AbstractTopPbType, "return": BlockPinTable}
+
+    def get_block_pin_classes(self, block):
+        """Get the pin classes of ``block``, indexed by the ptc of their SOURCE or SINK node, each with the ptcs of its
+        pins. Without `group_equivalent_pins`, there is one class per pin with the same ptc.
+
+        Returns:
+            :obj:`list` [`BlockPinClass` ]:
+        """
+        return self.get_block_pin_table(block).classes
+    # Python 2 and 3 compatible type checking
+    get_block_pin_classes.__annotations__ = {"block": AbstractTopPbType, "return": List[BlockPinClass]}
 
     # -- Private methods -----------------------------------------------------
+    def _get_tile_grid(self):
+        """Get `tile_grid`, or materialize the grid from `iter_tiles` or `get_tile` if it is None."""
+        grid = self.tile_grid
+        if grid is not None:
+            return grid
+        anchors = self.iter_tiles()
+        if anchors is None:
+            return TileGrid.from_delegate(self)
+        return TileGrid.from_anchors(self.width, self.height, anchors, self.complex_blocks)
+    # Python 2 and 3 compatible type checking
+    _get_tile_grid.__annotations__ = {"return": TileGrid}
+
+    def _gen_rrg_channels(self, xmlgen):
+        """Generate the <channels> tag."""
+        with xmlgen.element("channels"):
+            xmlgen.element_leaf("channel", {
+                "chan_width_max": str(max(self.x_channel_width, self.y_channel_width)),
+                "x_max": str(self.x_channel_width),
+                "x_min": str(self.x_channel_width),
+                "y_max": str(self.y_channel_width),
+                "y_min": str(self.y_channel_width), })
+            for y in range(self.height):
+                xmlgen.element_leaf("x_list", {
+                    "index": str(y),
+                    "info": str(self.x_channel_width), })
+            for x in range(self.width):
+                xmlgen.element_leaf("y_list", {
+                    "index": str(x),
+                    "info": str(self.y_channel_width), })
+    # Python 2 and 3 compatible type checking
+    _gen_rrg_channels.__annotations__ = {"xmlgen": XMLGenerator}
+
+    def _gen_rrg_segments(self, xmlgen):
+        """Generate the <segments> tag."""
+        with xmlgen.element("segments"):
+            for segment in self.segments:
+                self._gen_rrg_segment(xmlgen, segment)
+    # Python 2 and 3 compatible type checking
+    _gen_rrg_segments.__annotations__ = {"xmlgen": XMLGenerator}
+
+    def _gen_rrg_switches(self, xmlgen):
+        """Generate the <switches> tag."""
+        with xmlgen.element("switches"):
+            for switch in self.switches:
+                self._gen_rrg_switch(xmlgen, switch)
+    # Python 2 and 3 compatible type checking
+    _gen_rrg_switches.__annotations__ = {"xmlgen": XMLGenerator}
+
+    def _gen_rrg_block_types(self, xmlgen):
+        """Generate the <block_types> tag."""
+        with xmlgen.element("block_types"):
+            xmlgen.element_leaf("block_type", {
+                "name": "EMPTY",
+                "id": "0",
+                "width": "1",
+                "height": "1", })
+            for block in self.complex_blocks:
+                self._gen_rrg_block(xmlgen, block)
+    # Python 2 and 3 compatible type checking
+    _gen_rrg_block_types.__annotations__ = {"xmlgen": XMLGenerator}
+
+    def _gen_rrg_grid(self, xmlgen, checker = None):
+        """Generate the <grid> tag.
+
+        Args:
+            checker (`RRGraphChecker`): if not None and without a grid, the materialized grid is handed to it
+        """
+        grid = self._get_tile_grid()
+        if checker is not None and checker.grid is None:
+            checker.grid = grid
+        with xmlgen.element("grid"):
+            fmt_empty = xmlgen.element_template("grid_loc",
+                    ("block_type_id", "height_offset", "width_offset", "x", "y")).format
+            fmt_tile = xmlgen.element_template("grid_loc",
+                    ("block_type_id", "x", "y", "width_offset", "height_offset")).format
+            chunk = []
+            for x, y, tile in grid:
+                if tile is None:
+                    chunk.append(fmt_empty(0, 0, 0, x, y))
+                else:
+                    chunk.append(fmt_tile(tile.block_type_id, x, y, tile.xoffset, tile.yoffset))
+                if len(chunk) >= _node_chunk_size:
+                    xmlgen.write_raw("".join(chunk).encode("ascii"))
+                    chunk = []
+            if chunk:
+                xmlgen.write_raw("".join(chunk).encode("ascii"))
+    # Python 2 and 3 compatible type checking
+    _gen_rrg_grid.__annotations__ = {"xmlgen": XMLGenerator, "checker": Optional[RRGraphChecker]}
+
+    def _gen_rrg_nodes(self, xmlgen, checker = None):
+        """Generate the <rr_nodes> tag.
+
+        Args:
+            checker (`RRGraphChecker`): if not None, nodes are checked by it
+        """
+        with xmlgen.element("rr_nodes"):
+            columns = self.node_columns
+            if columns is None:
+                self._gen_nodes(xmlgen, self.nodes if checker is None else checker.tap_nodes(self.nodes))
+            else:
+                format_node_columns(xmlgen, columns if checker is None else checker.tap_node_columns(columns))
+        if checker is not None:
+            checker.finish()
+    # Python 2 and 3 compatible type checking
+    _gen_rrg_nodes.__annotations__ = {"xmlgen": XMLGenerator, "checker": Optional[RRGraphChecker]}
+
+    def _gen_rrg_edges(self, xmlgen, chunk_size = None, sort = None, csr_index = None, checker = None):
+        """Generate the <rr_edges> tag.
+
+        Args:
+            sort (:obj:`dict`): if not None, edges are sorted with an `ExternalEdgeSort` constructed with these
+                keyword arguments
+            csr_index (`CSRIndexBuilder`): if not None, edges are recorded into it
+            checker (`RRGraphChecker`): if not None, edges are checked by it
+        """
+        with xmlgen.element("rr_edges"):
+            columns, edges = self.edge_columns, None
+            if columns is None:
+                edges = self.edges if checker is None else checker.tap_edges(self.edges)
+                if csr_index is not None:
+                    edges = csr_index.tap(edges)
+            else:
+                if checker is not None:
+                    columns = checker.tap_edge_columns(columns)
+                if csr_index is not None:
+                    columns = _tap_edge_columns(csr_index, columns)
+            if sort is not None:
+                with ExternalEdgeSort(**sort) as sorter:
+                    if columns is None:
+                        sorter.extend(edges)
+                    else:
+                        for src, sink, switch in iter_edge_rows(columns):
+                            sorter.add(src, sink, switch)
+                    self._gen_edge_rows(xmlgen, sorter, chunk_size, sorter.metadata)
+            elif columns is None:
+                self._gen_edges(xmlgen, edges, chunk_size)
+            else:
+                format_edge_columns(xmlgen, columns)
+    # Python 2 and 3 compatible type checking
+    _gen_rrg_edges.__annotations__ = {"xmlgen": XMLGenerator, "chunk_size": Optional[int], "sort": Optional[dict],
+            "csr_index": Optional[CSRIndexBuilder], "checker": Optional[RRGraphChecker]}
+
     def _gen_metadata(self, xmlgen, metadata):
         """Generate a <metadata> tag for the given ``metadata``."""
         if metadata:
@@ -516,6 +874,14 @@ class ArchitectureDelegate(with_metaclass(ABCMeta, object)):
     # Python 2 and 3 compatible type checking
     _gen_arch_tile.__annotations__ = {"xmlgen": XMLGenerator, "tile": AbstractTile, "x": int, "y": int}
     
+    def _gen_arch_layout_pattern(self, xmlgen, pattern):
+        """Generate a tag under <fixed_layout> for the given ``pattern``."""
+        tag, attrs = pattern.to_layout_tag()
+        with xmlgen.element(tag, OrderedDict(attrs)):
+            self._gen_metadata(xmlgen, pattern.metadata)
+    # Python 2 and 3 compatible type checking
+    _gen_arch_layout_pattern.__annotations__ = {"xmlgen": XMLGenerator, "pattern": GridPattern}
+
     def _gen_direct(self, xmlgen, direct):
         """Generate a <direct> tag for the given ``direct``."""
         xmlgen.element_leaf("direct", {
@@ -562,29 +928,36 @@ class ArchitectureDelegate(with_metaclass(ABCMeta, object)):
     _gen_rrg_switch.__annotations__ = {"xmlgen": XMLGenerator, "switch": AbstractSwitch}
     
     def _gen_rrg_block(self, xmlgen, block):
-        """Generate a <block_type> tag for the given ``block``."""
+        """Generate a <block_type> tag for the given ``block``.
+
+        The <pin_class> tags are formatted from the pin table of the block with templates precompiled for
+        ``xmlgen``, and the serialized bytes are memoized by the identity of the table.
+        """
         with xmlgen.element("block_type", {
             "name": block.name,
             "id": str(block.id_),
             "width": str(block.width),
             "height": str(block.height), }):
-            ptc_it = count()
-            for z, (key, iterable) in product(range(block.capacity),
-                    (("input", block.inputs), 
-                        ("output", block.outputs),
-                        ("clock", block.clocks), )):
-                for port in iterable:
-                    for bit in range(port.num_pins):
-                        with xmlgen.element("pin_class", {
-                            "type": "OUTPUT" if key == "output" else "INPUT", }):
-                            if block.capacity == 1:
-                                xmlgen.element_leaf("pin", {
-                                    "ptc": str(next(ptc_it)), },
-                                    "{}.{}[{}]".format(block.name, port.name, bit))
-                            else:
-                                xmlgen.element_leaf("pin", {
-                                    "ptc": str(next(ptc_it)), },
-                                    "{}[{}].{}[{}]".format(block.name, z, port.name, bit))
+            table = self.get_block_pin_table(block)
+            key = (id(table), xmlgen.element_template("pin_class", ("type", ), (("pin", None), )))
+            try:
+                data = _block_type_memo[key][1]
+            except KeyError:
+                if len(_block_type_memo) >= _block_type_memo_size:
+                    _block_type_memo.clear()
+                templates = {}  # number of pins -> template of a <pin_class> tag
+                def fmt(pin_class):
+                    size = len(pin_class.ptcs)
+                    template = templates.get(size)
+                    if template is None:
+                        template = templates[size] = xmlgen.element_template("pin_class", ("type", ),
+                                (("pin", None), ) * size).format
+                    return template(pin_class.type_, *(_pin_fragment.format(ptc, _escape_text(table[ptc].name))
+                        for ptc in pin_class.ptcs))
+                data = "".join(map(fmt, table.classes)).encode("ascii", "xmlcharrefreplace")
+                _block_type_memo[key] = table, data
+            if data:
+                xmlgen.write_raw(data)
     # Python 2 and 3 compatible type checking
     _gen_rrg_block.__annotations__ = {"xmlgen": XMLGenerator, "block": AbstractTopPbType}
     
@@ -599,31 +972,100 @@ class ArchitectureDelegate(with_metaclass(ABCMeta, object)):
     # Python 2 and 3 compatible type checking
     _gen_rrg_tile.__annotations__ = {"xmlgen": XMLGenerator, "tile": AbstractTile, "x": int, "y": int}
     
+    def _gen_nodes(self, xmlgen, nodes):
+        """Generate a series of <node> tags for the given ``nodes``.
+
+        Each kind of node is formatted with a template precompiled for ``xmlgen``, and written out in chunks. The
+        <timing> child is formatted separately and memoized by the values and types of R and C, so that repeated timing
+        values are formatted only once.
+        """
+        fmt_chan = xmlgen.element_template("node", ("capacity", "id", "type", "direction"), (
+            ("loc", ("xlow", "ylow", "xhigh", "yhigh", "ptc")),
+            ("timing", None),
+            ("segment", ("segment_id", )), )).format
+        fmt_pin = xmlgen.element_template("node", ("capacity", "id", "type"), (
+            ("loc", ("xlow", "ylow", "xhigh", "yhigh", "ptc", "side")),
+            ("timing", None), )).format
+        fmt_class = xmlgen.element_template("node", ("capacity", "id", "type"), (
+            ("loc", ("xlow", "ylow", "xhigh", "yhigh", "ptc")),
+            ("timing", None), )).format
+        fmt_timing = leaf_template("timing", ("R", "C")).format
+        no_timing = fmt_timing(0, 0)
+        timings = {}    # (R, C, type of R, type of C) -> fragment. Types are included since e.g. 1 and 1.0 differ
+        chunk = []
+        for node in nodes:
+            type_, loc, timing = node.type_, node.loc, node.timing
+            if timing is None:
+                fragment = no_timing
+            else:
+                R, C = timing.R, timing.C
+                key = (R, C, type(R), type(C))
+                try:
+                    fragment = timings[key]
+                except KeyError:
+                    if len(timings) >= _timing_memo_size:
+                        timings.clear()
+                    fragment = timings[key] = fmt_timing(R, C)
+            if type_ in _chan_node_types:
+                chunk.append(fmt_chan(node.capacity, node.id_, type_.name, node.direction.name,
+                        loc.xlow, loc.ylow, loc.xhigh, loc.yhigh, loc.ptc, fragment, node.segment_id))
+            elif type_ in _pin_node_types:
+                chunk.append(fmt_pin(node.capacity, node.id_, type_.name,
+                        loc.xlow, loc.ylow, loc.xhigh, loc.yhigh, loc.ptc, _side_names[loc.side], fragment))
+            else:
+                chunk.append(fmt_class(node.capacity, node.id_, type_.name,
+                        loc.xlow, loc.ylow, loc.xhigh, loc.yhigh, loc.ptc, fragment))
+            if len(chunk) >= _node_chunk_size:
+                xmlgen.write_raw("".join(chunk).encode("ascii"))
+                chunk = []
+        if chunk:
+            xmlgen.write_raw("".join(chunk).encode("ascii"))
+    # Python 2 and 3 compatible type checking
+    _gen_nodes.__annotations__ = {"xmlgen": XMLGenerator, "nodes": Iterable[AbstractNode]}
+
     def _gen_node(self, xmlgen, node):
         """Generate a <node> tag for the given ``node``."""
-        attrs = { "capacity": str(node.capacity),
-                "id": str(node.id_),
-                "type": node.type_.name, }
-        if node.type_ in (NodeType.CHANX, NodeType.CHANY):
-            attrs["direction"] = node.direction.name
-        with xmlgen.element("node", attrs):
-            attrs = {"xlow": str(node.loc.xlow),
-                    "ylow": str(node.loc.ylow),
-                    "xhigh": str(node.loc.xhigh),
-                    "yhigh": str(node.loc.yhigh),
-                    "ptc": str(node.loc.ptc), }
-            if node.type_ in (NodeType.IPIN, NodeType.OPIN):
-                attrs["side"] = node.loc.side.name.upper()
-            xmlgen.element_leaf("loc", attrs)
-            if node.timing:
-                xmlgen.element_leaf("timing", {"R": str(node.timing.R), "C": str(node.timing.C)})
-            else:
-                xmlgen.element_leaf("timing", {"R": "0", "C": "0"})
-            if node.type_ in (NodeType.CHANX, NodeType.CHANY):
-                xmlgen.element_leaf("segment", {"segment_id": str(node.segment_id)})
+        self._gen_nodes(xmlgen, (node, ))
     # Python 2 and 3 compatible type checking
     _gen_node.__annotations__ = {"xmlgen": XMLGenerator, "node": AbstractNode}
-    
+
+    def _gen_edges(self, xmlgen, edges, chunk_size = None):
+        """Generate a series of <edge> tags for the given ``edges``."""
+        self._gen_edge_rows(xmlgen, map(attrgetter("src_node", "sink_node", "switch_id", "metadata"), edges),
+                chunk_size)
+    # Python 2 and 3 compatible type checking
+    _gen_edges.__annotations__ = {"xmlgen": XMLGenerator, "edges": Iterable[AbstractEdge],
+            "chunk_size": Optional[int]}
+
+    def _gen_edge_rows(self, xmlgen, rows, chunk_size = None, metadata = None):
+        """Generate a series of <edge> tags for the given ``rows`` of source node, sink node, switch and metadata.
+
+        Rows are pulled in chunks of ``chunk_size``. Runs of edges without metadata are formatted with a precompiled
+        template, joined and written out with a single `write_raw` call. If ``metadata`` is given, the last field of
+        each row is an index into it, and 0 means no metadata.
+        """
+        fmt = xmlgen.element_template("edge", ("src_node", "sink_node", "switch_id")).format
+        chunk_size = chunk_size or _edge_chunk_size
+        rows = iter(rows)
+        while True:
+            chunk = list(islice(rows, chunk_size))
+            if not chunk:
+                break
+            # ``fmt`` ignores the trailing metadata field
+            start = 0
+            for i in compress(count(), map(itemgetter(3), chunk)):
+                if i > start:
+                    xmlgen.write_raw("".join(starmap(fmt, chunk[start:i])).encode("ascii"))
+                src_node, sink_node, switch_id, meta = chunk[i]
+                self._gen_edge(xmlgen, _EdgeRow(src_node, sink_node, switch_id,
+                    meta if metadata is None else metadata[meta]))
+                start = i + 1
+            if start < len(chunk):
+                xmlgen.write_raw("".join(starmap(fmt, chunk[start:] if start else chunk)).encode("ascii"))
+    # Python 2 and 3 compatible type checking
+    _gen_edge_rows.__annotations__ = {"xmlgen": XMLGenerator, "rows": Iterable[tuple], "chunk_size": Optional[int],
+            "metadata": Optional[Sequence[Mapping[str, Union[str, Iterable[str]]]]]}
+
     def _gen_edge(self, xmlgen, edge):
         """Generate a <edge> tag for the given ``edge``."""
         with xmlgen.element("edge", {
@@ -0,0 +1,680 @@
+from future.utils import iteritems
+from future.builtins import object, range
+
+from vprgen.abstractbased._abstract import AbstractTile, AbstractTopPbType
+
+from typing import Iterable, Optional, Callable, List, Mapping
+from collections import namedtuple
+from array import array
+from bisect import bisect_right
+from itertools import product
+import re
+
+_lowest_priority = -(1 << 31)
+
+def _frozen_metadata(metadata):
+    """Hashable form of tile metadata."""
+    if metadata is None:
+        return None
+    return frozenset((k, v if isinstance(v, str) else tuple(v)) for k, v in iteritems(metadata))
+
+def _tile_key(tile):
+    """Hashable key of the attributes of ``tile`` which end up in the generated files."""
+    return (tile.type_, tile.block_type_id, tile.xoffset, tile.yoffset, _frozen_metadata(tile.metadata))
+
+# ----------------------------------------------------------------------------
+# -- Grid Patterns -----------------------------------------------------------
+# ----------------------------------------------------------------------------
+class GridPattern(namedtuple("GridPattern", "block priority startx endx incrx repeatx starty endy incry repeaty "
+        "metadata")):
+    """A rectangular, optionally periodic placement of one type of block, following the semantics of the <region>
+    tag in VPR's <fixed_layout>.
+
+    The block is placed at every ``x`` in ``range(startx, endx + 1, incrx)`` and every ``y`` in
+    ``range(starty, endy + 1, incry)``. If ``repeatx`` is set, the range along x is repeated every ``repeatx`` tiles
+    until it starts outside of the grid, and likewise for ``repeaty``. Placements which do not fit in the grid are
+    skipped. A placement overrides the blocks it overlaps if its priority is higher than or equal to theirs, and
+    overlapped blocks are removed as a whole.
+
+    ``block`` is an `AbstractTopPbType`, or None for "EMPTY". ``endx`` and ``endy`` are the last root positions, and
+    default to the last column and row of the grid. Note that in the <region> tag, they are the last cells covered by
+    the block instead, which `from_layout_tag` and `to_layout_tag` convert from and to. ``incrx`` and ``incry``
+    default to the width and height of the block. ``metadata`` is attached to the root tile of each placed block.
+
+    Use the `fill`, `col`, `row`, `region` and `single` constructors, named after the corresponding VPR tags.
+    """
+    @classmethod
+    def fill(cls, block, priority = 1):
+        """Fill the whole grid with ``block``."""
+        return cls(block, priority, 0, None, None, None, 0, None, None, None, None)
+
+    @classmethod
+    def col(cls, block, startx, repeatx = None, starty = 0, incry = None, priority = 1):
+        """Place ``block`` in column ``startx``, repeated every ``repeatx`` columns."""
+        return cls(block, priority, startx, startx, None, repeatx, starty, None, incry, None, None)
+
+    @classmethod
+    def row(cls, block, starty, repeaty = None, startx = 0, incrx = None, priority = 1):
+        """Place ``block`` in row ``starty``, repeated every ``repeaty`` rows."""
+        return cls(block, priority, startx, None, incrx, None, starty, starty, None, repeaty, None)
+
+    @classmethod
+    def region(cls, block, startx = 0, endx = None, starty = 0, endy = None, incrx = None, incry = None,
+            repeatx = None, repeaty = None, priority = 1):
+        """Place ``block`` in a rectangular region, optionally repeated."""
+        return cls(block, priority, startx, endx, incrx, repeatx, starty, endy, incry, repeaty, None)
+
+    @classmethod
+    def single(cls, block, x, y, priority = 1, metadata = None):
+        """Place one ``block`` at (``x``, ``y``)."""
+        return cls(block, priority, x, x, None, None, y, y, None, None, metadata)
+
+    @classmethod
+    def from_layout_tag(cls, tag, attrs, block, width, height):
+        """Convert a tag under <fixed_layout> into patterns.
+
+        Args:
+            tag (:obj:`str`): one of "fill", "perimeter", "corners", "single", "col", "row" and "region"
+            attrs (:obj:`Mapping` [:obj:`str`, :obj:`str` ]): attributes of the tag, not including "type"
+            block (`AbstractTopPbType`): the block placed, or None for "EMPTY"
+            width (:obj:`int`): width of the grid
+            height (:obj:`int`): height of the grid
+
+        Returns:
+            :obj:`list` [`GridPattern` ]:
+        """
+        w, h = _block_size(block)
+        def get(key, default = None):
+            return _evaluate(attrs.get(key, default), width, height, w, h)
+        priority = get("priority", "1")
+        if tag == "fill":
+            return [cls.fill(block, priority)]
+        elif tag == "perimeter":
+            return [cls.col(block, 0, priority = priority), cls.col(block, width - w, priority = priority),
+                    cls.row(block, 0, priority = priority), cls.row(block, height - h, priority = priority)]
+        elif tag == "corners":
+            return [cls.single(block, x, y, priority) for x in (0, width - w) for y in (0, height - h)]
+        elif tag == "single":
+            return [cls.single(block, get("x"), get("y"), priority)]
+        elif tag == "col":
+            return [cls.col(block, get("startx"), get("repeatx"), get("starty", "0"), get("incry"), priority)]
+        elif tag == "row":
+            return [cls.row(block, get("starty"), get("repeaty"), get("startx", "0"), get("incrx"), priority)]
+        elif tag == "region":
+            # ``endx`` and ``endy`` of the tag are the last cells covered, not the last roots
+            endx, endy = get("endx"), get("endy")
+            return [cls.region(block, get("startx", "0"), None if endx is None else endx - w + 1,
+                get("starty", "0"), None if endy is None else endy - h + 1,
+                get("incrx"), get("incry"), get("repeatx"), get("repeaty"), priority)]
+        raise ValueError("Unknown tag under <fixed_layout>: {}".format(tag))
+    # Python 2 and 3 compatible type checking
+    from_layout_tag.__func__.__annotations__ = {"tag": str, "attrs": Mapping[str, str],
+            "block": Optional[AbstractTopPbType], "width": int, "height": int, "return": List["GridPattern"]}
+
+    def to_layout_tag(self):
+        """Convert this pattern into a tag under <fixed_layout>.
+
+        Returns:
+            (:obj:`str`, :obj:`list` [(:obj:`str`, :obj:`str`)]): name and attributes of the tag, in order
+        """
+        incr = (self.incrx, self.incry)
+        if (self.startx == self.starty == 0 and self.endx is self.endy is None and
+                incr == (None, None) and self.repeatx is self.repeaty is None):
+            tag, attrs = "fill", ()
+        elif self.startx == self.endx and self.starty == self.endy and self.repeatx is self.repeaty is None:
+            tag, attrs = "single", (("x", self.startx), ("y", self.starty))
+        elif (self.startx == self.endx and self.endy is None and self.incrx is None and self.repeaty is None):
+            tag, attrs = "col", (("startx", self.startx), ("repeatx", self.repeatx), ("starty", self.starty or None),
+                    ("incry", self.incry))
+        elif (self.starty == self.endy and self.endx is None and self.incry is None and self.repeatx is None):
+            tag, attrs = "row", (("starty", self.starty), ("repeaty", self.repeaty), ("startx", self.startx or None),
+                    ("incrx", self.incrx))
+        else:
+            # ``endx`` and ``endy`` of the tag are the last cells covered, not the last roots
+            w, h = _block_size(self.block)
+            tag, attrs = "region", (("startx", self.startx),
+                    ("endx", None if self.endx is None else self.endx + w - 1), ("repeatx", self.repeatx),
+                    ("incrx", self.incrx), ("starty", self.starty),
+                    ("endy", None if self.endy is None else self.endy + h - 1), ("repeaty", self.repeaty),
+                    ("incry", self.incry))
+        attrs = [("type", "EMPTY" if self.block is None else self.block.name)] + [(k, str(v)) for k, v in attrs
+                if v is not None] + [("priority", str(self.priority))]
+        return tag, attrs
+
+    def iter_positions(self, width, height):
+        """Iterate the root positions of the blocks placed by this pattern in a ``width`` x ``height`` grid, in the
+        order they are placed."""
+        w, h = _block_size(self.block)
+        xs = list(_positions(self.startx, self.endx, self.incrx or w, self.repeatx, w, width))
+        for x in xs:
+            for y in _positions(self.starty, self.endy, self.incry or h, self.repeaty, h, height):
+                yield x, y
+
+def _progressions(values):
+    """Greedily split sorted ``values`` into arithmetic progressions, returned as (first, last, step) tuples. The step
+    of a progression with one value is None."""
+    remaining = list(values)
+    while remaining:
+        first = remaining[0]
+        if len(remaining) == 1:
+            yield first, first, None
+            return
+        step, members = remaining[1] - first, set(remaining)
+        last = first
+        while last + step in members:
+            last += step
+        yield first, last, step
+        taken = set(range(first, last + 1, step))
+        remaining = [v for v in remaining if v not in taken]
+
+def _block_size(block):
+    """Width and height of ``block``, or of an empty tile if it is None."""
+    return (1, 1) if block is None else (block.width, block.height)
+
+_expression_token = re.compile(r"\s*(?:(\d+)|([WHwh])|([-+*/()]))")
+
+def _evaluate(expression, W, H, w, h):
+    """Evaluate an integer expression of a <fixed_layout> attribute, which may use the grid size ``W`` and ``H``, and
+    the block size ``w`` and ``h``, the operators ``+``, ``-``, ``*`` and ``/``, and parentheses. Division is integer
+    division truncating toward zero, as in VPR.
+
+    Raises:
+        `ValueError`: if the expression is not valid
+    """
+    if expression is None:
+        return None
+    def error():
+        return ValueError("Unsupported expression in <fixed_layout>: {}".format(expression))
+    variables = {"W": W, "H": H, "w": w, "h": h}
+    tokens, pos, expression = [], 0, expression.rstrip()
+    while pos < len(expression):
+        match = _expression_token.match(expression, pos)
+        if match is None:
+            raise error()
+        number, variable, operator = match.groups()
+        tokens.append(int(number) if number is not None else variables[variable] if variable is not None
+                else operator)
+        pos = match.end()
+    tokens.append(None)
+    def parse_sum(i):
+        value, i = parse_product(i)
+        while tokens[i] in ("+", "-"):
+            rhs, j = parse_product(i + 1)
+            value, i = value + rhs if tokens[i] == "+" else value - rhs, j
+        return value, i
+    def parse_product(i):
+        value, i = parse_atom(i)
+        while tokens[i] in ("*", "/"):
+            rhs, j = parse_atom(i + 1)
+            if tokens[i] == "*":
+                value = value * rhs
+            elif rhs == 0:
+                raise ValueError("Division by zero in <fixed_layout> expression: {}".format(expression))
+            else:
+                value = abs(value) // abs(rhs) * (1 if (value < 0) == (rhs < 0) else -1)
+            i = j
+        return value, i
+    def parse_atom(i):
+        token = tokens[i]
+        if token == "(":
+            value, i = parse_sum(i + 1)
+            if tokens[i] != ")":
+                raise error()
+            return value, i + 1
+        elif isinstance(token, int) and not isinstance(token, bool):
+            return token, i + 1
+        raise error()
+    value, i = parse_sum(0)
+    if tokens[i] is not None:
+        raise error()
+    return value
+
+def _positions(start, end, incr, repeat, size, limit):
+    """Positions along one axis of a pattern. Positions where a block of ``size`` would not fit are skipped."""
+    end = limit - 1 if end is None else end
+    offset = 0
+    while start + offset < limit:
+        for p in range(start + offset, min(end + offset, limit - size) + 1, incr):
+            yield p
+        if not repeat:
+            break
+        offset += repeat
+
+class _LayoutResolver(object):
+    """Resolves patterns into a grid incrementally, following the semantics of VPR's <fixed_layout>.
+
+    Besides the placements, the resolver keeps the layout key, i.e. block name, offsets and metadata of root tiles,
+    of each location as a number, so that resolved layouts can be compared quickly. Resolvers created with ``share``
+    number layout keys the same way.
+
+    Args:
+        width (:obj:`int`): width of the grid
+        height (:obj:`int`): height of the grid
+        share (`_LayoutResolver`): another resolver to share the numbering of layout keys with
+    """
+    def __init__(self, width, height, share = None):
+        self.width, self.height = width, height
+        self.owners = array("l", [-1]) * (width * height)   # index of the placement covering each location, or -1
+        self.priorities = array("l", [_lowest_priority]) * (width * height)
+        self.placements = []    # (x, y, pattern) of each placement
+        self.layout = array("l", [0]) * (width * height)    # layout key number of each location. 0 means empty
+        if share is None:
+            self.keys, self.numbers = [None], {None: 0}
+        else:
+            self.keys, self.numbers = share.keys, share.numbers
+        self.__cached = {}      # (pattern identity, xoffset, yoffset) -> layout key number
+
+    def number(self, block, xoffset, yoffset, metadata):
+        """Get the number of a layout key."""
+        key = (block.name, xoffset, yoffset, _frozen_metadata(metadata))
+        number = self.numbers.get(key)
+        if number is None:
+            number = self.numbers[key] = len(self.keys)
+            self.keys.append(key)
+        return number
+
+    def apply(self, patterns):
+        """Resolve ``patterns`` on top of the ones already applied."""
+        height, owners, priorities, placements = self.height, self.owners, self.priorities, self.placements
+        dirty = []
+        for pattern in patterns:
+            w, h = _block_size(pattern.block)
+            priority = pattern.priority
+            if (pattern.startx == pattern.endx and pattern.starty == pattern.endy and
+                    pattern.repeatx is pattern.repeaty is None):
+                positions = ((pattern.startx, pattern.starty), ) if (pattern.startx + w <= self.width and
+                        pattern.starty + h <= height) else ()
+            else:
+                positions = pattern.iter_positions(self.width, height)
+            for x, y in positions:
+                placement = len(placements)
+                if w == h == 1:
+                    c = x * height + y
+                    if priority < priorities[c]:
+                        continue
+                    ripped = (owners[c], )
+                    owners[c], priorities[c] = placement, priority
+                    dirty.append(c)
+                else:
+                    cells = [(x + i) * height + y + j for i in range(w) for j in range(h)]
+                    if priority < max(priorities[c] for c in cells):
+                        continue
+                    ripped = set(owners[c] for c in cells)
+                    for c in cells:
+                        owners[c], priorities[c] = placement, priority
+                    dirty.extend(cells)
+                placements.append((x, y, pattern))
+                # remove the rest of the overlapped blocks
+                for other in ripped:
+                    if other >= 0:
+                        ox, oy, opattern = placements[other]
+                        ow, oh = _block_size(opattern.block)
+                        for c in ((ox + i) * height + oy + j for i in range(ow) for j in range(oh)):
+                            if owners[c] == other:
+                                owners[c] = -1
+                                dirty.append(c)
+        layout, cached = self.layout, self.__cached
+        for c in dirty:
+            owner = owners[c]
+            if owner < 0:
+                layout[c] = 0
+                continue
+            ox, oy, pattern = placements[owner]
+            if pattern.block is None:
+                layout[c] = 0
+                continue
+            x, y = divmod(c, height)
+            cache_key = (id(pattern), x - ox, y - oy)
+            number = cached.get(cache_key)
+            if number is None:
+                number = cached[cache_key] = self.number(pattern.block, x - ox, y - oy,
+                        pattern.metadata if x == ox and y == oy else None)
+            layout[c] = number
+        return self
+
+# ----------------------------------------------------------------------------
+# -- Tile Grid ---------------------------------------------------------------
+# ----------------------------------------------------------------------------
+class TileGrid(object):
+    """Materialized grid of tiles, stored as runs of equal tiles along each row.
+
+    Tiles with the same attributes are stored once, so the grid of a regular device takes memory proportional to the
+    number of runs, not the number of locations. The grid is built from `ArchitectureDelegate.get_tile`, calling it
+    once per location, from anchor tiles only, or from `GridPattern` objects without calling `get_tile` at all.
+
+    Args:
+        width (:obj:`int`): width of the grid
+        height (:obj:`int`): height of the grid
+    """
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.__tiles = [None]   # distinct tiles, indexed by the tile indices stored in rows. 0 means empty
+        self.__indices = {}     # tile key -> tile index
+        # for each row, the x where each run starts and the tile index of each run
+        self.__rows = [(array("l", [0]), array("l", [0])) for _ in range(height)]
+
+    def __index(self, tile):
+        if tile is None:
+            return 0
+        key = _tile_key(tile)
+        try:
+            return self.__indices[key]
+        except KeyError:
+            index = self.__indices[key] = len(self.__tiles)
+            self.__tiles.append(tile)
+            return index
+
+    @classmethod
+    def from_delegate(cls, delegate):
+        """Materialize the grid of an `ArchitectureDelegate`, calling `get_tile` once per location."""
+        width, height = delegate.width, delegate.height
+        grid = cls(width, height)
+        rows, index = [(array("l"), array("l")) for _ in range(height)], grid.__index
+        last = [None] * height
+        for x in range(width):
+            for y in range(height):
+                i = index(delegate.get_tile(x, y))
+                if i != last[y]:
+                    last[y] = i
+                    starts, indices = rows[y]
+                    starts.append(x)
+                    indices.append(i)
+        if width:
+            grid.__rows = rows
+        return grid
+    # Python 2 and 3 compatible type checking
+    from_delegate.__func__.__annotations__ = {"return": "TileGrid"}
+
+    @classmethod
+    def from_patterns(cls, width, height, patterns, tile_factory = None):
+        """Build the grid from layout patterns, without calling `get_tile`.
+
+        Patterns are applied in order. A temporary dense array of the grid is used while resolving the patterns.
+
+        Args:
+            width (:obj:`int`): width of the grid
+            height (:obj:`int`): height of the grid
+            patterns (:obj:`Iterable` [`GridPattern` ]): the patterns
+            tile_factory (:obj:`Callable`): called with the block, the x and y offsets, and the metadata to create
+                each distinct tile. Defaults to creating `namedtuplebased.Tile` objects
+        """
+        if tile_factory is None:
+            from vprgen.abstractbased.impl.namedtuplebased import Tile
+            def tile_factory(block, xoffset, yoffset, metadata):
+                return Tile(block.name, block.id_, xoffset, yoffset, metadata)
+        resolver = _LayoutResolver(width, height).apply(patterns)
+        owners, placements = resolver.owners, resolver.placements
+        grid = cls(width, height)
+        tiles = {}      # (pattern identity, xoffset, yoffset) -> tile index
+        for y in range(height):
+            starts, indices = grid.__rows[y] = array("l"), array("l")
+            for x in range(width):
+                owner = owners[x * height + y]
+                if owner < 0 or placements[owner][2].block is None:
+                    i = 0
+                else:
+                    ox, oy, pattern = placements[owner]
+                    key = (id(pattern), x - ox, y - oy)
+                    i = tiles.get(key)
+                    if i is None:
+                        i = tiles[key] = grid.__index(tile_factory(pattern.block, x - ox, y - oy,
+                            pattern.metadata if x == ox and y == oy else None))
+                if not indices or indices[-1] != i:
+                    starts.append(x)
+                    indices.append(i)
+        return grid
+    # Python 2 and 3 compatible type checking
+    from_patterns.__func__.__annotations__ = {"width": int, "height": int, "patterns": Iterable[GridPattern],
+            "tile_factory": Optional[Callable], "return": "TileGrid"}
+
+    @classmethod
+    def from_anchors(cls, width, height, anchors, blocks, tile_factory = None):
+        """Build the grid from anchor tiles only, e.g. from `ArchitectureDelegate.iter_tiles`.
+
+        The offset tiles of each anchor are filled in from the width and height of its block, and all other
+        locations are empty. Memory used while building is proportional to the number of occupied locations. If
+        blocks overlap, the anchor yielded last wins.
+
+        Args:
+            width (:obj:`int`): width of the grid
+            height (:obj:`int`): height of the grid
+            anchors (:obj:`Iterable` [:obj:`tuple` [:obj:`int`, :obj:`int`, `AbstractTile` ]]): (x, y, tile) of each
+                anchor tile, i.e. tile with zero offsets
+            blocks (:obj:`Iterable` [`AbstractTopPbType` ]): the complex blocks, looked up by the block type id of
+                each anchor
+            tile_factory (:obj:`Callable`): called with the anchor tile and the x and y offsets to create each distinct
+                offset tile. Defaults to creating `namedtuplebased.Tile` objects
+        """
+        if tile_factory is None:
+            from vprgen.abstractbased.impl.namedtuplebased import Tile
+            def tile_factory(anchor, xoffset, yoffset):
+                return Tile(anchor.type_, anchor.block_type_id, xoffset, yoffset)
+        sizes = {block.id_: _block_size(block) for block in blocks}
+        grid = cls(width, height)
+        cells = [{} for _ in range(height)]     # for each row, x -> tile index
+        offsets = {}    # (anchor tile index, xoffset, yoffset) -> tile index
+        for x, y, tile in anchors:
+            i = grid.__index(tile)
+            w, h = sizes[tile.block_type_id]
+            for xoffset, yoffset in product(range(w), range(h)):
+                if xoffset or yoffset:
+                    key = (i, xoffset, yoffset)
+                    j = offsets.get(key)
+                    if j is None:
+                        j = offsets[key] = grid.__index(tile_factory(tile, xoffset, yoffset))
+                else:
+                    j = i
+                cells[y + yoffset][x + xoffset] = j
+        for y, row in enumerate(cells):
+            starts, indices = grid.__rows[y] = array("l"), array("l")
+            # empty runs fill the gaps between occupied locations
+            next_x = 0
+            for x in sorted(row):
+                for start, i in ((next_x, 0), (x, row[x])) if x > next_x else ((x, row[x]), ):
+                    if not indices or indices[-1] != i:
+                        starts.append(start)
+                        indices.append(i)
+                next_x = x + 1
+            if next_x < width and (not indices or indices[-1] != 0):
+                starts.append(next_x)
+                indices.append(0)
+        return grid
+    # Python 2 and 3 compatible type checking
+    from_anchors.__func__.__annotations__ = {"width": int, "height": int,
+            "anchors": Iterable[tuple], "blocks": Iterable[AbstractTopPbType], "tile_factory": Optional[Callable],
+            "return": "TileGrid"}
+
+    @property
+    def run_count(self):
+        """Total number of runs stored."""
+        return sum(len(starts) for starts, _ in self.__rows)
+
+    @property
+    def tiles(self):
+        """The distinct tiles in the grid, not including empty tiles."""
+        return self.__tiles[1:]
+
+    def get_tile(self, x, y):
+        """Get the tile at (x, y), or None if it is empty."""
+        starts, indices = self.__rows[y]
+        return self.__tiles[indices[bisect_right(starts, x) - 1]]
+    # Python 2 and 3 compatible type checking
+    get_tile.__annotations__ = {"x": int, "y": int, "return": Optional[AbstractTile]}
+
+    def iter_row_runs(self, y):
+        """Iterate the runs of row ``y`` as (xstart, xend, tile) tuples, where ``xend`` is exclusive."""
+        starts, indices = self.__rows[y]
+        for i in range(len(starts)):
+            yield starts[i], starts[i + 1] if i + 1 < len(starts) else self.width, self.__tiles[indices[i]]
+
+    def __iter__(self):
+        """Iterate (x, y, tile) for every location, in the same order as ``product(range(width), range(height))``."""
+        tiles, rows, height = self.__tiles, self.__rows, self.height
+        cursors = [0] * height
+        for x in range(self.width):
+            for y in range(height):
+                starts, indices = rows[y]
+                i = cursors[y]
+                # every run is at least one tile long, so the cursor moves by at most one run per column
+                if i + 1 < len(starts) and starts[i + 1] == x:
+                    i = cursors[y] = i + 1
+                yield x, y, tiles[indices[i]]
+
+    def block_type_ids(self):
+        """Get the block type id at each location, indexed by ``x * height + y``. Empty locations are 0.
+
+        Returns:
+            `array.array`:
+        """
+        height = self.height
+        ids = array("l", [0]) * (self.width * height)
+        for y in range(height):
+            for xstart, xend, tile in self.iter_row_runs(y):
+                if tile is not None:
+                    for x in range(xstart, xend):
+                        ids[x * height + y] = tile.block_type_id
+        return ids
+
+    def to_patterns(self, blocks):
+        """Describe the grid with as few `GridPattern` objects as possible.
+
+        The grid is first described with one single placement per block at priority 1, which is what the grid
+        resolves to in VPR. Then a fill with the most common single-tile block type is taken as the base layer,
+        stacks of blocks along columns and then along rows which the layers below get wrong are described with
+        column, row and region patterns, and the remaining differences with single placements at increasing
+        priorities. Each layer is resolved incrementally on top of the ones below and, if the final result is not
+        identical to the one of the single placements, the single placements are returned instead.
+
+        Args:
+            blocks (:obj:`Iterable` [`AbstractTopPbType` ]): the blocks referred to by the tiles
+
+        Returns:
+            :obj:`list` [`GridPattern` ]: patterns in the order of increasing priority
+        """
+        blocks = {block.name: block for block in blocks}
+        width, height = self.width, self.height
+        singles = [GridPattern.single(blocks[tile.type_], x, y, 1, tile.metadata) for x, y, tile in self
+                if tile is not None and tile.xoffset == 0 and tile.yoffset == 0]
+        target = self.__layout(blocks)
+        if target is None:
+            target = _LayoutResolver(width, height).apply(singles)
+        resolver = _LayoutResolver(width, height, target)
+        keys, target = target.keys, target.layout
+        # 1. fill with the most common single-tile block type, or leave the grid empty
+        counts = {}
+        for number in target:
+            counts[number] = counts.get(number, 0) + 1
+        fills = {}
+        for number, count in iteritems(counts):
+            key = keys[number]
+            if key is not None and key[3] is None and _block_size(blocks[key[0]]) == (1, 1):
+                fills[key[0]] = count
+        patterns = []
+        if fills and 2 * max(fills.values()) > counts.get(0, 0):
+            patterns.append(GridPattern.fill(blocks[max(sorted(fills), key = fills.get)]))
+        resolver.apply(patterns)
+        # 2. stacks along columns, then 3. along rows
+        for axis, priority in ((0, 2), (1, 3)):
+            resolved, applied = resolver.layout, len(patterns)
+            lines = {}  # x for columns, y for rows -> [(position along the line, block), ...]
+            for x, y in product(range(width), range(height)):
+                key = keys[target[x * height + y]]
+                if key is None:
+                    block = None
+                elif key[1] == key[2] == 0 and key[3] is None:
+                    block = blocks[key[0]]
+                else:
+                    continue
+                w, h = _block_size(block)
+                if any(resolved[c] != target[c] for c in ((x + i) * height + y + j for i in range(w)
+                        for j in range(h))):
+                    line, position = (x, y) if axis == 0 else (y, x)
+                    lines.setdefault(line, []).append((position, block))
+            stacks = {}  # (block, first position, last position) -> [line, ...]
+            for line, members in sorted(iteritems(lines)):
+                start, last, block = None, None, None
+                for position, b in members + [(None, None)]:
+                    if (start is not None and position is not None and b is block and
+                            position == last + _block_size(b)[axis ^ 1]):
+                        last = position
+                        continue
+                    if start is not None and last > start:
+                        stacks.setdefault((block, start, last), []).append(line)
+                    start, last, block = position, position, b
+            for (block, start, last), members in sorted(iteritems(stacks), key = lambda item: (item[0][1:],
+                    item[1])):
+                size = _block_size(block)
+                for first, final, step in _progressions(members):
+                    patterns.append(self.__stack_pattern(block, axis, first, final, step, start, last, size,
+                        priority))
+            resolver.apply(patterns[applied:])
+        # 4. single placements for the rest
+        for priority in range(4, 8):
+            resolved, applied = resolver.layout, len(patterns)
+            if resolved == target:
+                return patterns
+            roots = set()
+            for x, y in product(range(width), range(height)):
+                c = x * height + y
+                if resolved[c] != target[c]:
+                    key = keys[target[c]]
+                    roots.add((x, y) if key is None else (x - key[1], y - key[2]))
+            for x, y in sorted(roots):
+                key = keys[target[x * height + y]]
+                tile = None if key is None else self.get_tile(x, y)
+                patterns.append(GridPattern.single(None if key is None else blocks[key[0]], x, y, priority,
+                    None if tile is None else tile.metadata))
+            resolver.apply(patterns[applied:])
+        return patterns if resolver.layout == target else singles
+    # Python 2 and 3 compatible type checking
+    to_patterns.__annotations__ = {"blocks": Iterable[AbstractTopPbType], "return": List[GridPattern]}
+
+    def __layout(self, blocks):
+        """Resolve the layout directly from the tiles, if every block in the grid is complete, so that one single
+        placement per block resolves to the same grid.
+
+        Returns:
+            `_LayoutResolver`: a resolver with the layout of the grid and nothing applied, or None
+        """
+        width, height = self.width, self.height
+        resolver = _LayoutResolver(width, height)
+        layout, tiles = resolver.layout, []
+        for x, y, tile in self:
+            tiles.append(tile)
+            if tile is not None:
+                layout[x * height + y] = resolver.number(blocks[tile.type_], tile.xoffset, tile.yoffset,
+                        tile.metadata if tile.xoffset == 0 and tile.yoffset == 0 else None)
+        keys = resolver.keys
+        for c, tile in enumerate(tiles):
+            if tile is None:
+                continue
+            x, y = divmod(c, height)
+            rx, ry = x - tile.xoffset, y - tile.yoffset
+            w, h = _block_size(blocks[tile.type_])
+            if not (0 <= rx and rx + w <= width and 0 <= ry and ry + h <= height):
+                return None
+            root = keys[layout[rx * height + ry]]
+            if root is None or root[0] != tile.type_ or root[1:3] != (0, 0):
+                return None
+            if tile.xoffset == tile.yoffset == 0:
+                for i, j in product(range(w), range(h)):
+                    key = keys[layout[(x + i) * height + y + j]]
+                    if key is None or key[:3] != (tile.type_, i, j):
+                        return None
+        return resolver
+
+    def __stack_pattern(self, block, axis, first, final, step, start, last, size, priority):
+        """Pattern placing ``block`` stacked from ``start`` to ``last`` along lines ``first`` to ``final`` every
+        ``step``. Lines are columns if ``axis`` is 0, or rows if it is 1."""
+        extent = (self.width, self.height)
+        # the stack reaches the end of each line, and the lines repeat until the end of the grid
+        to_end = last + 2 * size[axis ^ 1] > extent[axis ^ 1]
+        repeated = step is None or final + step > extent[axis] - size[axis]
+        if to_end and repeated:
+            if axis == 0:
+                return GridPattern.col(block, first, step, start, priority = priority)
+            return GridPattern.row(block, first, step, start, priority = priority)
+        elif axis == 0:
+            return GridPattern.region(block, first, final, start, last, incrx = step, priority = priority)
+        return GridPattern.region(block, start, last, first, final, incry = step, priority = priority)
@@ -0,0 +1,175 @@
+from future.builtins import object, range
+
+from vprgen.abstractbased._abstract import NodeType, Side, PinLocationsPattern
+from vprgen.abstractbased._columnar import _require_numpy
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from typing import Optional, Mapping, Iterator
+import re
+
+_batch_size = 65536
+# VPR's order of sides when spreading pins
+_spread_sides = (Side.top, Side.right, Side.bottom, Side.left)
+_port_spec = re.compile(r"^[^.\[\]]+(?:\[(\d+)(?::(\d+))?\])?\.([^.\[\]]+)(?:\[(\d+)(?::(\d+))?\])?$")
+
+def _index_range(hi, lo, size):
+    """Indices selected by ``[hi:lo]``, ``[hi]`` or nothing in a port specification."""
+    if hi is None:
+        return range(size)
+    hi = int(hi)
+    lo = hi if lo is None else int(lo)
+    return range(min(hi, lo), max(hi, lo) + 1)
+
+def _pin_positions(block, table):
+    """Get the (xoffset, yoffset, side) of each pin of ``block``, indexed by ptc.
+
+    Pins of a "custom" pattern are placed where they are listed. Otherwise pins are assigned round-robin to the
+    positions of the pattern, in the same order as VPR: "spread" uses every side of every tile of the block,
+    "perimeter" uses the sides facing out of the block, and "spread_inputs_perimeter_outputs" spreads inputs and
+    clocks, and places outputs on the perimeter. Blocks without <pinlocations> use "spread".
+    """
+    w, h = block.width, block.height
+    positions = [[] for _ in range(len(table))]
+    pinlocations = block.pinlocations
+    pattern = PinLocationsPattern.spread if pinlocations is None else pinlocations.pattern
+    if pattern is PinLocationsPattern.custom:
+        for loc in pinlocations.locs:
+            for spec in loc.ports:
+                match = _port_spec.match(spec)
+                if match is None:
+                    raise ValueError("Invalid port in <pinlocations> of block '{}': {}".format(block.name, spec))
+                zhi, zlo, port, hi, lo = match.groups()
+                for z in _index_range(zhi, zlo, block.capacity):
+                    try:
+                        first = table.ptc(port, 0, z)
+                    except KeyError:
+                        raise ValueError("Unknown port in <pinlocations> of block '{}': {}".format(block.name, spec))
+                    for bit in _index_range(hi, lo, table[first].port.num_pins):
+                        positions[first + bit].append((loc.xoffset, loc.yoffset, loc.side))
+        return positions
+    spread = [(x, y, side) for side in _spread_sides for x in range(w) for y in range(h)]
+    perimeter = [(x, y, side) for x in range(w) for y in range(h) for side in _spread_sides
+            if (side is Side.left and x == 0) or (side is Side.right and x == w - 1) or
+            (side is Side.bottom and y == 0) or (side is Side.top and y == h - 1)]
+    if pattern is PinLocationsPattern.spread_inputs_perimeter_outputs:
+        groups = ((spread, [pin for pin in table if pin.type_ == "INPUT"]),
+                (perimeter, [pin for pin in table if pin.type_ == "OUTPUT"]))
+    else:
+        groups = ((perimeter if pattern is PinLocationsPattern.perimeter else spread, list(table)), )
+    for locs, pins in groups:
+        for i, pin in enumerate(pins):
+            positions[pin.ptc].append(locs[i % len(locs)])
+    return positions
+
+# ----------------------------------------------------------------------------
+# -- Pin Node Generator ------------------------------------------------------
+# ----------------------------------------------------------------------------
+class PinNodeGenerator(object):
+    """Generates the SOURCE, SINK, IPIN and OPIN nodes of every block in the grid, in the columnar form of
+    `ArchitectureDelegate.node_columns`.
+
+    The nodes of one block are laid out once per block type from the pin table of the block, so ptcs are the same as
+    in the generated <block_type> tags, and SOURCE/SINK nodes follow `ArchitectureDelegate.group_equivalent_pins`.
+    The layout is then offset to every block of the type with array arithmetic. Each block has a SOURCE or SINK node
+    per pin class, spanning the whole block, followed by an OPIN or IPIN node per pin per side it is on, see
+    `_pin_positions`. Node ids are consecutive: block types in the order of ``complex_blocks``, blocks in the order
+    of ``product(range(width), range(height))``, and nodes of a block in the order above.
+
+    Args:
+        delegate (`ArchitectureDelegate`):
+        grid (`TileGrid`): the materialized grid. If None, it is taken from the delegate
+        first_id (:obj:`int`): id of the first node
+    """
+    def __init__(self, delegate, grid = None, first_id = 0):
+        _require_numpy()
+        self.grid = grid = delegate._get_tile_grid() if grid is None else grid
+        anchors = {}    # block type id -> list of x * height + y
+        for y in range(grid.height):
+            for xstart, xend, tile in grid.iter_row_runs(y):
+                if tile is not None and tile.xoffset == 0 and tile.yoffset == 0:
+                    anchors.setdefault(tile.block_type_id, []).extend(x * grid.height + y
+                            for x in range(xstart, xend))
+        self.__blocks = []  # (block, layout columns, layout index, sorted anchor keys, first id)
+        self.__by_id = {}   # block type id -> index into __blocks
+        next_id = first_id
+        for block in delegate.complex_blocks:
+            keys = np.sort(np.array(anchors.get(block.id_, ()), dtype = np.int64))
+            layout, index = self.__layout(block, delegate.get_block_pin_table(block))
+            self.__by_id[block.id_] = len(self.__blocks)
+            self.__blocks.append((block, layout, index, keys, next_id))
+            next_id += len(keys) * len(layout["type"])
+        self.first_id = first_id
+        self.num_nodes = next_id - first_id
+
+    @staticmethod
+    def __layout(block, table):
+        """Lay out the nodes of one block relative to its root tile."""
+        rows = [(NodeType.SINK.value if pin_class.type_ == "INPUT" else NodeType.SOURCE.value,
+            0, 0, block.width - 1, block.height - 1, pin_class.index, 0) for pin_class in table.classes]
+        for pin, locs in zip(table, _pin_positions(block, table)):
+            type_ = NodeType.IPIN.value if pin.type_ == "INPUT" else NodeType.OPIN.value
+            rows.extend((type_, x, y, x, y, pin.ptc, side.value) for x, y, side in locs)
+        columns = np.array(rows, dtype = np.int64).reshape(-1, 7).T
+        layout = dict(zip(("type", "xlow", "ylow", "xhigh", "yhigh", "ptc", "side"), columns))
+        index = {(row[0], row[1], row[2], row[5], None if row[0] in (NodeType.SOURCE.value, NodeType.SINK.value)
+            else row[6]): i for i, row in enumerate(rows)}
+        return layout, index
+
+    def iter_batches(self, batch_size = None):
+        """Iterate the nodes in batches of about ``batch_size`` nodes, each a mapping from column names to arrays.
+
+        Columns are "id", "type", "xlow", "ylow", "xhigh", "yhigh", "ptc" and "side". The batches can be returned
+        from `ArchitectureDelegate.node_columns`, possibly chained with other batches.
+        """
+        batch_size = batch_size or _batch_size
+        height = self.grid.height
+        for block, layout, _, keys, first_id in self.__blocks:
+            size = len(layout["type"])
+            if not size or not len(keys):
+                continue
+            step = max(1, batch_size // size)
+            for start in range(0, len(keys), step):
+                chunk = keys[start:start + step]
+                x, y = (chunk // height)[:, None], (chunk % height)[:, None]
+                batch = {
+                        "id": np.arange(len(chunk) * size, dtype = np.int64) + (first_id + start * size),
+                        "type": np.tile(layout["type"], len(chunk)),
+                        "ptc": np.tile(layout["ptc"], len(chunk)),
+                        "side": np.tile(layout["side"], len(chunk)), }
+                for key, base in (("xlow", x), ("xhigh", x), ("ylow", y), ("yhigh", y)):
+                    batch[key] = (base + layout[key][None, :]).ravel()
+                yield batch
+    # Python 2 and 3 compatible type checking
+    iter_batches.__annotations__ = {"batch_size": Optional[int], "return": Iterator[Mapping]}
+
+    def get_node_id(self, x, y, type_, ptc, side = None):
+        """Get the id of a node, e.g. to connect it with edges.
+
+        Args:
+            x (:obj:`int`): the X position of the node. For SOURCE and SINK nodes, any tile of the block
+            y (:obj:`int`): the Y position of the node
+            type_ (`NodeType`): SOURCE, SINK, IPIN or OPIN
+            ptc (:obj:`int`): the ptc of the pin, or of the pin class for SOURCE and SINK nodes
+            side (`Side`): the side of IPIN and OPIN nodes
+
+        Raises:
+            `KeyError`: if there is no such node
+        """
+        tile = self.grid.get_tile(x, y)
+        if tile is None:
+            raise KeyError("No block at ({}, {})".format(x, y))
+        block, layout, index, keys, first_id = self.__blocks[self.__by_id[tile.block_type_id]]
+        x, y = x - tile.xoffset, y - tile.yoffset
+        if type_ in (NodeType.SOURCE, NodeType.SINK):
+            key = (type_.value, 0, 0, ptc, None)
+        else:
+            key = (type_.value, tile.xoffset, tile.yoffset, ptc, side.value)
+        position = int(np.searchsorted(keys, x * self.grid.height + y))
+        return first_id + position * len(layout["type"]) + index[key]
+    # Python 2 and 3 compatible type checking
+    get_node_id.__annotations__ = {"x": int, "y": int, "type_": NodeType, "ptc": int, "side": Optional[Side],
+            "return": int}
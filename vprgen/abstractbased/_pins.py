@@ -0,0 +1,101 @@
+from future.builtins import object, range
+
+from vprgen.abstractbased._abstract import AbstractTopPbType
+
+from collections import namedtuple
+from itertools import product
+
+_table_memo_size = 4096
+
+# ----------------------------------------------------------------------------
+# -- Block Pins --------------------------------------------------------------
+# ----------------------------------------------------------------------------
+class BlockPin(namedtuple("BlockPin", "ptc port bit z name type_ pin_class")):
+    """A pin of a block type in the routing resource graph.
+
+    ``port`` is the port of the block the pin belongs to, ``bit`` the index of the pin in the port, ``z`` the index
+    of the block instance in the tile, ``name`` the name of the pin in the <pin> tag, ``type_`` the type of its
+    pin class, "INPUT" or "OUTPUT", and ``pin_class`` the index of its pin class.
+    """
+    pass
+
+class BlockPinClass(namedtuple("BlockPinClass", "index type_ ptcs")):
+    """A pin class of a block type in the routing resource graph.
+
+    ``index`` is the ptc of the SOURCE or SINK node of the class, ``type_`` is "INPUT" or "OUTPUT", and ``ptcs`` are
+    the ptcs of the pins in the class.
+    """
+    pass
+
+class BlockPinTable(object):
+    """Pins of a block type, indexed by ptc.
+
+    Pins are numbered the same way VPR does: for each block instance in the tile, inputs, then outputs, then clocks.
+    By default, each pin is in a pin class of its own, so pin classes are numbered like pins. If
+    ``group_equivalent`` is set, the pins of each port declared ``equivalent`` share one pin class per block instance,
+    so that only one SOURCE or SINK node is needed for them. Use `of` to get the table of a block, which is built only
+    once per block object.
+
+    Args:
+        block (`AbstractTopPbType`):
+        group_equivalent (:obj:`bool`): if pins of equivalent ports are grouped into shared pin classes
+    """
+    __memo = {}     # (id(block), group_equivalent) -> (block, table). Blocks are kept alive so that ids are not reused
+
+    def __init__(self, block, group_equivalent = False):
+        self.block = block
+        self.group_equivalent = group_equivalent
+        self.classes = []
+        self.__pins = []
+        self.__ports = {}   # (z, port name) -> ptc of bit 0
+        for z, (type_, ports) in product(range(block.capacity),
+                (("INPUT", block.inputs),
+                    ("OUTPUT", block.outputs),
+                    ("INPUT", block.clocks), )):
+            for port in ports:
+                first = self.__ports[z, port.name] = len(self.__pins)
+                shared = group_equivalent and port.equivalent is not None and port.num_pins > 0
+                if shared:
+                    self.classes.append(BlockPinClass(len(self.classes), type_,
+                        tuple(range(first, first + port.num_pins))))
+                for bit in range(port.num_pins):
+                    if block.capacity == 1:
+                        name = "{}.{}[{}]".format(block.name, port.name, bit)
+                    else:
+                        name = "{}[{}].{}[{}]".format(block.name, z, port.name, bit)
+                    if not shared:
+                        self.classes.append(BlockPinClass(len(self.classes), type_, (first + bit, )))
+                    self.__pins.append(BlockPin(first + bit, port, bit, z, name, type_, len(self.classes) - 1))
+        # 1 for each output pin, indexed by ptc, and for each output pin class, indexed by class
+        self.outputs = bytearray(pin.type_ == "OUTPUT" for pin in self.__pins)
+        self.class_outputs = bytearray(pin_class.type_ == "OUTPUT" for pin_class in self.classes)
+
+    @classmethod
+    def of(cls, block, group_equivalent = False):
+        """Get the table of ``block``, memoized by the identity of the block."""
+        key = (id(block), group_equivalent)
+        try:
+            return cls.__memo[key][1]
+        except KeyError:
+            if len(cls.__memo) >= _table_memo_size:
+                cls.__memo.clear()
+            table = cls(block, group_equivalent)
+            cls.__memo[key] = block, table
+            return table
+    # Python 2 and 3 compatible type checking
+    of.__func__.__annotations__ = {"block": AbstractTopPbType, "group_equivalent": bool, "return": "BlockPinTable"}
+
+    def __len__(self):
+        return len(self.__pins)
+
+    def __iter__(self):
+        return iter(self.__pins)
+
+    def __getitem__(self, ptc):
+        return self.__pins[ptc]
+
+    def ptc(self, port, bit = 0, z = 0):
+        """Get the ptc of pin ``bit`` of ``port``, given by name, in block instance ``z``."""
+        return self.__ports[z, port] + bit
+    # Python 2 and 3 compatible type checking
+    ptc.__annotations__ = {"port": str, "bit": int, "z": int, "return": int}
@@ -0,0 +1,169 @@
+from future.builtins import object, range
+
+from vprgen.abstractbased._abstract import Side, SegmentDirection, SwitchBlockType
+from vprgen.abstractbased._columnar import _require_numpy
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from typing import Optional, Mapping, Iterator
+
+_batch_size = 65536
+
+def _connections(turns):
+    """Complete the turns of a switch block pattern with straight connections, which keep the index of the wire."""
+    connections = {(Side.left, Side.right): (1, 0), (Side.right, Side.left): (1, 0),
+            (Side.bottom, Side.top): (1, 0), (Side.top, Side.bottom): (1, 0), }
+    connections.update(turns)
+    return connections
+
+# switch block type -> (from side, to side) -> (sign, offset): the i-th wire coming in from one side connects to the
+# ``(sign * i + offset) % n``-th of the n wires going out to the other side, as in VPR's ``get_simple_switch``
+_patterns = {
+        SwitchBlockType.subset: _connections({
+            (Side.left, Side.top): (1, 0), (Side.left, Side.bottom): (1, 0),
+            (Side.right, Side.top): (1, 0), (Side.right, Side.bottom): (1, 0),
+            (Side.bottom, Side.left): (1, 0), (Side.bottom, Side.right): (1, 0),
+            (Side.top, Side.left): (1, 0), (Side.top, Side.right): (1, 0), }),
+        SwitchBlockType.wilton: _connections({
+            (Side.left, Side.top): (-1, 0), (Side.left, Side.bottom): (1, -1),
+            (Side.right, Side.top): (1, -1), (Side.right, Side.bottom): (-1, -2),
+            (Side.bottom, Side.left): (1, 1), (Side.bottom, Side.right): (-1, -2),
+            (Side.top, Side.left): (-1, 0), (Side.top, Side.right): (1, 1), }),
+        SwitchBlockType.universal: _connections({
+            (Side.left, Side.top): (-1, -1), (Side.left, Side.bottom): (1, 0),
+            (Side.right, Side.top): (1, 0), (Side.right, Side.bottom): (-1, -1),
+            (Side.bottom, Side.left): (1, 0), (Side.bottom, Side.right): (-1, -1),
+            (Side.top, Side.left): (-1, -1), (Side.top, Side.right): (1, 0), }),
+        }
+
+# ----------------------------------------------------------------------------
+# -- Switch Block Edge Generator ---------------------------------------------
+# ----------------------------------------------------------------------------
+class SwitchBlockEdgeGenerator(object):
+    """Generates the CHANX/CHANY to CHANX/CHANY edges of all switch blocks, in the columnar form of
+    `ArchitectureDelegate.edge_columns`, for the wires laid out by a `ChannelNodeGenerator`.
+
+    Switch block (x, y) joins position x and x + 1 of CHANX channel y, on its left and right side, and position y and
+    y + 1 of CHANY channel x, on its bottom and top side, for x from 0 to ``width - 2`` and y from 0 to
+    ``height - 2``. Wires are unidirectional: a wire is driven only by the switch block at its start, while it can
+    drive other wires from every switch block along it where the ``sb`` pattern of its segment is set, counted from its
+    start, as in VPR. Segments without ``sb`` pattern have a switch block at every position.
+
+    On each side, the wires coming in and the wires going out are numbered in the order of their tracks, and the i-th
+    wire coming in from a side connects to one wire going out to each other side, chosen by the `SwitchBlockType`
+    pattern from i and the number of wires going out. The switch of an edge is the ``mux`` of the segment of the wire
+    it drives. Switch blocks are computed one row at a time with array arithmetic, without per-wire objects.
+
+    Args:
+        delegate (`ArchitectureDelegate`):
+        chan_nodes (`ChannelNodeGenerator`): the CHANX and CHANY tracks
+        type_ (`SwitchBlockType`): the pattern. If None, ``switch_block_type`` of the delegate is used
+    """
+    def __init__(self, delegate, chan_nodes, type_ = None):
+        _require_numpy()
+        self.type_ = type_ = delegate.switch_block_type if type_ is None else type_
+        try:
+            self.__pattern = sorted(_patterns[type_].items(), key = lambda item: (item[0][0].value, item[0][1].value))
+        except KeyError:
+            raise ValueError("Unsupported switch block type: {}".format(type_))
+        self.chanx, self.chany = chan_nodes.chanx, chan_nodes.chany
+        switches = {switch.name: switch.id_ for switch in delegate.switches}
+        self.__sb = {}          # ChannelTracks -> sb pattern of each track, indexed by [track, offset]
+        self.__switches = {}    # ChannelTracks -> switch id of each track
+        for tracks in (self.chanx, self.chany):
+            patterns = np.zeros((len(tracks.segments), max([s.length for s in tracks.segments] or [0]) + 1),
+                    dtype = bool)
+            muxes = []
+            for i, segment in enumerate(tracks.segments):
+                sb = [bool(b) for b in segment.sb or ((True, ) * (segment.length + 1))]
+                if len(sb) != segment.length + 1:
+                    raise ValueError("The sb pattern of segment '{}' has {} entries, expecting {}".format(
+                        segment.name, len(sb), segment.length + 1))
+                patterns[i, :len(sb)] = sb
+                try:
+                    muxes.append(switches[segment.mux])
+                except KeyError:
+                    raise ValueError("Undefined mux switch '{}' of segment '{}'".format(segment.mux, segment.name))
+            self.__sb[tracks] = patterns[tracks.segment_index]
+            self.__switches[tracks] = np.array(muxes, dtype = np.int64)[tracks.segment_index]
+
+    def __sides(self, y):
+        """Get the wires of the switch blocks in row ``y``.
+
+        Returns:
+            :obj:`dict` [`Side`, :obj:`tuple` ]: (incoming, outgoing, tracks, ids) for each side. ``incoming`` and
+                ``outgoing`` are masks of the wires coming in from and going out to the side, and ``ids`` the ids of
+                the wires on the side, all indexed by ``[x, track]``
+        """
+        xs = np.arange(self.chany.num_channels)[:, None]
+        sides = {}
+        for tracks, chans, b, low_side, high_side in ((self.chanx, y, xs, Side.left, Side.right),
+                (self.chany, xs, y, Side.bottom, Side.top)):
+            t = np.arange(tracks.width)[None, :]
+            sb, lengths = self.__sb[tracks], tracks.lengths[t]
+            inc = tracks.directions[t] == SegmentDirection.INC_DIR.value
+            shape = (len(xs), tracks.width)
+            chans = np.broadcast_to(chans, shape)
+            # positions are clamped into the channel to look up ids, which are masked out where there is no wire
+            # low side: INC wires arrive through position b, DEC wires leave through it and end there
+            offsets = tracks.wire_offsets(chans, t, b)
+            valid = b >= 1
+            sides[low_side] = (inc & valid & sb[t, offsets + 1],
+                    ~inc & valid & ((offsets == lengths - 1) | (b == tracks.span)),
+                    tracks, tracks.locate(chans, t, np.maximum(b, 1))[0])
+            # high side: DEC wires arrive through position b + 1, INC wires leave through it and start there
+            offsets = tracks.wire_offsets(chans, t, b + 1)
+            valid = b + 1 <= tracks.span
+            sides[high_side] = (~inc & valid & sb[t, lengths - offsets],
+                    inc & valid & ((offsets == 0) | (b == 0)),
+                    tracks, tracks.locate(chans, t, np.minimum(b + 1, tracks.span))[0])
+        return sides
+
+    def __row_edges(self, y):
+        """Get the (src, sink, switch) arrays of the edges of the switch blocks in row ``y``."""
+        incoming, outgoing = {}, {}
+        for side, (in_mask, out_mask, tracks, ids) in self.__sides(y).items():
+            xs, in_tracks = np.nonzero(in_mask)
+            incoming[side] = xs, (np.cumsum(in_mask, axis = 1) - 1)[xs, in_tracks], ids[xs, in_tracks]
+            # wires going out, flattened in the order of [x, track]
+            counts = out_mask.sum(axis = 1)
+            out_tracks = np.nonzero(out_mask)[1]
+            outgoing[side] = counts, np.cumsum(counts) - counts, ids[out_mask], self.__switches[tracks][out_tracks]
+        result = []
+        for (from_side, to_side), (sign, offset) in self.__pattern:
+            xs, index, src = incoming[from_side]
+            counts, firsts, sinks, switches = outgoing[to_side]
+            n = counts[xs]
+            keep = n > 0
+            if not keep.all():
+                xs, index, src, n = xs[keep], index[keep], src[keep], n[keep]
+            if not len(xs):
+                continue
+            selected = firsts[xs] + (sign * index + offset) % n
+            result.append((src, sinks[selected], switches[selected]))
+        return result
+
+    def iter_batches(self, batch_size = None):
+        """Iterate the edges in batches of about ``batch_size`` edges, each a mapping from "src", "sink" and "switch"
+        to arrays. The batches can be returned from `ArchitectureDelegate.edge_columns`, possibly chained with other
+        batches."""
+        batch_size = batch_size or _batch_size
+        pending, size = [], 0
+        for y in range(self.chanx.num_channels):
+            for columns in self.__row_edges(y):
+                pending.append(columns)
+                size += len(columns[0])
+            if size >= batch_size:
+                yield self.__concatenate(pending)
+                pending, size = [], 0
+        if size:
+            yield self.__concatenate(pending)
+    # Python 2 and 3 compatible type checking
+    iter_batches.__annotations__ = {"batch_size": Optional[int], "return": Iterator[Mapping]}
+
+    @staticmethod
+    def __concatenate(pending):
+        return dict(zip(("src", "sink", "switch"), (np.concatenate(c) for c in zip(*pending))))
@@ -0,0 +1,418 @@
+from future.builtins import object, range, zip
+
+from typing import Iterable, Optional, Union, Mapping, Sequence
+from vprgen.abstractbased._abstract import *
+from array import array
+from enum import Enum
+from itertools import repeat
+from numbers import Integral
+
+_node_types = {t.value: t for t in NodeType}
+_directions = {d.value: d for d in SegmentDirection}
+_sides = {s.value: s for s in Side}
+
+# column name, typecode. -1 is used for absent side, direction and segment_id
+_node_columns = (("id_", "l"),
+        ("type_", "b"),
+        ("capacity", "i"),
+        ("xlow", "i"),
+        ("ylow", "i"),
+        ("xhigh", "i"),
+        ("yhigh", "i"),
+        ("ptc", "i"),
+        ("side", "b"),
+        ("direction", "b"),
+        ("segment_id", "i"),
+        ("has_timing", "b"),
+        ("R", "d"),
+        ("C", "d"), )
+
+# bits of ``has_timing``. R and C are stored as doubles, and the integer bits keep integral values integral, so that
+# they are written out as e.g. "0" rather than "0.0"
+_timed, _int_R, _int_C = 1, 2, 4
+
+_edge_columns = (("src_node", "l"),
+        ("sink_node", "l"),
+        ("switch_id", "i"), )
+
+def _code(value):
+    """Integer code of a scalar column value."""
+    if value is None:
+        return -1
+    elif isinstance(value, Enum):
+        return value.value
+    return value
+
+def _is_scalar(values):
+    return values is None or isinstance(values, Enum) or not hasattr(values, "__len__")
+
+def _integral(values):
+    """Check if timing values are integers: a `bool` for a scalar or a typed array, or a list of them otherwise."""
+    if _is_scalar(values):
+        return isinstance(values, Integral)
+    elif isinstance(values, array):
+        return values.typecode in "bBhHiIlLqQ"
+    kind = getattr(getattr(values, "dtype", None), "kind", "O")
+    if kind != "O":                         # e.g. NumPy arrays
+        return kind in "iu"
+    return [isinstance(v, Integral) for v in values]
+
+def _timing_flags(R, C):
+    """Value(s) of the ``has_timing`` column for the given timing values."""
+    if R is None and C is None:
+        return 0
+    R, C = _integral(R), _integral(C)
+    if isinstance(R, list) or isinstance(C, list):
+        return [_timed | (_int_R if r else 0) | (_int_C if c else 0) for r, c in
+                zip(R if isinstance(R, list) else repeat(R), C if isinstance(C, list) else repeat(C))]
+    return _timed | (_int_R if R else 0) | (_int_C if C else 0)
+
+def _fill(columns, n):
+    """Append ``n`` values to each column in bulk.
+
+    Args:
+        columns: pairs of an `array.array` and the values to append, either a scalar which is repeated, or a sequence
+            of ``n`` values
+    """
+    for _, values in columns:
+        if not _is_scalar(values) and len(values) != n:
+            raise ValueError("Expecting {} values, got {}".format(n, len(values)))
+    for column, values in columns:
+        if _is_scalar(values):
+            column.extend(array(column.typecode, (_code(values), )) * n)
+        elif isinstance(values, array) and values.typecode == column.typecode:
+            column.extend(values)
+        elif hasattr(values, "tolist"):     # e.g. NumPy arrays
+            column.fromlist(values.tolist())
+        else:
+            column.fromlist(list(values))
+
+# ----------------------------------------------------------------------------
+# -- Node Views --------------------------------------------------------------
+# ----------------------------------------------------------------------------
+class Timing(AbstractTiming):
+    """View of the timing of a node in a `NodeArray`."""
+    __slots__ = ("_nodes", "_index")
+
+    def __init__(self, nodes, index):
+        self._nodes = nodes
+        self._index = index
+
+    @property
+    def R(self):
+        R = self._nodes.R[self._index]
+        return int(R) if self._nodes.has_timing[self._index] & _int_R else R
+
+    @property
+    def C(self):
+        C = self._nodes.C[self._index]
+        return int(C) if self._nodes.has_timing[self._index] & _int_C else C
+
+class NodeLoc(AbstractNodeLoc):
+    """View of the location of a node in a `NodeArray`."""
+    __slots__ = ("_nodes", "_index")
+
+    def __init__(self, nodes, index):
+        self._nodes = nodes
+        self._index = index
+
+    @property
+    def xlow(self):
+        return self._nodes.xlow[self._index]
+
+    @property
+    def ylow(self):
+        return self._nodes.ylow[self._index]
+
+    @property
+    def xhigh(self):
+        return self._nodes.xhigh[self._index]
+
+    @property
+    def yhigh(self):
+        return self._nodes.yhigh[self._index]
+
+    @property
+    def ptc(self):
+        return self._nodes.ptc[self._index]
+
+    @property
+    def side(self):
+        s = self._nodes.side[self._index]
+        if s < 0:
+            raise NotImplementedError
+        return _sides[s]
+
+class Node(AbstractNode):
+    """View of a node in a `NodeArray`."""
+    __slots__ = ("_nodes", "_index")
+
+    def __init__(self, nodes, index):
+        self._nodes = nodes
+        self._index = index
+
+    @property
+    def id_(self):
+        return self._nodes.id_[self._index]
+
+    @property
+    def type_(self):
+        return _node_types[self._nodes.type_[self._index]]
+
+    @property
+    def loc(self):
+        return NodeLoc(self._nodes, self._index)
+
+    @property
+    def locs(self):
+        return self.loc
+
+    @property
+    def direction(self):
+        d = self._nodes.direction[self._index]
+        if d < 0:
+            raise NotImplementedError
+        return _directions[d]
+
+    @property
+    def segment_id(self):
+        i = self._nodes.segment_id[self._index]
+        if i < 0:
+            raise NotImplementedError
+        return i
+
+    @property
+    def capacity(self):
+        return self._nodes.capacity[self._index]
+
+    @property
+    def timing(self):
+        if self._nodes.has_timing[self._index]:
+            return Timing(self._nodes, self._index)
+        return None
+
+# ----------------------------------------------------------------------------
+# -- Node Storage ------------------------------------------------------------
+# ----------------------------------------------------------------------------
+class NodeArray(object):
+    """Routing nodes stored column by column in typed arrays.
+
+    Each column is a public `array.array` attribute named after the property of `AbstractNode` or `AbstractNodeLoc`
+    it backs, plus ``has_timing``, whose bits flag if the node has timing and if its R and C are integers. Enum-typed
+    columns store the enum values, and -1 marks an absent side, direction or segment id. Indexing or iterating the array produces `Node` views, which do not copy any data.
+    """
+    def __init__(self):
+        for name, typecode in _node_columns:
+            setattr(self, name, array(typecode))
+
+    def __len__(self):
+        return len(self.id_)
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        return Node(self, index)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield Node(self, i)
+
+    def append(self, id_, type_, xlow, ylow, ptc, xhigh = None, yhigh = None, side = None, direction = None,
+            segment_id = None, capacity = 1, R = None, C = None):
+        """Append one node. Timing is None if both ``R`` and ``C`` are None."""
+        for name, value in (("id_", id_),
+                ("type_", _code(type_)),
+                ("capacity", capacity),
+                ("xlow", xlow),
+                ("ylow", ylow),
+                ("xhigh", xlow if xhigh is None else xhigh),
+                ("yhigh", ylow if yhigh is None else yhigh),
+                ("ptc", ptc),
+                ("side", _code(side)),
+                ("direction", _code(direction)),
+                ("segment_id", _code(segment_id)),
+                ("has_timing", _timing_flags(R, C)),
+                ("R", float(R or 0)),
+                ("C", float(C or 0)), ):
+            getattr(self, name).append(value)
+    # Python 2 and 3 compatible type checking
+    append.__annotations__ = {"id_": int, "type_": NodeType, "xlow": int, "ylow": int, "ptc": int,
+            "xhigh": Optional[int], "yhigh": Optional[int], "side": Optional[Side],
+            "direction": Optional[SegmentDirection], "segment_id": Optional[int], "capacity": int,
+            "R": Optional[float], "C": Optional[float]}
+
+    def extend(self, id_, type_, xlow, ylow, ptc, xhigh = None, yhigh = None, side = None, direction = None,
+            segment_id = None, capacity = 1, R = None, C = None):
+        """Append nodes in bulk, filling the columns directly.
+
+        ``id_`` is a sequence of node ids. Every other argument is either a sequence of the same length, or a scalar
+        shared by all the nodes. Sequences of enum-typed values hold the enum values, e.g. `NodeType.CHANX.value`,
+        and may be `array.array`, NumPy arrays or lists. Timing is None if both ``R`` and ``C`` are None.
+        """
+        n = len(id_)
+        if n == 0:
+            return
+        _fill(tuple((getattr(self, name), values) for name, values in (("id_", id_),
+                ("type_", type_),
+                ("capacity", capacity),
+                ("xlow", xlow),
+                ("ylow", ylow),
+                ("xhigh", xlow if xhigh is None else xhigh),
+                ("yhigh", ylow if yhigh is None else yhigh),
+                ("ptc", ptc),
+                ("side", side),
+                ("direction", direction),
+                ("segment_id", segment_id),
+                ("has_timing", _timing_flags(R, C)),
+                ("R", 0. if R is None else R),
+                ("C", 0. if C is None else C), )), n)
+    # Python 2 and 3 compatible type checking
+    extend.__annotations__ = {"id_": Sequence[int], "type_": Union[NodeType, Sequence[int]],
+            "xlow": Union[int, Sequence[int]], "ylow": Union[int, Sequence[int]], "ptc": Union[int, Sequence[int]],
+            "xhigh": Optional[Union[int, Sequence[int]]], "yhigh": Optional[Union[int, Sequence[int]]],
+            "side": Optional[Union[Side, Sequence[int]]],
+            "direction": Optional[Union[SegmentDirection, Sequence[int]]],
+            "segment_id": Optional[Union[int, Sequence[int]]], "capacity": Union[int, Sequence[int]],
+            "R": Optional[Union[float, Sequence[float]]], "C": Optional[Union[float, Sequence[float]]]}
+
+    @classmethod
+    def from_nodes(cls, nodes):
+        """Copy ``nodes`` into a new `NodeArray`."""
+        self = cls()
+        for node in nodes:
+            type_, loc, timing = node.type_, node.loc, node.timing
+            is_chan = type_ in (NodeType.CHANX, NodeType.CHANY)
+            self.append(node.id_, type_, loc.xlow, loc.ylow, loc.ptc, loc.xhigh, loc.yhigh,
+                    loc.side if type_ in (NodeType.IPIN, NodeType.OPIN) else None,
+                    node.direction if is_chan else None, node.segment_id if is_chan else None, node.capacity,
+                    timing.R if timing else None, timing.C if timing else None)
+        return self
+    # Python 2 and 3 compatible type checking
+    from_nodes.__func__.__annotations__ = {"nodes": Iterable[AbstractNode]}
+
+    def columns(self):
+        """Get the nodes in the columnar form accepted by `ArchitectureDelegate.node_columns`, without copying the
+        arrays."""
+        columns = {"id": self.id_,
+                "type": self.type_,
+                "capacity": self.capacity,
+                "xlow": self.xlow,
+                "ylow": self.ylow,
+                "xhigh": self.xhigh,
+                "yhigh": self.yhigh,
+                "ptc": self.ptc,
+                "side": self.side,
+                "direction": self.direction,
+                "segment_id": self.segment_id, }
+        if self.has_timing.count(_timed) == len(self):
+            columns["R"], columns["C"] = self.R, self.C
+        elif any(self.has_timing):
+            # nodes without timing are generated with R = C = 0 instead of 0.0, and integral values stay integral, so
+            # the columns hold mixed types
+            import numpy as np
+            flags = np.frombuffer(self.has_timing, dtype = np.int8)
+            for key, values, bit in (("R", self.R, _int_R), ("C", self.C, _int_C)):
+                values = np.frombuffer(values, dtype = np.float64)
+                column = columns[key] = np.zeros(len(self), dtype = object)
+                mask = (flags & _timed) != 0
+                integral = (flags & bit) != 0
+                column[mask & ~integral] = values[mask & ~integral].tolist()
+                column[integral] = values[integral].astype(np.int64).tolist()
+        return columns
+
+# ----------------------------------------------------------------------------
+# -- Edges -------------------------------------------------------------------
+# ----------------------------------------------------------------------------
+class Edge(AbstractEdge):
+    """View of an edge in an `EdgeArray`."""
+    __slots__ = ("_edges", "_index")
+
+    def __init__(self, edges, index):
+        self._edges = edges
+        self._index = index
+
+    @property
+    def src_node(self):
+        return self._edges.src_node[self._index]
+
+    @property
+    def sink_node(self):
+        return self._edges.sink_node[self._index]
+
+    @property
+    def switch_id(self):
+        return self._edges.switch_id[self._index]
+
+    @property
+    def metadata(self):
+        return self._edges.metadata.get(self._index)
+
+class EdgeArray(object):
+    """Routing edges stored column by column in typed arrays.
+
+    ``src_node``, ``sink_node`` and ``switch_id`` are public `array.array` attributes. Metadata is kept sparsely in
+    the ``metadata`` `dict`, keyed by the index of the edge. Indexing or iterating the array produces `Edge` views,
+    which do not copy any data.
+    """
+    def __init__(self):
+        for name, typecode in _edge_columns:
+            setattr(self, name, array(typecode))
+        self.metadata = {}
+
+    def __len__(self):
+        return len(self.src_node)
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        return Edge(self, index)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield Edge(self, i)
+
+    def append(self, src_node, sink_node, switch_id, metadata = None):
+        """Append one edge."""
+        if metadata:
+            self.metadata[len(self)] = metadata
+        self.src_node.append(src_node)
+        self.sink_node.append(sink_node)
+        self.switch_id.append(switch_id)
+    # Python 2 and 3 compatible type checking
+    append.__annotations__ = {"src_node": int, "sink_node": int, "switch_id": int,
+            "metadata": Optional[Mapping[str, Union[str, Iterable[str]]]]}
+
+    def extend(self, src_node, sink_node, switch_id):
+        """Append edges in bulk, filling the columns directly.
+
+        ``src_node`` is a sequence of source node ids. ``sink_node`` and ``switch_id`` are either sequences of the
+        same length, or scalars shared by all the edges.
+        """
+        n = len(src_node)
+        if n == 0:
+            return
+        _fill(((self.src_node, src_node), (self.sink_node, sink_node), (self.switch_id, switch_id)), n)
+    # Python 2 and 3 compatible type checking
+    extend.__annotations__ = {"src_node": Sequence[int], "sink_node": Union[int, Sequence[int]],
+            "switch_id": Union[int, Sequence[int]]}
+
+    @classmethod
+    def from_edges(cls, edges):
+        """Copy ``edges`` into a new `EdgeArray`."""
+        self = cls()
+        for edge in edges:
+            self.append(edge.src_node, edge.sink_node, edge.switch_id, edge.metadata)
+        return self
+    # Python 2 and 3 compatible type checking
+    from_edges.__func__.__annotations__ = {"edges": Iterable[AbstractEdge]}
+
+    def columns(self):
+        """Get the edges in the columnar form accepted by `ArchitectureDelegate.edge_columns`, without copying the
+        arrays. Raises `ValueError` if any edge has metadata, which the columnar form does not support."""
+        if self.metadata:
+            raise ValueError("Edges with metadata cannot be converted into columns")
+        return {"src": self.src_node, "sink": self.sink_node, "switch": self.switch_id}
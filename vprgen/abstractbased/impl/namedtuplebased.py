@@ -338,3 +338,71 @@ class Edge(_namedtuple('Edge',
     defaults = (('metadata', Optional[Mapping[str, Union[str, Iterable[str]]]], None), )),
     AbstractEdge):
     pass
+
+# ----------------------------------------------------------------------------
+# -- Interning ---------------------------------------------------------------
+# ----------------------------------------------------------------------------
+def _freeze(value):
+    """Convert ``value`` into a hashable key. Mappings, lists and tuples are converted recursively, keeping the order of
+    items, since e.g. the order of metadata is kept in the output. Values are paired with their types, so that e.g. 1
+    and 1.0, which are formatted differently, or namedtuples of different types with equal fields, are not interned
+    together."""
+    if isinstance(value, Mapping):
+        return (Mapping, tuple((_freeze(k), _freeze(v)) for k, v in iteritems(value)))
+    elif isinstance(value, (list, tuple)):
+        return (type(value), tuple(_freeze(v) for v in value))
+    return (type(value), value)
+
+class Interner(object):
+    """Bounded cache of immutable values, so that equal values are shared instead of allocated separately.
+
+    Calling an interner with the arguments of ``factory`` returns the cached value constructed with the same arguments
+    if there is one, or constructs and caches a new one. When the cache is full, the least recently used value is
+    dropped. Values returned by an interner must not be modified.
+
+    Args:
+        factory: the constructor of the values
+        maxsize (:obj:`int`): maximum number of cached values
+    """
+    def __init__(self, factory, maxsize = 65536):
+        self.__factory = factory
+        self.__cache = OrderedDict()
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+
+    def __call__(self, *args, **kwargs):
+        key = _freeze((args, kwargs))
+        cache = self.__cache
+        try:
+            value = cache.pop(key)
+        except KeyError:
+            self.misses += 1
+            value = self.__factory(*args, **kwargs)
+            if len(cache) >= self.maxsize:
+                cache.popitem(last = False)
+        else:
+            self.hits += 1
+        cache[key] = value
+        return value
+
+    def __len__(self):
+        return len(self.__cache)
+
+    @property
+    def stats(self):
+        """A :obj:`dict` with the number of hits, misses and cached values."""
+        return {"hits": self.hits, "misses": self.misses, "size": len(self.__cache)}
+
+    def clear(self):
+        """Drop all cached values and reset the stats."""
+        self.__cache.clear()
+        self.hits = self.misses = 0
+
+def _tile(type_, block_type_id, xoffset = 0, yoffset = 0, metadata = None):
+    return Tile(type_, block_type_id, xoffset, yoffset, None if metadata is None else intern_metadata(metadata))
+
+intern_timing = Interner(Timing)
+intern_switch_tdel = Interner(SwitchTdel)
+intern_metadata = Interner(dict)
+intern_tile = Interner(_tile)
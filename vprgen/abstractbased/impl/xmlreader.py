@@ -0,0 +1,535 @@
+from future.builtins import object, range
+from future.utils import iteritems
+
+from vprgen.abstractbased._abstract import *
+from vprgen.abstractbased._delegate import ArchitectureDelegate
+from vprgen.abstractbased._grid import TileGrid, GridPattern
+from vprgen.abstractbased.impl.namedtuplebased import *
+
+from lxml.etree import iterparse
+from typing import Iterator, Tuple, Mapping
+import gzip
+
+_empty_iterable = tuple()
+_switch_types = {"buffer": SwitchType.buffer_}
+
+def _open_source(source):
+    """Open ``source`` for one parsing pass.
+
+    Returns:
+        :obj:`tuple` [file-like object, :obj:`bool` ]: the opened stream, and if the caller should close it
+    """
+    if isinstance(source, str):
+        if source.endswith(".gz"):
+            return gzip.open(source, "rb"), True
+        elif source.endswith(".xz"):
+            import lzma
+            return lzma.open(source, "rb"), True
+        return open(source, "rb"), True
+    source.seek(0)
+    return source, False
+
+def _number(s):
+    """Convert ``s`` into an `int` if it is integral, or a `float` otherwise, so values written back keep their
+    spelling."""
+    try:
+        return int(s)
+    except ValueError:
+        return float(s)
+
+def _release(elem):
+    """Free ``elem`` and all its preceding siblings, which have already been consumed."""
+    elem.clear()
+    parent = elem.getparent()
+    if parent is not None:
+        while elem.getprevious() is not None:
+            del parent[0]
+
+def _metadata(elem):
+    """Convert a <metadata> tag into a mapping. Repeated names are collected into tuples."""
+    if elem is None:
+        return None
+    metadata = {}
+    for meta in elem.iterfind("meta"):
+        name, value = meta.get("name"), meta.text or ""
+        if name in metadata:
+            prev = metadata[name]
+            metadata[name] = (prev if isinstance(prev, tuple) else (prev, )) + (value, )
+        else:
+            metadata[name] = value
+    return metadata
+
+# ----------------------------------------------------------------------------
+# -- Routing Resource Graph XML Reader ---------------------------------------
+# ----------------------------------------------------------------------------
+class RRGraphXMLReader(object):
+    """Streaming reader of VPR's routing resource graph XML.
+
+    Each ``iter_*`` method makes one incremental parsing pass over the source and yields objects from the
+    `vprgen.abstractbased.impl.namedtuplebased` module. Consumed elements are freed as parsing goes, and the pass stops
+    as soon as the section is over, so memory use does not grow with the size of the graph.
+
+    Args:
+        source: path to the XML file, optionally compressed with gzip (".gz") or xz (".xz"), or a seekable binary
+            file-like object
+
+    Attributes:
+        width (:obj:`int`): width of the FPGA grid, inferred from the number of <y_list> tags
+        height (:obj:`int`): height of the FPGA grid, inferred from the number of <x_list> tags
+        x_channel_width (:obj:`int`): width of horizontal routing channels
+        y_channel_width (:obj:`int`): width of vertical routing channels
+    """
+    def __init__(self, source):
+        self.__source = source
+        self.__channels = None
+
+    def __iterparse(self, section, tags):
+        """Iterate the ``tags`` children of the ``section`` tag.
+
+        Every child of every section is freed once it is parsed, whether it is yielded or skipped.
+        """
+        f, close = _open_source(self.__source)
+        try:
+            depth, inside = 0, False
+            for event, elem in iterparse(f, events = ("start", "end")):
+                if event == "start":
+                    depth += 1
+                    if depth == 2 and elem.tag == section:
+                        inside = True
+                    continue
+                depth -= 1
+                if depth == 1:
+                    if inside:
+                        return
+                    _release(elem)
+                elif depth == 2:
+                    if inside and elem.tag in tags:
+                        yield elem
+                    _release(elem)
+        finally:
+            if close:
+                f.close()
+
+    def __load_channels(self):
+        if self.__channels is None:
+            channel, x_lists, y_lists = {}, 0, 0
+            for elem in self.__iterparse("channels", ("channel", "x_list", "y_list")):
+                if elem.tag == "channel":
+                    channel = dict(elem.attrib)
+                elif elem.tag == "x_list":
+                    x_lists += 1
+                else:
+                    y_lists += 1
+            self.__channels = (int(channel.get("x_max", 0)), int(channel.get("y_max", 0)), y_lists, x_lists)
+        return self.__channels
+
+    @property
+    def x_channel_width(self):
+        return self.__load_channels()[0]
+
+    @property
+    def y_channel_width(self):
+        return self.__load_channels()[1]
+
+    @property
+    def width(self):
+        return self.__load_channels()[2]
+
+    @property
+    def height(self):
+        return self.__load_channels()[3]
+
+    def iter_segments(self):
+        """Iterate the <segment> tags.
+
+        Segment length and multiplexer are not recorded in the routing resource graph, so ``length`` is set to 1 and
+        ``mux`` to an empty string.
+        """
+        for elem in self.__iterparse("segments", ("segment", )):
+            timing = elem.find("timing")
+            yield Segment(elem.get("name"), int(elem.get("id")), 1, "",
+                    Rmetal = _number(timing.get("R_per_meter", "0")) if timing is not None else 0.0,
+                    Cmetal = _number(timing.get("C_per_meter", "0")) if timing is not None else 0.0)
+    # Python 2 and 3 compatible type checking
+    iter_segments.__annotations__ = {"return": Iterator[Segment]}
+
+    def iter_switches(self):
+        """Iterate the <switch> tags."""
+        for elem in self.__iterparse("switches", ("switch", )):
+            type_ = elem.get("type", "mux")
+            timing = elem.find("timing")
+            timing = timing.attrib if timing is not None else {}
+            yield Switch(elem.get("name"), int(elem.get("id")), _number(timing.get("Tdel", "0")),
+                    _switch_types.get(type_) or SwitchType[type_],
+                    _number(timing.get("R", "0")), _number(timing.get("Cin", "0")), _number(timing.get("Cout", "0")))
+    # Python 2 and 3 compatible type checking
+    iter_switches.__annotations__ = {"return": Iterator[Switch]}
+
+    def iter_tiles(self):
+        """Iterate the <grid_loc> tags, except those of the "EMPTY" block type.
+
+        Yields:
+            :obj:`tuple` [:obj:`int`, :obj:`int`, `Tile` ]: X position, Y position and the tile
+        """
+        names = {}
+        for elem in self.__iterparse("block_types", ("block_type", )):
+            names[int(elem.get("id"))] = elem.get("name")
+        for elem in self.__iterparse("grid", ("grid_loc", )):
+            block_type_id = int(elem.get("block_type_id"))
+            name = names.get(block_type_id)
+            if name is None or name == "EMPTY":
+                continue
+            yield int(elem.get("x")), int(elem.get("y")), Tile(name, block_type_id,
+                    int(elem.get("width_offset", 0)), int(elem.get("height_offset", 0)))
+    # Python 2 and 3 compatible type checking
+    iter_tiles.__annotations__ = {"return": Iterator[Tuple[int, int, Tile]]}
+
+    def iter_nodes(self):
+        """Iterate the <node> tags."""
+        for elem in self.__iterparse("rr_nodes", ("node", )):
+            type_ = NodeType[elem.get("type")]
+            loc = elem.find("loc")
+            side = loc.get("side")
+            timing = elem.find("timing")
+            segment = elem.find("segment")
+            direction = elem.get("direction")
+            yield Node(int(elem.get("id")), type_,
+                    NodeLoc(int(loc.get("xlow")), int(loc.get("ylow")), int(loc.get("ptc")),
+                        int(loc.get("xhigh")), int(loc.get("yhigh")), Side[side.lower()] if side else None),
+                    SegmentDirection[direction] if direction else None,
+                    int(segment.get("segment_id")) if segment is not None else None,
+                    int(elem.get("capacity", 1)),
+                    Timing(_number(timing.get("R", "0")), _number(timing.get("C", "0"))) if timing is not None else None)
+    # Python 2 and 3 compatible type checking
+    iter_nodes.__annotations__ = {"return": Iterator[Node]}
+
+    def iter_edges(self):
+        """Iterate the <edge> tags."""
+        for elem in self.__iterparse("rr_edges", ("edge", )):
+            yield Edge(int(elem.get("src_node")), int(elem.get("sink_node")), int(elem.get("switch_id")),
+                    _metadata(elem.find("metadata")))
+    # Python 2 and 3 compatible type checking
+    iter_edges.__annotations__ = {"return": Iterator[Edge]}
+
+# ----------------------------------------------------------------------------
+# -- Architecture Description XML Reader -------------------------------------
+# ----------------------------------------------------------------------------
+class _Metadata(dict):
+    """Hashable metadata mapping, so objects carrying metadata can be interned."""
+    def __hash__(self):
+        return hash(frozenset(iteritems(self)))
+
+def _bool(s):
+    return s in ("1", "true")
+
+def _split(s):
+    return tuple(s.split()) if s else _empty_iterable
+
+def _bits(s):
+    return tuple(bit == "1" for bit in s.split())
+
+def _optional_number(s):
+    return None if s is None else _number(s)
+
+_layout_patterns = frozenset(("fill", "perimeter", "corners", "single", "col", "row", "region"))
+
+class ArchitectureXMLReader(ArchitectureDelegate):
+    """Architecture delegate loaded from VPR's architecture description XML.
+
+    The whole file is read in one incremental parsing pass. Objects from the
+    `vprgen.abstractbased.impl.namedtuplebased` module are built bottom-up as each tag closes, and the tag is freed
+    right away. Equal subtrees, e.g. the same <pb_type> hierarchy repeated under multiple <mode> tags, are interned so
+    that only one copy is kept in memory.
+
+    Block IDs follow the order of the <pb_type> tags under <complexblocklist>, starting from 1 (0 is "EMPTY").
+    Segment and switch IDs follow the order of their tags, starting from 0.
+
+    Only <fixed_layout> is supported. Its tags are resolved into a `TileGrid` with `TileGrid.from_patterns`.
+    <auto_layout> and segments of length "longline" raise a `ValueError`.
+    Channel widths are not recorded in the architecture description, so they must be given if the routing resource
+    graph is generated.
+
+    Args:
+        source: path to the XML file, optionally compressed with gzip (".gz") or xz (".xz"), or a seekable binary
+            file-like object
+        x_channel_width (:obj:`int`): width of horizontal routing channels
+        y_channel_width (:obj:`int`): width of vertical routing channels
+    """
+    def __init__(self, source, x_channel_width = 0, y_channel_width = 0):
+        self.__x_channel_width = x_channel_width
+        self.__y_channel_width = y_channel_width
+        self.__name, self.__width, self.__height = None, 0, 0
+        self.__models = []
+        self.__segments = []
+        self.__switches = []
+        self.__complex_blocks = []
+        self.__directs = []
+        self.__layout = []  # (tag, attributes, metadata) of each tag under <fixed_layout>
+        self.__grid = None
+        self.__pool = {}    # key -> interned object
+        self.__interned = {}    # id -> interned object, which the pool keeps alive
+        self.__read(source)
+
+    # -- properties ----------------------------------------------------------
+    @property
+    def name(self):
+        return self.__name
+
+    @property
+    def width(self):
+        return self.__width
+
+    @property
+    def height(self):
+        return self.__height
+
+    @property
+    def x_channel_width(self):
+        return self.__x_channel_width
+
+    @property
+    def y_channel_width(self):
+        return self.__y_channel_width
+
+    @property
+    def models(self):
+        return self.__models
+
+    @property
+    def segments(self):
+        return self.__segments
+
+    @property
+    def switches(self):
+        return self.__switches
+
+    @property
+    def complex_blocks(self):
+        return self.__complex_blocks
+
+    @property
+    def directs(self):
+        return self.__directs
+
+    @property
+    def interned_count(self):
+        """Number of distinct objects kept in the interning pool."""
+        return len(self.__pool)
+
+    @property
+    def tile_grid(self):
+        return self.__grid
+
+    def get_tile(self, x, y):
+        return self.__grid.get_tile(x, y)
+
+    # -- parsing -------------------------------------------------------------
+    def __key(self, value):
+        """Shallow interning key of ``value``. Values are paired with their types, since e.g. equal namedtuples of
+        different types, or 1 and 1.0, compare equal. Objects that are already interned are referred to by their id
+        instead of their content, so keys do not grow with the depth of the hierarchies."""
+        if self.__interned.get(id(value)) is value:
+            return id(value)
+        elif isinstance(value, Mapping):
+            return (Mapping, tuple((self.__key(k), self.__key(v)) for k, v in iteritems(value)))
+        elif isinstance(value, (list, tuple)):
+            return (type(value), tuple(self.__key(v) for v in value))
+        return (type(value), value)
+
+    def __intern(self, obj):
+        interned = self.__pool.setdefault(self.__key(obj), obj)
+        self.__interned[id(interned)] = interned
+        return interned
+
+    def __read(self, source):
+        f, close = _open_source(source)
+        try:
+            # each stack entry: tag, attributes, and list of (tag, object) built from the children
+            stack = []
+            for event, elem in iterparse(f, events = ("start", "end")):
+                if event == "start":
+                    stack.append((elem.tag, dict(elem.attrib), []))
+                    continue
+                tag, attrs, children = stack.pop()
+                parent = stack[-1][0] if stack else None
+                grandparent = stack[-2][0] if len(stack) > 1 else None
+                obj = self.__build(tag, attrs, elem.text, children, parent, grandparent)
+                if obj is not None and stack:
+                    stack[-1][2].append((tag, obj))
+                _release(elem)
+        finally:
+            if close:
+                f.close()
+        blocks = {block.name: block for block in self.__complex_blocks}
+        patterns = []
+        for tag, attrs, metadata in self.__layout:
+            type_ = attrs.pop("type")
+            for pattern in GridPattern.from_layout_tag(tag, attrs, None if type_ == "EMPTY" else blocks[type_],
+                    self.__width, self.__height):
+                patterns.append(pattern._replace(metadata = metadata) if metadata else pattern)
+        self.__layout = None
+        self.__grid = TileGrid.from_patterns(self.__width, self.__height, patterns)
+
+    def __build(self, tag, attrs, text, children, parent, grandparent):
+        """Build the object for a closed tag. Returns None if the tag is consumed or ignored."""
+        get = attrs.get
+        if tag == "meta":
+            return (get("name"), text or "")
+        elif tag == "metadata":
+            metadata = _Metadata()
+            for _, (name, value) in children:
+                if name in metadata:
+                    prev = metadata[name]
+                    metadata[name] = (prev if isinstance(prev, tuple) else (prev, )) + (value, )
+                else:
+                    metadata[name] = value
+            return metadata
+        # models
+        elif tag == "port" and parent == "input_ports":
+            return ModelInputPort(get("name"), _bool(get("is_clock")), get("clock"),
+                    _split(get("combinational_sink_ports")))
+        elif tag == "port" and parent == "output_ports":
+            return ModelOutputPort(get("name"), _bool(get("is_clock")), get("clock"))
+        elif tag in ("input_ports", "output_ports"):
+            return tuple(obj for _, obj in children)
+        elif tag == "model":
+            children = dict(children)
+            self.__models.append(Model(get("name"), children.get("input_ports", _empty_iterable),
+                children.get("output_ports", _empty_iterable)))
+        # segments
+        elif parent == "segment" and tag in ("sb", "cb"):
+            return _bits(text or "")
+        elif parent == "segment" and tag == "mux":
+            return get("name")
+        elif tag == "segment" and parent == "segmentlist":
+            children = dict(children)
+            try:
+                length = int(get("length"))
+            except (TypeError, ValueError):
+                raise ValueError("Segment '{}' has length=\"{}\", only integral lengths are supported".format(
+                    get("name"), get("length")))
+            self.__segments.append(Segment(get("name"), len(self.__segments), length,
+                children.get("mux"), _number(get("freq", "1")), _number(get("Rmetal", "0")),
+                _number(get("Cmetal", "0")), children.get("sb"), children.get("cb")))
+        # switches
+        elif tag == "Tdel":
+            return SwitchTdel(int(get("num_inputs")), _number(get("delay")))
+        elif tag == "switch" and parent == "switchlist":
+            Tdel = get("Tdel")
+            type_ = get("type", "mux")
+            self.__switches.append(Switch(get("name"), len(self.__switches),
+                _number(Tdel) if Tdel is not None else tuple(obj for _, obj in children),
+                _switch_types.get(type_) or SwitchType[type_],
+                _number(get("R", "0")), _number(get("Cin", "0")), _number(get("Cout", "0"))))
+        # directs
+        elif tag == "direct" and parent == "directlist":
+            self.__directs.append(Direct(get("name"), get("from_pin"), get("to_pin"), get("switch_name"),
+                int(get("x_offset", 0)), int(get("y_offset", 0)), int(get("z_offset", 0))))
+        # timing
+        elif tag == "delay_constant":
+            return self.__intern(DelayConstant(get("in_port"), get("out_port"),
+                _optional_number(get("min")), _optional_number(get("max"))))
+        elif tag == "delay_matrix":
+            return self.__intern(DelayMatrix(DelayMatrixType.max_ if get("type") == "max" else DelayMatrixType.min_,
+                get("in_port"), get("out_port"),
+                tuple(tuple(_number(v) for v in line.split()) for line in (text or "").splitlines() if line.strip())))
+        elif tag in ("T_setup", "T_hold"):
+            return self.__intern(TSetupOrHold(get("port"), get("clock"), _number(get("value"))))
+        elif tag == "T_clock_to_Q":
+            return self.__intern(TClockToQ(get("port"), get("clock"),
+                _optional_number(get("min")), _optional_number(get("max"))))
+        # interconnect
+        elif tag == "pack_pattern":
+            return self.__intern(PackPattern(get("name"), get("in_port"), get("out_port")))
+        elif parent == "interconnect":
+            return self.__intern(InterconnectItem(get("name"), _split(get("input")), _split(get("output")),
+                tuple(obj for t, obj in children if t == "pack_pattern"),
+                tuple(obj for t, obj in children if t == "delay_constant"),
+                tuple(obj for t, obj in children if t == "delay_matrix"),
+                next((obj for t, obj in children if t == "metadata"), None)))
+        elif tag == "interconnect":
+            return children
+        # pb_types
+        elif tag in ("input", "output", "clock") and parent == "pb_type":
+            return attrs
+        elif tag == "mode":
+            return self.__intern(Mode(get("name"), *self.__collect_interconnect(children)))
+        elif tag == "pb_type":
+            return self.__build_pb_type(attrs, children, parent == "complexblocklist")
+        elif tag == "fc_override":
+            return FCOverride(FCType.abs_ if get("fc_type") == "abs" else FCType.frac, get("port_name"),
+                    get("segment_name"), _number(get("fc_val")))
+        elif tag == "fc":
+            return FC(FCType.abs_ if get("in_type") == "abs" else FCType.frac, _number(get("in_val")),
+                    FCType.abs_ if get("out_type") == "abs" else FCType.frac, _number(get("out_val")),
+                    tuple(obj for _, obj in children))
+        elif tag == "loc" and parent == "pinlocations":
+            return PinLocationsLoc(Side[get("side")], _split(text), int(get("xoffset", 0)), int(get("yoffset", 0)))
+        elif tag == "pinlocations":
+            return PinLocations(PinLocationsPattern[get("pattern")], tuple(obj for _, obj in children))
+        elif tag == "sb_loc":
+            return SbLoc(SbLocType[get("type")], int(get("xoffset", 0)), int(get("yoffset", 0)),
+                    get("switch_override"))
+        elif tag == "switchblock_locations":
+            pattern = get("pattern")
+            return SwitchblockLocations(SwitchblockLocationsPattern.all_ if pattern == "all" else
+                    SwitchblockLocationsPattern[pattern], tuple(obj for _, obj in children))
+        # layout
+        elif tag == "fixed_layout":
+            self.__name, self.__width, self.__height = get("name"), int(get("width")), int(get("height"))
+        elif tag == "auto_layout":
+            raise ValueError("<auto_layout> is not supported, only <fixed_layout> is")
+        elif tag in _layout_patterns and parent == "fixed_layout":
+            self.__layout.append((tag, attrs, next((obj for t, obj in children if t == "metadata"), None)))
+        return None
+
+    def __collect_interconnect(self, children):
+        """Collect the interconnect items, sub-pb_types and metadata of a <mode> or <pb_type>."""
+        interconnect = next((obj for t, obj in children if t == "interconnect"), _empty_iterable)
+        return (tuple(obj for t, obj in interconnect if t == "complete"),
+                tuple(obj for t, obj in interconnect if t == "mux"),
+                tuple(obj for t, obj in interconnect if t == "direct"),
+                tuple(obj for t, obj in children if t == "pb_type"),
+                next((obj for t, obj in children if t == "metadata"), None))
+
+    def __build_pb_type(self, attrs, children, top):
+        get = attrs.get
+        ports = {key: [attrs for t, attrs in children if t == key] for key in ("input", "output", "clock")}
+        completes, muxes, directs, pb_types, metadata = self.__collect_interconnect(children)
+        modes = tuple(obj for t, obj in children if t == "mode")
+        if top:
+            equivalent = lambda p: (TopPbTypePortEquivalent[p["equivalent"]]
+                    if p.get("equivalent", "none") != "none" else None)
+            children = dict(children)
+            block = TopPbType(get("name"), len(self.__complex_blocks) + 1, int(get("capacity", 1)),
+                    int(get("width", 1)), int(get("height", 1)),
+                    tuple(TopPbTypeInputPort(p["name"], int(p["num_pins"]), equivalent(p),
+                        _bool(p.get("is_non_clock_global"))) for p in ports["input"]),
+                    tuple(TopPbTypeOutputOrClockPort(p["name"], int(p["num_pins"]), equivalent(p))
+                        for p in ports["output"]),
+                    tuple(TopPbTypeOutputOrClockPort(p["name"], int(p["num_pins"]), equivalent(p))
+                        for p in ports["clock"]),
+                    modes, completes, muxes, directs, pb_types,
+                    children.get("fc"), children.get("pinlocations"), children.get("switchblock_locations"),
+                    metadata)
+            self.__complex_blocks.append(block)
+            return None
+        elif "blif_model" in attrs:
+            port_class = lambda p: LeafPbTypePortClass[p["port_class"]] if "port_class" in p else None
+            class_ = get("class")
+            return self.__intern(LeafPbType(get("name"), get("blif_model"), int(get("num_pb", 1)),
+                LeafPbTypeClass[class_] if class_ else None,
+                *(tuple(self.__intern(LeafPbTypePort(p["name"], int(p["num_pins"]), port_class(p)))
+                    for p in ports[key]) for key in ("input", "output", "clock")),
+                delay_constants = tuple(obj for t, obj in children if t == "delay_constant"),
+                delay_matrices = tuple(obj for t, obj in children if t == "delay_matrix"),
+                T_setups = tuple(obj for t, obj in children if t == "T_setup"),
+                T_holds = tuple(obj for t, obj in children if t == "T_hold"),
+                T_clock_to_Qs = tuple(obj for t, obj in children if t == "T_clock_to_Q"),
+                metadata = metadata))
+        else:
+            return self.__intern(IntermediatePbType(get("name"), int(get("num_pb", 1)),
+                *(tuple(self.__intern(PbTypePort(p["name"], int(p["num_pins"]))) for p in ports[key])
+                    for key in ("input", "output", "clock")),
+                modes = modes, pb_types = pb_types, completes = completes, muxes = muxes, directs = directs,
+                metadata = metadata))
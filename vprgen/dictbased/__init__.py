@@ -1 +1,2 @@
 from vprgen.dictbased._delegate import ArchitectureDelegate
+from vprgen.dictbased._validate import ValidationPolicy
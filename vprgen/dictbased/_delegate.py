@@ -10,10 +10,14 @@ try:
 except ImportError:
     from collections import Iterable
 
-from vprgen._xml import XMLGenerator
-from jsonschema import validate
+from vprgen._stream import wrap_output
+from vprgen._xml import make_xml_generator
+from vprgen._rrgbin import RRGraphBinaryWriter
+from vprgen._cache import SectionCache
+from vprgen.dictbased._validate import compile_validator, ValidationPolicy
 from json import load
-from itertools import product
+from itertools import product, count
+from operator import itemgetter
 import os
 
 _model_schema = load(open(os.path.join(os.path.dirname(__file__), "schema", "model.schema.json")))
@@ -25,12 +29,34 @@ _tile_schema = load(open(os.path.join(os.path.dirname(__file__), "schema", "tile
 _node_schema = load(open(os.path.join(os.path.dirname(__file__), "schema", "node.schema.json")))
 _edge_schema = load(open(os.path.join(os.path.dirname(__file__), "schema", "edge.schema.json")))
 
+_validate_model = compile_validator(_model_schema)
+_validate_segment = compile_validator(_segment_schema)
+_validate_switch = compile_validator(_switch_schema)
+_validate_direct = compile_validator(_direct_schema)
+_validate_block = compile_validator(_block_schema)
+_validate_tile = compile_validator(_tile_schema)
+_validate_node = compile_validator(_node_schema)
+_validate_edge = compile_validator(_edge_schema)
+
+_validators = {
+        "model": _validate_model,
+        "segment": _validate_segment,
+        "switch": _validate_switch,
+        "direct": _validate_direct,
+        "block": _validate_block,
+        "tile": _validate_tile,
+        "node": _validate_node,
+        "edge": _validate_edge,
+        }
+
 # ----------------------------------------------------------------------------
 # -- Architecture Delegate ---------------------------------------------------
 # ----------------------------------------------------------------------------
 class ArchitectureDelegate(object):
     """Delegate class which is able to answer questions about what are in the architecture."""
 
+    _validation_policy = None
+
     # -- User-defined methods ------------------------------------------------
     def iter_models(self):
         """Iterate or generate data for the <model> tags under the <models> tag in VPR's architecture description XML.
@@ -71,6 +97,16 @@ class ArchitectureDelegate(object):
         """
         return None
 
+    def iter_tiles(self):
+        """Iterate or generate (x, y, tile) of anchor tiles only, i.e. tiles without offsets, used instead of calling
+        `get_tile` for each location if not None.
+
+        Each tile should be a `dict` satisfying the JSON schema 'schema/tile.schema.json'. Offset tiles of blocks
+        wider or taller than one tile are filled in from the "width" and "height" of the block, and all other tiles are
+        treated as "EMPTY".
+        """
+        return None
+
     def get_device(self):
         """Get the device information.
 
@@ -137,15 +173,51 @@ class ArchitectureDelegate(object):
         return
         yield None  # mark this method as a generator
 
+    def get_rrg_section_fingerprint(self, section):
+        """Get a cheap fingerprint of a section of the routing resource graph, used to reuse the section from the
+        cache of `gen_rrg_xml` when it is unchanged.
+
+        ``section`` is one of "channels", "segments", "switches", "block_types", "grid", "rr_nodes" and "rr_edges".
+        The fingerprint can be any value with a stable ``repr``, e.g. a version string, a hash or a tuple of
+        parameters, and must change whenever the section changes. If None is returned, the section is always
+        generated. By default only "channels" is fingerprinted, with the grid size and channel widths.
+        """
+        if section == "channels":
+            return (self.get_width(), self.get_height(), self.get_x_channel_width(), self.get_y_channel_width())
+        return None
+
     # -- API -----------------------------------------------------------------
-    def gen_arch_xml(self, ostream, pretty = True):
+    def set_validation_policy(self, policy):
+        """Set how the elements returned by the user-defined methods are validated against their JSON schemas.
+
+        Args:
+            policy (`ValidationPolicy` or :obj:`str`): the policy, or its mode: "full", "first-N", "sampled(rate)" or
+                "off". See `ValidationPolicy`
+        """
+        self._validation_policy = policy if isinstance(policy, ValidationPolicy) else ValidationPolicy(policy)
+
+    def get_validation_policy(self):
+        """Get the validation policy. Its ``checked`` attribute counts how many elements of each kind ("model",
+        "segment", "switch", "direct", "block", "tile", "node" and "edge") were validated."""
+        if self._validation_policy is None:
+            self._validation_policy = ValidationPolicy()
+        return self._validation_policy
+
+    def gen_arch_xml(self, ostream, pretty = True, backend = "lxml", buffer_size = None, compression = None):
         """Stream generate VPR's architecture description XML.
 
         Args:
             ostream: a file-like object, like a `file` or a `StringIO`
             pretty (:obj:`bool`): if the output XML file should be nicely broken into multiple lines and indented
+            backend (:obj:`str`): the XML generator backend. "lxml" streams each tag through `lxml.etree.xmlfile`,
+                "template" writes precompiled byte templates directly to ``ostream``. Both produce identical output
+            buffer_size (:obj:`int`): if set, output is collected in a buffer of this many bytes and flushed to
+                ``ostream`` in large blocks
+            compression (:obj:`str`): if set to "gzip" or "xz", output is compressed in independent blocks on a
+                thread pool before written to ``ostream``
         """
-        with XMLGenerator(ostream, pretty) as xmlgen:
+        with wrap_output(ostream, buffer_size, compression) as ostream, \
+                make_xml_generator(ostream, pretty, False, backend) as xmlgen:
             with xmlgen.element("architecture"):
                 # 1. models
                 with xmlgen.element("models"):
@@ -168,8 +240,13 @@ class ArchitectureDelegate(object):
                     "name": self.get_layout_name(),
                     "width": self.get_width(),
                     "height": self.get_height(), }):
-                    for x, y in product(range(self.get_width()), range(self.get_height())):
-                        tile = self.get_tile(x, y)
+                    anchors = self.iter_tiles()
+                    if anchors is None:
+                        anchors = ((x, y, self.get_tile(x, y))
+                                for x, y in product(range(self.get_width()), range(self.get_height())))
+                    else:
+                        anchors = sorted(anchors, key = itemgetter(0, 1))
+                    for x, y, tile in anchors:
                         if tile:
                             self._gen_arch_tile(xmlgen, tile, x, y)
                 # 6. directs
@@ -184,72 +261,237 @@ class ArchitectureDelegate(object):
                     xmlgen.element_leaf("switch_block", {"type": "wilton", "fs": 3})
                     xmlgen.element_leaf("default_fc", {"in_type": "frac", "in_val": 0.5, "out_type": "frac", "out_val": 0.5})
 
-    def gen_rrg_xml(self, ostream, pretty = True):
+    def gen_rrg_xml(self, ostream, pretty = True, backend = "lxml", buffer_size = None, compression = None,
+            cache_dir = None):
         """Stream generate VPR's routing resource graph XML.
 
         Args:
             ostream: a file-like object, like a `file` or a `StringIO`
             pretty (:obj:`bool`): if the output XML file should be nicely broken into multiple lines and indented
+            backend (:obj:`str`): the XML generator backend. "lxml" streams each tag through `lxml.etree.xmlfile`,
+                "template" writes precompiled byte templates directly to ``ostream``. Both produce identical output
+            buffer_size (:obj:`int`): if set, output is collected in a buffer of this many bytes and flushed to
+                ``ostream`` in large blocks
+            compression (:obj:`str`): if set to "gzip" or "xz", output is compressed in independent blocks on a
+                thread pool before written to ``ostream``
+            cache_dir (:obj:`str`): if set, each section with a fingerprint from `get_rrg_section_fingerprint` is
+                stored in this directory, and reused as is the next time it is generated with the same fingerprint
         """
-        with XMLGenerator(ostream, pretty) as xmlgen:
-            with xmlgen.element("rr_graph"):
-                # 1. channels
-                with xmlgen.element("channels"):
-                    xmlgen.element_leaf("channel", {
-                        "chan_width_max": max(delegate.get_x_channel_width(),
-                            delegate.get_y_channel_width()),
-                        "x_max": delegate.get_x_channel_width(),
-                        "x_min": delegate.get_x_channel_width(),
-                        "y_max": delegate.get_y_channel_width(),
-                        "y_min": delegate.get_y_channel_width(), })
-                    for y in range(delegate.get_height()):
-                        xmlgen.element_leaf("x_list", {
-                            "index": y,
-                            "info": delegate.get_x_channel_width(), })
-                    for x in range(delegate.get_width()):
-                        xmlgen.element_leaf("y_list", {
-                            "index": x,
-                            "info": delegate.get_y_channel_width(), })
-                # 2. segments
-                with xmlgen.element("segments"):
-                    for segment in delegate.iter_segments():
-                        self._gen_rrg_segment(xmlgen, segment)
-                # 3. switches
-                with xmlgen.element("switches"):
-                    for switch in delegate.iter_switches():
-                        self._gen_rrg_switch(xmlgen, switch)
-                # 4. blocks
-                with xmlgen.element("block_types"):
-                    xmlgen.element_leaf("block_type", {
-                        "name": "EMPTY",
-                        "id": 0,
-                        "width": 1,
-                        "height": 1, })
-                    for block in delegate.iter_blocks():
-                        self._gen_rrg_block(xmlgen, block)
-                # 5. grid
-                with xmlgen.element("grid"):
-                    for x, y in product(range(delegate.get_width()), range(delegate.get_height())):
-                        tile = delegate.get_tile(x, y)
-                        if tile is None:
-                            xmlgen.element_leaf("grid_loc", {
-                                "block_type_id": 0,
-                                "height_offset": 0,
-                                "width_offset": 0,
-                                "x": x,
-                                "y": y, })
-                        else:
-                            self._gen_rrg_tile(xmlgen, tile)
-                # 6. nodes
-                with xmlgen.element("rr_nodes"):
-                    for node in delegate.iter_nodes():
-                        self._gen_node(xmlgen, node)
-                # 7. edges
-                with xmlgen.element("rr_edges"):
-                    for node in delegate.iter_edges():
-                        self._gen_edge(xmlgen, edge)
+        sections = (("channels", self._gen_rrg_channels),
+                ("segments", self._gen_rrg_segments),
+                ("switches", self._gen_rrg_switches),
+                ("block_types", self._gen_rrg_block_types),
+                ("grid", self._gen_rrg_grid),
+                ("rr_nodes", self._gen_rrg_nodes),
+                ("rr_edges", self._gen_rrg_edges), )
+        with wrap_output(ostream, buffer_size, compression) as ostream:
+            cache = None
+            if cache_dir is not None:
+                cache = SectionCache(cache_dir, pretty)
+                ostream = cache.tap(ostream)
+            with make_xml_generator(ostream, pretty, False, backend) as xmlgen, xmlgen.element("rr_graph"):
+                for section, gen in sections:
+                    if cache is None:
+                        gen(xmlgen)
+                        continue
+                    with cache.section(xmlgen, section, self.get_rrg_section_fingerprint(section)) as hit:
+                        if not hit:
+                            gen(xmlgen)
+
+    def gen_rrg_bin(self, ostream, buffer_size = None, compression = None, tmpdir = None):
+        """Stream generate VPR's routing resource graph in the Cap'n Proto binary format.
+
+        The graph is the same as the one generated by `gen_rrg_xml`. Nodes and edges are spooled to temporary files
+        while they are generated, then the message is written out to ``ostream``.
+
+        Args:
+            ostream: a binary file-like object
+            buffer_size (:obj:`int`): if set, output is collected in a buffer of this many bytes and flushed to
+                ``ostream`` in large blocks
+            compression (:obj:`str`): if set to "gzip" or "xz", output is compressed in independent blocks on a
+                thread pool before written to ``ostream``
+            tmpdir (:obj:`str`): directory for the temporary files
+        """
+        with wrap_output(ostream, buffer_size, compression) as ostream, \
+                RRGraphBinaryWriter(ostream, tmpdir) as writer:
+            # 1. channels
+            writer.set_channels({
+                "chan_width_max": max(self.get_x_channel_width(), self.get_y_channel_width()),
+                "x_max": self.get_x_channel_width(),
+                "x_min": self.get_x_channel_width(),
+                "y_max": self.get_y_channel_width(),
+                "y_min": self.get_y_channel_width(), },
+                [(y, self.get_x_channel_width()) for y in range(self.get_height())],
+                [(x, self.get_y_channel_width()) for x in range(self.get_width())])
+            # 2. segments
+            for segment in self.iter_segments():
+                self._validate("segment", segment)
+                writer.add_segment(segment["id"], segment["name"], segment.get("Rmetal", 0), segment.get("Cmetal", 0))
+            # 3. switches
+            for switch in self.iter_switches():
+                self._validate("switch", switch)
+                if isinstance(switch["Tdel"], Iterable):
+                    raise NotImplementedError("rr_graph with a list of <Tdel> tags not supported yet")
+                writer.add_switch(switch["id"], switch["name"], switch["type"], switch.get("R", 0),
+                        switch.get("Cin", 0), switch.get("Cout", 0), switch["Tdel"])
+            # 4. blocks
+            writer.add_block_type(0, "EMPTY", 1, 1, [])
+            for block in self.iter_blocks():
+                self._validate("block", block)
+                writer.add_block_type(block["id"], block["name"], block.get("width", 1), block.get("height", 1),
+                        ((type_, ((ptc, name), )) for type_, ptc, name in self._iter_rrg_block_pins(block)))
+            # 5. grid
+            for x, y, tile in self._iter_grid():
+                if tile is None:
+                    writer.add_grid_loc(x, y, 0, 0, 0)
+                else:
+                    self._validate("tile", tile)
+                    writer.add_grid_loc(x, y, tile["block_type_id"], tile.get("xoffset", 0), tile.get("yoffset", 0))
+            # 6. nodes
+            for node in self.iter_nodes():
+                self._validate("node", node)
+                loc, timing = node["loc"], node.get("timing", {})
+                writer.add_node(node["id"], node["type"], node.get("capacity", 1),
+                        loc["xlow"], loc["ylow"], loc["xhigh"], loc["yhigh"], loc["ptc"], loc.get("side"),
+                        node.get("direction"), timing.get("R", 0), timing.get("C", 0), node.get("segment_id"))
+            # 7. edges
+            for edge in self.iter_edges():
+                self._validate("edge", edge)
+                writer.add_edge(edge["src_node"], edge["sink_node"], edge["switch_id"])
 
     # -- Private methods -----------------------------------------------------
+    def _iter_grid(self):
+        """Iterate (x, y, tile) for every location, in the same order as ``product(range(width), range(height))``.
+
+        If `iter_tiles` returns None, `get_tile` is called for each location. Otherwise only the locations covered by
+        the anchor tiles are stored, and their offset tiles are filled in from the size of the blocks.
+
+        Raises:
+            `ValueError`: if an anchor tile refers to a block type not returned by `iter_blocks`
+        """
+        width, height = self.get_width(), self.get_height()
+        anchors = self.iter_tiles()
+        if anchors is None:
+            for x, y in product(range(width), range(height)):
+                yield x, y, self.get_tile(x, y)
+            return
+        sizes = {block["id"]: (block.get("width", 1), block.get("height", 1)) for block in self.iter_blocks()}
+        cells = {}
+        for x, y, tile in anchors:
+            try:
+                w, h = sizes[tile["block_type_id"]]
+            except KeyError:
+                raise ValueError("Tile at ({}, {}) has unknown block_type_id: {}".format(x, y, tile["block_type_id"]))
+            for xoffset, yoffset in product(range(w), range(h)):
+                cells[x + xoffset, y + yoffset] = tile if not (xoffset or yoffset) else {
+                        "type": tile["type"],
+                        "block_type_id": tile["block_type_id"],
+                        "xoffset": xoffset,
+                        "yoffset": yoffset, }
+        for x, y in product(range(width), range(height)):
+            yield x, y, cells.get((x, y))
+
+    def _validate(self, kind, instance):
+        """Validate ``instance`` against the JSON schema of ``kind`` if the validation policy says so."""
+        if self.get_validation_policy().should_check(kind):
+            _validators[kind](instance)
+
+    def _gen_rrg_channels(self, xmlgen):
+        """Generate the <channels> tag.
+
+        Args:
+            xmlgen (`XMLGenerator`): the generator to be used
+        """
+        with xmlgen.element("channels"):
+            xmlgen.element_leaf("channel", {
+                "chan_width_max": max(self.get_x_channel_width(),
+                    self.get_y_channel_width()),
+                "x_max": self.get_x_channel_width(),
+                "x_min": self.get_x_channel_width(),
+                "y_max": self.get_y_channel_width(),
+                "y_min": self.get_y_channel_width(), })
+            for y in range(self.get_height()):
+                xmlgen.element_leaf("x_list", {
+                    "index": y,
+                    "info": self.get_x_channel_width(), })
+            for x in range(self.get_width()):
+                xmlgen.element_leaf("y_list", {
+                    "index": x,
+                    "info": self.get_y_channel_width(), })
+
+    def _gen_rrg_segments(self, xmlgen):
+        """Generate the <segments> tag.
+
+        Args:
+            xmlgen (`XMLGenerator`): the generator to be used
+        """
+        with xmlgen.element("segments"):
+            for segment in self.iter_segments():
+                self._gen_rrg_segment(xmlgen, segment)
+
+    def _gen_rrg_switches(self, xmlgen):
+        """Generate the <switches> tag.
+
+        Args:
+            xmlgen (`XMLGenerator`): the generator to be used
+        """
+        with xmlgen.element("switches"):
+            for switch in self.iter_switches():
+                self._gen_rrg_switch(xmlgen, switch)
+
+    def _gen_rrg_block_types(self, xmlgen):
+        """Generate the <block_types> tag.
+
+        Args:
+            xmlgen (`XMLGenerator`): the generator to be used
+        """
+        with xmlgen.element("block_types"):
+            xmlgen.element_leaf("block_type", {
+                "name": "EMPTY",
+                "id": 0,
+                "width": 1,
+                "height": 1, })
+            for block in self.iter_blocks():
+                self._gen_rrg_block(xmlgen, block)
+
+    def _gen_rrg_grid(self, xmlgen):
+        """Generate the <grid> tag.
+
+        Args:
+            xmlgen (`XMLGenerator`): the generator to be used
+        """
+        with xmlgen.element("grid"):
+            for x, y, tile in self._iter_grid():
+                if tile is None:
+                    xmlgen.element_leaf("grid_loc", {
+                        "block_type_id": 0,
+                        "height_offset": 0,
+                        "width_offset": 0,
+                        "x": x,
+                        "y": y, })
+                else:
+                    self._gen_rrg_tile(xmlgen, tile, x, y)
+
+    def _gen_rrg_nodes(self, xmlgen):
+        """Generate the <rr_nodes> tag.
+
+        Args:
+            xmlgen (`XMLGenerator`): the generator to be used
+        """
+        with xmlgen.element("rr_nodes"):
+            for node in self.iter_nodes():
+                self._gen_node(xmlgen, node)
+
+    def _gen_rrg_edges(self, xmlgen):
+        """Generate the <rr_edges> tag.
+
+        Args:
+            xmlgen (`XMLGenerator`): the generator to be used
+        """
+        with xmlgen.element("rr_edges"):
+            for edge in self.iter_edges():
+                self._gen_edge(xmlgen, edge)
+
     def _gen_model(self, xmlgen, model):
         """Generate a <model> tag for the given ``model``.
     
@@ -258,7 +500,7 @@ class ArchitectureDelegate(object):
             model (:obj:`dict`): a `dict` satisfying the JSON schema 'schema/model.schema.json'
         """
         # 1. validate argument
-        validate(instance = model, schema = _model_schema)
+        self._validate("model", model)
         # 2. generate tag
         with xmlgen.element("model", {"name": model["name"]}):
             input_ports = model.get("input_ports", None)
@@ -295,7 +537,7 @@ class ArchitectureDelegate(object):
             segment (:obj:`dict`): a `dict` satisfying the JSON schema 'schema/segment.schema.json'
         """
         # 1. validate argument
-        validate(instance = segment, schema = _segment_schema)
+        self._validate("segment", segment)
         # 2. generate tag
         with xmlgen.element("segment", {
             "name": segment["name"],
@@ -319,7 +561,7 @@ class ArchitectureDelegate(object):
             switch (:obj:`dict`): a `dict` satisfying the JSON schema 'schema/switch.schema.json'
         """
         # 1. validate argument
-        validate(instance = switch, schema = _switch_schema)
+        self._validate("switch", switch)
         # 2. generate tag
         Tdel = switch["Tdel"]
         attrs = { "type": switch.get("type", "mux"),
@@ -343,7 +585,7 @@ class ArchitectureDelegate(object):
             direct (:obj:`dict`): a `dict` satisfying the JSON schema 'schema/direct.schema.json'
         """
         # 1. validate argument
-        validate(instance = direct, schema = _direct_schema)
+        self._validate("direct", direct)
         # 2. generate tag
         attrs = {"x_offset": 0, "y_offset": 0, "z_offset": 0}
         attrs.update(direct)
@@ -532,7 +774,7 @@ class ArchitectureDelegate(object):
             segment (:obj:`dict`): a `dict` satisfying the JSON schema 'schema/segment.schema.json'
         """
         # 1. validate argument
-        validate(instance = segment, schema = _segment_schema)
+        self._validate("segment", segment)
         # 2. generate tag
         with xmlgen.element("segment", {
             "id": segment["id"],
@@ -549,7 +791,7 @@ class ArchitectureDelegate(object):
             switch (:obj:`dict`): a `dict` satisfying the JSON schema 'schema/switch.schema.json'
         """
         # 1. validate argument
-        validate(instance = switch, schema = _switch_schema)
+        self._validate("switch", switch)
         # 2. generate tag
         with xmlgen.element("switch", {
             "buffered": 1 if switch["type"] in ["mux", "tristate", "buffer"] else 0,
@@ -576,28 +818,33 @@ class ArchitectureDelegate(object):
             block (:obj:`dict`): a `dict` satisfying the JSON schema 'schema/block.schema.json'
         """
         # 1. validate argument
-        validate(instance = block, schema = _block_schema)
+        self._validate("block", block)
         # 2. generate tag
         with xmlgen.element("block_type", {
             "name": block["name"],
             "id": block["id"],
             "width": block.get("width", 1),
             "height": block.get("height", 1), }):
-            ptc_it = count()
-            capacity = block.get("capacity", 1)
-            for z, key in product(range(capacity), ("input", "output", "clock")):
-                for port in block.get(key, []):
-                    for bit in range(port["num_pins"]):
-                        with xmlgen.element("pin_class", {
-                            "type": "OUTPUT" if key == "output" else "INPUT", }):
-                            if capacity == 1:
-                                xmlgen.element_leaf("pin", {
-                                    "ptc": next(ptc_it), },
-                                    "{}.{}[{}]".format(block["name"], port["name"], bit))
-                            else:
-                                xmlgen.element_leaf("pin", {
-                                    "ptc": next(ptc_it), },
-                                    "{}[{}].{}[{}]".format(block["name"], z, port["name"], bit))
+            for type_, ptc, name in self._iter_rrg_block_pins(block):
+                with xmlgen.element("pin_class", {"type": type_}):
+                    xmlgen.element_leaf("pin", {"ptc": ptc}, name)
+
+    def _iter_rrg_block_pins(self, block):
+        """Iterate the pin type, ptc and name of each pin of the given ``block``, in ptc order.
+
+        Args:
+            block (:obj:`dict`): a `dict` satisfying the JSON schema 'schema/block.schema.json'
+        """
+        ptc_it = count()
+        capacity = block.get("capacity", 1)
+        for z, key in product(range(capacity), ("input", "output", "clock")):
+            for port in block.get(key, []):
+                for bit in range(port["num_pins"]):
+                    if capacity == 1:
+                        name = "{}.{}[{}]".format(block["name"], port["name"], bit)
+                    else:
+                        name = "{}[{}].{}[{}]".format(block["name"], z, port["name"], bit)
+                    yield "OUTPUT" if key == "output" else "INPUT", next(ptc_it), name
     
     def _gen_rrg_tile(self, xmlgen, tile, x, y):
         """Generate a <grid_loc> tag for the given ``tile``.
@@ -609,7 +856,7 @@ class ArchitectureDelegate(object):
             y (:obj:`int`): the Y position
         """
         # 1. validate argument
-        validate(instance = tile, schema = _tile_schema)
+        self._validate("tile", tile)
         # 2. generate tag
         xmlgen.element_leaf("grid_loc", {
             "block_type_id": tile["block_type_id"],
@@ -626,7 +873,7 @@ class ArchitectureDelegate(object):
             node (:obj:`dict`): a `dict` satisfying the JSON schema 'schema/node.schema.json'
         """
         # 1. validate argument
-        validate(instance = node, schema = _node_schema)
+        self._validate("node", node)
         # 2. generate tag
         attrs = { "capacity": node.get("capacity", 1),
                 "id": node["id"],
@@ -650,6 +897,6 @@ class ArchitectureDelegate(object):
             edge (:obj:`dict`): a `dict` satisfying the JSON schema 'schema/edge.schema.json'
         """
         # 1. validate argument
-        validate(instance = edge, schema = _edge_schema)
+        self._validate("edge", edge)
         # 2. generate tag
         xmlgen.element_leaf("edge", edge)
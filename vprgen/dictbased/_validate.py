@@ -0,0 +1,231 @@
+from future.builtins import object
+from future.utils import iteritems
+
+from jsonschema import validate
+from numbers import Number
+from random import Random
+import re
+
+_policy_pattern = re.compile(r"^(?:full|off|first-(?P<first>\d+)|sampled\((?P<rate>[0-9.eE+-]+)\))$")
+_ignored_keywords = frozenset(("$schema", "$comment", "default", "definitions"))
+
+def _never(instance):
+    return False
+
+def _always(instance):
+    return True
+
+class _Unsupported(Exception):
+    pass
+
+# type checks follow the draft 7 type checker of `jsonschema`
+def _is_number(x):
+    return isinstance(x, Number) and not isinstance(x, bool)
+
+def _is_int(x):
+    if isinstance(x, float):
+        return x.is_integer()
+    return isinstance(x, int) and not isinstance(x, bool)
+
+_type_checks = {
+        "object": lambda x: isinstance(x, dict),
+        "array": lambda x: isinstance(x, list),
+        "string": lambda x: isinstance(x, str),
+        "integer": _is_int,
+        "number": _is_number,
+        "boolean": lambda x: isinstance(x, bool),
+        "null": lambda x: x is None,
+        }
+
+class _SchemaCompiler(object):
+    """Compiles a JSON schema into a predicate which returns True if and only if the instance is valid.
+
+    Raises `_Unsupported` if the schema uses a keyword or reference the compiler does not understand.
+    """
+    def __init__(self, root):
+        self.__root = root
+        self.__refs = {}
+
+    def __resolve(self, ref):
+        if not ref.startswith("#/"):
+            return None
+        node = self.__root
+        for part in ref[2:].split("/"):
+            node = node.get(part) if isinstance(node, dict) else None
+            if node is None:
+                return None
+        return node
+
+    def __ref(self, ref):
+        refs = self.__refs
+        if ref not in refs:
+            target = self.__resolve(ref)
+            if target is None:
+                raise _Unsupported(ref)
+            refs[ref] = None    # compiling; recursive references are looked up when called
+            refs[ref] = self.compile(target)
+        return lambda x: refs[ref](x)
+
+    def __discriminate(self, branches):
+        """Find a property which has a required, disjoint ``enum`` in each ``oneOf`` branch."""
+        for key in branches[0].get("properties", {}):
+            mapping = {}
+            for i, branch in enumerate(branches):
+                enum = branch.get("properties", {}).get(key, {}).get("enum")
+                if enum is None or key not in branch.get("required", ()):
+                    break
+                if any(not isinstance(v, str) or v in mapping for v in enum):
+                    break
+                mapping.update((v, i) for v in enum)
+            else:
+                return key, mapping
+        return None, None
+
+    def compile(self, schema):
+        if schema is True or schema == {}:
+            return _always
+        elif schema is False:
+            return _never
+        checks = []
+        for keyword, value in iteritems(schema):
+            if keyword in _ignored_keywords:
+                continue
+            elif keyword == "$ref":
+                checks.append(self.__ref(value))
+            elif keyword == "type":
+                types = [_type_checks.get(t) for t in (value if isinstance(value, list) else (value, ))]
+                if None in types:
+                    raise _Unsupported(value)
+                elif len(types) == 1:
+                    checks.append(types[0])
+                else:
+                    checks.append(lambda x, types = types: any(t(x) for t in types))
+            elif keyword == "enum":
+                values = [(isinstance(v, bool), v) for v in value]
+                checks.append(lambda x, values = values: any(isinstance(x, bool) is b and x == v for b, v in values))
+            elif keyword == "minimum":
+                checks.append(lambda x, m = value: not _is_number(x) or x >= m)
+            elif keyword == "exclusiveMinimum":
+                checks.append(lambda x, m = value: not _is_number(x) or x > m)
+            elif keyword == "required":
+                keys = tuple(value)
+                checks.append(lambda x, keys = keys: not isinstance(x, dict) or all(k in x for k in keys))
+            elif keyword == "properties":
+                props = tuple((k, self.compile(v)) for k, v in iteritems(value))
+                def check_properties(x, props = props):
+                    if not isinstance(x, dict):
+                        return True
+                    for k, check in props:
+                        if k in x and not check(x[k]):
+                            return False
+                    return True
+                checks.append(check_properties)
+            elif keyword == "items":
+                if isinstance(value, list):
+                    items = tuple(self.compile(v) for v in value)
+                    checks.append(lambda x, items = items: not isinstance(x, list) or
+                            all(check(item) for check, item in zip(items, x)))
+                else:
+                    item = self.compile(value)
+                    checks.append(lambda x, item = item: not isinstance(x, list) or all(item(i) for i in x))
+            elif keyword == "not":
+                negated = self.compile(value)
+                checks.append(lambda x, negated = negated: not negated(x))
+            elif keyword == "anyOf":
+                branches = tuple(self.compile(v) for v in value)
+                checks.append(lambda x, branches = branches: any(b(x) for b in branches))
+            elif keyword == "oneOf":
+                key, mapping = self.__discriminate(value)
+                branches = tuple(self.compile(v) for v in value)
+                if key is None:
+                    checks.append(lambda x, branches = branches: sum(1 for b in branches if b(x)) == 1)
+                else:
+                    # only the branch selected by the discriminator can pass
+                    dispatch = {v: branches[i] for v, i in iteritems(mapping)}
+                    def check_one_of(x, key = key, dispatch = dispatch):
+                        if not isinstance(x, dict):
+                            return False
+                        branch = dispatch.get(x.get(key)) if isinstance(x.get(key), str) else None
+                        return branch is not None and branch(x)
+                    checks.append(check_one_of)
+            else:
+                raise _Unsupported(keyword)
+        if not checks:
+            return _always
+        elif len(checks) == 1:
+            return checks[0]
+        checks = tuple(checks)
+        return lambda x: all(check(x) for check in checks)
+
+def compile_validator(schema):
+    """Compile ``schema`` into a validation function.
+
+    The returned function takes an instance and returns None if it is valid. Otherwise it falls back to
+    `jsonschema.validate`, so the same `jsonschema.ValidationError` is raised as an uncompiled validation. Schemas
+    using keywords not supported by the compiler are always validated with `jsonschema`.
+    """
+    try:
+        check = _SchemaCompiler(schema).compile(schema)
+    except _Unsupported:
+        check = _never
+    def validate_instance(instance):
+        if not check(instance):
+            validate(instance = instance, schema = schema)
+    return validate_instance
+
+class ValidationPolicy(object):
+    """Decides which elements handed to the dictbased `ArchitectureDelegate` are validated against their schemas.
+
+    ``spec`` is one of:
+
+        * "full": every element is validated. This is the default
+        * "first-N", e.g. "first-1000": only the first N elements of each kind are validated
+        * "sampled(rate)", e.g. "sampled(0.01)": each element is validated with probability ``rate``
+        * "off": nothing is validated
+
+    The number of elements of each kind that were actually validated is counted in `checked`.
+
+    Args:
+        spec (:obj:`str`): the validation mode
+        seed: seed of the random generator used by "sampled" mode
+    """
+    def __init__(self, spec = "full", seed = None):
+        match = _policy_pattern.match(spec)
+        if match is None:
+            raise ValueError("Unknown validation policy: {}".format(spec))
+        self.spec = spec
+        self.checked = {}
+        if spec == "full":
+            self.should_check = self.__count
+        elif spec == "off":
+            self.should_check = _never
+        elif match.group("first") is not None:
+            self.__limit = int(match.group("first"))
+            self.should_check = self.__check_first
+        else:
+            self.__rate = float(match.group("rate"))
+            if not 0. <= self.__rate <= 1.:
+                raise ValueError("Sampling rate out of range [0, 1]: {}".format(self.__rate))
+            self.__random = Random(seed).random
+            self.should_check = self.__check_sampled
+
+    def __repr__(self):
+        return "ValidationPolicy({!r})".format(self.spec)
+
+    def __count(self, kind):
+        self.checked[kind] = self.checked.get(kind, 0) + 1
+        return True
+
+    def __check_first(self, kind):
+        checked = self.checked.get(kind, 0)
+        if checked >= self.__limit:
+            return False
+        self.checked[kind] = checked + 1
+        return True
+
+    def __check_sampled(self, kind):
+        return self.__random() < self.__rate and self.__count(kind)
+
+    def reset(self):
+        """Reset the counters, so that "first-N" mode starts validating again."""
+        self.checked = {}